@@ -1,3 +1,4 @@
+import multiprocessing
 from pathlib import Path
 
 from textual.theme import Theme
@@ -114,6 +115,16 @@ class Panelizer(NeonApp):
             ]
         )
 
+        s.register_default("resampling_quality", "max")
+        s.register_default(
+            "resampling_quality_options",
+            [
+                ("Draft", "draft"),
+                ("Balanced", "balanced"),
+                ("Max", "max"),
+            ]
+        )
+
         s.register_default("layout", "framing")
         s.register_default(
             "layout_options",
@@ -150,6 +161,8 @@ def terminal_entry():
     The main TUI entrypoint for panelizer-tui
     Run this directly to launch the app.
     """
+    # Worker processes of frozen (PyInstaller) builds re-enter here
+    multiprocessing.freeze_support()
     app = Panelizer()
     app.run()
 
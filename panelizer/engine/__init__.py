@@ -0,0 +1,19 @@
+"""
+panelizer.engine
+===================
+
+This package contains the parent-side batch engine that runs the Toolkit in worker processes
+and feeds the results to the LoadingScreen. The worker side lives in `panelizer.toolkit.worker`,
+so spawned processes never import the TUI.
+"""
+
+from .concurrency import ConcurrencyController, SystemLoad
+from .dedupe import Deduplicator
+from .journal import BatchJournal
+from .memory_budget import MemoryBudget
+from .process_batch import ProcessBatch
+from .retry import RetryPolicy
+from .scheduling import Scheduler, SchedulingPolicy
+from .worker_pool import BatchContext, WorkerPool
+
+__all__ = ["BatchContext", "BatchJournal", "ConcurrencyController", "Deduplicator", "MemoryBudget", "ProcessBatch", "RetryPolicy", "Scheduler", "SchedulingPolicy", "SystemLoad", "WorkerPool"]
@@ -0,0 +1,148 @@
+import os
+import time
+from typing import NamedTuple, Tuple
+
+
+class SystemLoad(NamedTuple):
+    """CPU utilisation, I/O wait (fractions of all CPU time) and free memory over a sampling window."""
+    cpu: float | None
+    iowait: float | None
+    memory_free: float | None
+
+
+class ConcurrencyController:
+    """
+    Tunes how many workers a batch keeps busy, by hill-climbing towards peak throughput.
+
+    Every INTERVAL seconds it measures items/s, CPU utilisation and I/O wait (from /proc/stat)
+    and free memory (from /proc/meminfo), then moves the limit by one:
+    - It starts conservatively (half the CPUs) and grows while the CPUs have headroom or the work
+      is waiting on I/O (e.g. a network share).
+    - After growing, it keeps the step only if throughput actually improved; otherwise it backs off
+      and holds for a few windows (e.g. when another app is competing for the CPU).
+    - It shrinks whenever free memory drops below MEMORY_RESERVE, regardless of throughput.
+
+    Where /proc is not available, decisions are based on throughput alone.
+    The last decision is kept in 'status', for display.
+    """
+    INTERVAL = 2.0
+    MIN_GAIN = 0.05
+    HOLD_WINDOWS = 3
+    CPU_SATURATED = 0.90
+    IO_BOUND = 0.15
+    MEMORY_RESERVE = 0.10
+
+    def __init__(self, max_limit: int, *, start: int | None = None) -> None:
+        self.max_limit = max(1, max_limit)
+        cpus = os.cpu_count() or 1
+        self.limit = max(1, min(self.max_limit, start or cpus // 2))
+        self.rate: float | None = None
+        self.load = SystemLoad(None, None, None)
+        self.status = f"Workers {self.limit}/{self.max_limit} · measuring throughput"
+
+        self._last_time = time.monotonic()
+        self._last_completed = 0
+        self._last_cpu = self._read_cpu_times()
+        self._rate_before_move: float | None = None
+        self._last_move = 0
+        self._hold = 0
+
+    @staticmethod
+    def _read_cpu_times() -> Tuple[int, int, int] | None:
+        """Returns cumulative (total, idle, iowait) jiffies of all CPUs, or None without /proc."""
+        try:
+            with open("/proc/stat", "r") as f:
+                fields = [int(v) for v in f.readline().split()[1:9]]
+        except (OSError, ValueError):
+            return None
+        if len(fields) < 5:
+            return None
+        return sum(fields), fields[3], fields[4]
+
+    @staticmethod
+    def _read_memory_free() -> float | None:
+        """Returns MemAvailable / MemTotal, or None without /proc."""
+        values = {}
+        try:
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    key, _, rest = line.partition(":")
+                    if key in ("MemTotal", "MemAvailable"):
+                        values[key] = int(rest.split()[0])
+                        if len(values) == 2:
+                            break
+        except (OSError, ValueError, IndexError):
+            return None
+        if not values.get("MemTotal") or "MemAvailable" not in values:
+            return None
+        return values["MemAvailable"] / values["MemTotal"]
+
+    def _sample_load(self) -> SystemLoad:
+        cpu_times = self._read_cpu_times()
+        cpu = iowait = None
+        if cpu_times and self._last_cpu:
+            total = cpu_times[0] - self._last_cpu[0]
+            if total > 0:
+                idle = cpu_times[1] - self._last_cpu[1]
+                waiting = cpu_times[2] - self._last_cpu[2]
+                cpu = max(0.0, 1 - (idle + waiting) / total)
+                iowait = max(0.0, waiting / total)
+        self._last_cpu = cpu_times
+        return SystemLoad(cpu, iowait, self._read_memory_free())
+
+    def update(self, completed: int) -> int:
+        """Feeds the number of completed items; returns the (possibly new) worker limit."""
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        if elapsed < self.INTERVAL:
+            return self.limit
+
+        self.rate = (completed - self._last_completed) / elapsed
+        self.load = self._sample_load()
+        self._last_time = now
+        self._last_completed = completed
+
+        move, reason = self._decide(self.rate, self.load)
+        if move:
+            self._rate_before_move = self.rate
+            self.limit += move
+        self._last_move = move
+        self.status = self._format_status(reason)
+        return self.limit
+
+    def _decide(self, rate: float, load: SystemLoad) -> Tuple[int, str]:
+        """Returns the step (-1, 0 or +1) and the reason behind it."""
+        if load.memory_free is not None and load.memory_free < self.MEMORY_RESERVE:
+            self._hold = self.HOLD_WINDOWS
+            return (-1, "low memory, shrinking") if self.limit > 1 else (0, "low memory")
+
+        if rate <= 0:
+            return 0, "waiting for results"
+
+        if self._last_move > 0 and self._rate_before_move is not None:
+            if rate < self._rate_before_move * (1 + self.MIN_GAIN):
+                self._hold = self.HOLD_WINDOWS
+                return -1, "no gain from the last worker, backing off"
+
+        if self._hold > 0:
+            self._hold -= 1
+            return 0, "holding"
+
+        if self.limit >= self.max_limit:
+            return 0, "at maximum"
+        if load.iowait is not None and load.iowait > self.IO_BOUND:
+            return 1, "I/O bound, growing"
+        if load.cpu is None or load.cpu < self.CPU_SATURATED:
+            return 1, "CPU headroom, growing"
+        return 0, "CPU saturated"
+
+    def _format_status(self, reason: str) -> str:
+        parts = [f"Workers {self.limit}/{self.max_limit}"]
+        if self.rate is not None:
+            parts.append(f"{self.rate:.1f} items/s")
+        if self.load.cpu is not None:
+            parts.append(f"CPU {self.load.cpu:.0%}")
+        if self.load.iowait is not None:
+            parts.append(f"I/O wait {self.load.iowait:.0%}")
+        parts.append(reason)
+        return " · ".join(parts)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import stat
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+from panelizer.toolkit import SourceIndex
+
+
+class Deduplicator:
+    """
+    Finds payloads whose sources have the same content as an earlier payload's (e.g. the same frame
+    exported twice under different names), before anything is decoded.
+
+    Files are compared in stages, each only for the files still colliding after the previous one:
+    - their size (one stat per file),
+    - a hash of their first and last PARTIAL_BLOCK bytes,
+    - a hash of their whole content.
+    The stat and hash calls run on a pool of THREADS threads, since on network mounts they are
+    bound by latency. With a SourceIndex, full hashes are read from it (and added to it) instead.
+    A file that cannot be read is never a duplicate; rendering reports its error.
+
+    A payload is a duplicate when each of its files matches the file at the same position in an
+    earlier payload; the first instance, in payload order, is kept.
+
+    Usage:
+    ::
+        duplicates = Deduplicator.find(groups)  # {duplicate id: id of the payload kept}
+    """
+    PARTIAL_BLOCK = 64 * 1024
+    READ_SIZE = 1024 * 1024
+    THREADS = 8
+
+    @staticmethod
+    def find(groups: Sequence[Sequence[str]], index: SourceIndex | None = None) -> Dict[int, int]:
+        """Maps each duplicate payload id to the id of the first payload with the same content."""
+        paths = sorted({path for group in groups for path in group})
+        if len(paths) < 2:
+            return {}
+        with ThreadPoolExecutor(max_workers=Deduplicator.THREADS, thread_name_prefix="dedupe") as executor:
+            sizes = Deduplicator._refine({path: None for path in paths}, Deduplicator._size, executor)
+            partial = Deduplicator._refine(sizes, Deduplicator._partial_hash, executor)
+            full = Deduplicator._refine(partial, index.digest if index else Deduplicator._full_hash, executor)
+
+        originals: Dict[Tuple[Hashable, ...], int] = {}
+        duplicates: Dict[int, int] = {}
+        for item_id, group in enumerate(groups):
+            if not group or any(path not in full for path in group):
+                continue
+            key = tuple(full[path] for path in group)
+            if key in originals:
+                duplicates[item_id] = originals[key]
+            else:
+                originals[key] = item_id
+        return duplicates
+
+    @staticmethod
+    def _refine(
+            keys: Dict[str, Hashable],
+            stage: Callable[[str], Hashable],
+            executor: ThreadPoolExecutor
+    ) -> Dict[str, Hashable]:
+        """
+        Extends the keys of the files that still collide by one stage. Files left alone in their
+        group, or failing the stage (None), are dropped: they cannot be duplicates.
+        """
+        buckets: Dict[Hashable, List[str]] = defaultdict(list)
+        for path, key in keys.items():
+            buckets[key].append(path)
+        candidates = [path for bucket in buckets.values() if len(bucket) > 1 for path in bucket]
+        refined = {}
+        for path, value in zip(candidates, executor.map(stage, candidates)):
+            if value is not None:
+                refined[path] = (keys[path], value)
+        counts: Dict[Hashable, int] = defaultdict(int)
+        for key in refined.values():
+            counts[key] += 1
+        return {path: key for path, key in refined.items() if counts[key] > 1}
+
+    @staticmethod
+    def _size(path: str) -> int | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        # Only regular files are read further, so a FIFO posing as an image never blocks
+        return st.st_size if stat.S_ISREG(st.st_mode) else None
+
+    @staticmethod
+    def _partial_hash(path: str) -> bytes | None:
+        """Hashes the first and last PARTIAL_BLOCK bytes (the whole file, if smaller than both)."""
+        block = Deduplicator.PARTIAL_BLOCK
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read(block))
+                size = os.fstat(f.fileno()).st_size
+                if size > block:
+                    f.seek(max(block, size - block))
+                    digest.update(f.read(block))
+        except OSError:
+            return None
+        return digest.digest()
+
+    @staticmethod
+    def _full_hash(path: str) -> bytes | None:
+        """Hashes the whole file (files covered by the partial hash are not read again)."""
+        try:
+            if os.stat(path).st_size <= 2 * Deduplicator.PARTIAL_BLOCK:
+                return b""
+            digest = hashlib.blake2b(digest_size=32)
+            with open(path, "rb") as f:
+                while chunk := f.read(Deduplicator.READ_SIZE):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.digest()
@@ -0,0 +1,219 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, List, Sequence, Tuple
+
+from panelizer.toolkit import RenderConfig
+from textual_neon import BatchResult, Errors
+
+
+class BatchJournal:
+    """
+    An append-only record of a batch, kept next to its output directory ('<output_dir_name>.journal'),
+    so a batch cut short by a closed terminal or a reboot can be resumed into the same directory.
+
+    The file holds JSON lines: a header (the settings the RenderConfig was built from and its
+    fingerprint), the planned payloads, then one line per finished payload. The header and the
+    plan are written atomically; finished payloads are appended as they arrive and fsynced at most
+    every SYNC_INTERVAL seconds, so a crash loses at most that much progress (those payloads are
+    simply rendered again). A torn last line is ignored and cut off on resume.
+
+    A failed payload counts as finished (it has its '.failed' marker), and so does a duplicate;
+    only payloads that never reported are rendered again. Once every payload has finished, 'close' deletes the journal.
+    Journaling never fails a batch: on a write error, the journal stops and reports it.
+
+    Usage:
+    ::
+        journal = BatchJournal.create(source_dir, settings_dict, config, groups)
+        runner = ProcessBatch(groups, config, journal=journal)
+        ...
+        journal = BatchJournal.find(source_dir)[0]
+        groups = journal.resume()  # the payloads still to render, in the journal's order
+    """
+    SUFFIX = ".journal"
+    VERSION = 1
+    SYNC_INTERVAL = 1.0
+
+    def __init__(
+            self,
+            path: Path,
+            settings: dict[str, Any],
+            fingerprint: str,
+            groups: Sequence[Sequence[str]],
+            done: dict[int, bool] | None = None,
+            end: int | None = None
+    ) -> None:
+        self.path = path
+        self.settings = settings
+        self.fingerprint = fingerprint
+        self.groups = tuple(tuple(group) for group in groups)
+        self.done: dict[int, bool] = done or {}
+        # Maps the ids of the running batch (which may only cover the pending payloads) to the plan's
+        self._ids: List[int] = list(range(len(self.groups)))
+        self._end = end
+        self._file = None
+        self._synced_at = time.monotonic()
+        self._dirty = False
+        self._failed = False
+
+    @staticmethod
+    def path_for(source_dir: Path, output_dir_name: str) -> Path:
+        return source_dir / f"{output_dir_name}{BatchJournal.SUFFIX}"
+
+    @property
+    def output_dir_name(self) -> str:
+        return self.path.name[:-len(self.SUFFIX)]
+
+    @property
+    def pending(self) -> List[int]:
+        """The ids of the planned payloads that have not finished."""
+        return [item_id for item_id in range(len(self.groups)) if item_id not in self.done]
+
+    @classmethod
+    def create(
+            cls,
+            source_dir: Path,
+            settings: dict[str, Any],
+            config: RenderConfig,
+            groups: Sequence[Sequence[str]]
+    ) -> "BatchJournal | None":
+        """Writes the header and the plan of a new batch. Returns None if the journal cannot be written."""
+        journal = cls(cls.path_for(source_dir, config.output_dir_name), settings, config.fingerprint, groups)
+        header = {"journal": cls.VERSION, "fingerprint": journal.fingerprint, "settings": settings}
+        data = "".join(json.dumps(record) + "\n" for record in (header, {"plan": journal.groups}))
+        try:
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{journal.path.name}.", suffix=".tmp", dir=source_dir)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_name, journal.path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[BatchJournal] Error creating the journal: {e}")
+            return None
+        return journal
+
+    @classmethod
+    def load(cls, path: Path) -> "BatchJournal | None":
+        """Reads a journal up to its last complete line. Returns None if it is unreadable or foreign."""
+        try:
+            with path.open("rb") as f:
+                header = json.loads(f.readline())
+                plan = json.loads(f.readline())
+                if header.get("journal") != cls.VERSION or not isinstance(plan.get("plan"), list):
+                    return None
+                done: dict[int, bool] = {}
+                end = f.tell()
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                        done[int(record["done"])] = bool(record["ok"])
+                    except (ValueError, KeyError, TypeError):
+                        break
+                    end += len(line)
+        except (OSError, ValueError, AttributeError):
+            return None
+        return cls(path, header.get("settings") or {}, header.get("fingerprint", ""), plan["plan"], done, end)
+
+    @staticmethod
+    def find(source_dir: Path) -> List["BatchJournal"]:
+        """The unfinished journals of a directory, newest first."""
+        try:
+            paths = sorted(
+                source_dir.glob(f"*{BatchJournal.SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True
+            )
+        except OSError:
+            return []
+        journals = [BatchJournal.load(path) for path in paths]
+        return [journal for journal in journals if journal is not None and journal.pending]
+
+    def resume(self) -> List[Tuple[str, ...]]:
+        """Returns the payloads still to render; the results of the next batch refer to this list."""
+        self._ids = self.pending
+        return [self.groups[item_id] for item_id in self._ids]
+
+    def record(self, results: List[BatchResult]) -> None:
+        """Appends the payloads that finished (errors raised by the runner, except duplicates, are not)."""
+        lines = []
+        for index, outcome in results:
+            if isinstance(outcome, Exception) and not isinstance(outcome, Errors.DuplicateError):
+                continue
+            item_id = self._ids[index]
+            self.done[item_id] = outcome is True
+            lines.append(json.dumps({"done": item_id, "ok": outcome is True}) + "\n")
+        if not lines or self._failed:
+            return
+        try:
+            if self._file is None:
+                self._file = self._open()
+            self._file.write("".join(lines).encode("utf-8"))
+            self._file.flush()
+            self._dirty = True
+        except OSError as e:
+            self._fail(e)
+
+    @property
+    def sync_due(self) -> bool:
+        return self._dirty and time.monotonic() - self._synced_at >= self.SYNC_INTERVAL
+
+    def sync(self) -> None:
+        """Makes the appended lines durable. Blocks on the disk, so call it off the event loop."""
+        if self._file is None or not self._dirty:
+            return
+        self._dirty = False
+        self._synced_at = time.monotonic()
+        try:
+            os.fsync(self._file.fileno())
+        except (OSError, ValueError) as e:
+            self._fail(e)
+
+    def close(self) -> None:
+        """Syncs and closes the journal, or deletes it once every payload has finished."""
+        self.sync()
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        if not self.pending:
+            self.discard()
+
+    def discard(self) -> None:
+        """Deletes the journal, giving up on resuming its batch."""
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"[BatchJournal] Error deleting the journal: {e}")
+
+    def _open(self):
+        """Opens the journal for appending, after cutting off a torn last line."""
+        f = self.path.open("r+b")
+        try:
+            if self._end is not None:
+                f.truncate(self._end)
+                self._end = None
+            f.seek(0, os.SEEK_END)
+        except OSError:
+            f.close()
+            raise
+        return f
+
+    def _fail(self, error: OSError | ValueError) -> None:
+        # A resume then renders the payloads finished since again, which is safe
+        print(f"[BatchJournal] Error writing the journal: {error}")
+        self._failed = True
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
@@ -0,0 +1,73 @@
+import os
+
+
+class MemoryBudget:
+    """
+    Admits work while the summed peak-memory estimates of everything in flight stay under a limit
+    (see Toolkit.estimate_peak_memory), so several panoramas landing together wait for headroom
+    instead of exhausting the RAM.
+
+    An item larger than the whole budget is still admitted once nothing else is in flight,
+    so it runs alone rather than blocking the batch forever.
+
+    Memory held outside of any item (e.g. the canvases each worker's CanvasPool keeps between
+    items) is 'reserved' and taken off the limit.
+
+    Usage:
+    ::
+        budget = MemoryBudget(reserved=workers * CanvasPool.MAX_BYTES)  # half of the memory available now
+        if budget.try_admit(cost):
+            ...  # submit, then budget.release(cost) when it finishes
+    """
+    DEFAULT_FRACTION = 0.5
+    FALLBACK_LIMIT = 2 * 1024 ** 3
+
+    def __init__(self, limit: int | None = None, reserved: int = 0) -> None:
+        self.limit = max(1, (limit or self.default_limit()) - reserved)
+        self.in_use = 0
+        self.blocked = 0
+
+    @staticmethod
+    def default_limit() -> int:
+        """DEFAULT_FRACTION of the memory available to new processes, or FALLBACK_LIMIT if unknown."""
+        available = MemoryBudget._read_available()
+        if available is None:
+            return MemoryBudget.FALLBACK_LIMIT
+        return int(available * MemoryBudget.DEFAULT_FRACTION)
+
+    @staticmethod
+    def _read_available() -> int | None:
+        """MemAvailable from /proc/meminfo, or the free physical pages where /proc is missing."""
+        try:
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        try:
+            return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (AttributeError, ValueError, OSError):
+            return None
+
+    def try_admit(self, cost: int) -> bool:
+        """Reserves 'cost' bytes if they fit (or if nothing else is in flight)."""
+        if self.in_use and self.in_use + cost > self.limit:
+            self.blocked = cost
+            return False
+        self.in_use += cost
+        self.blocked = 0
+        return True
+
+    def release(self, cost: int) -> None:
+        """Returns the reservation of a finished item."""
+        self.in_use = max(0, self.in_use - cost)
+
+    @property
+    def status(self) -> str | None:
+        """A short note while an item is waiting for headroom."""
+        if not self.blocked:
+            return None
+        mib = 1024 ** 2
+        free = max(0, self.limit - self.in_use)
+        return f"waiting for memory ({self.blocked // mib} MiB needed, {free // mib} MiB free)"
@@ -0,0 +1,472 @@
+import asyncio
+import heapq
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Deque, List, Sequence, Tuple
+
+from panelizer.toolkit import CanvasPool, RenderConfig, SourceIndex, Toolkit, TransientIOError, Worker
+from textual_neon import BatchResult, BatchRunner, Errors
+
+from .concurrency import ConcurrencyController
+from .dedupe import Deduplicator
+from .journal import BatchJournal
+from .memory_budget import MemoryBudget
+from .retry import RetryPolicy
+from .scheduling import Scheduler, SchedulingPolicy
+from .worker_pool import BatchContext, WorkerPool
+
+
+class ProcessBatch(BatchRunner):
+    """
+    Runs a batch of Toolkit payloads on a WorkerPool.
+
+    IPC is kept to a minimum, so it stays negligible even for tens of thousands of thumbnails:
+    - The RenderConfig and the path groups cross the process boundary once per worker (see Worker).
+    - Tasks are chunks of integer payload ids; each chunk comes back as a single list of results.
+    - Progress flows through a shared-memory counter, which 'completed' reads without any messages.
+
+    Each busy worker holds exactly one chunk. With 'adaptive' (the default), a ConcurrencyController
+    decides how many workers are busy at a time and its decisions are exposed through 'status';
+    otherwise every worker of the pool is kept busy.
+
+    A chunk is only submitted while the peak-memory estimate of everything in flight fits the
+    MemoryBudget ('memory_budget' bytes, by default half of the available memory), less the canvases
+    every worker may keep in its CanvasPool. A chunk costs as much as its largest payload, since
+    a worker renders them one at a time.
+
+    With 'dedupe' (the default), payloads with the same content as an earlier one (see Deduplicator)
+    are reported as Errors.DuplicateError before anything is rendered, and skipped.
+
+    Payloads are handed out in the order of the scheduling 'policy' (see Scheduler). With
+    'largest_first', every payload is probed up front and chunks are also capped by their summed
+    cost, so the expensive payloads are spread over the workers instead of queueing in one chunk.
+
+    'cancel' stops the batch within a second: the workers are told to stop at their next checkpoint
+    (between stages and panels, see CancelToken), and those still busy after CANCEL_GRACE
+    (e.g. inside a single huge resample) are killed and replaced. Either way, the outputs of
+    unfinished payloads are removed.
+
+    One bad file never takes the batch down. A worker busy with the same item for longer than
+    'item_timeout' seconds is killed. When a worker dies (killed, crashed in a decoder or out of
+    address space), the pool is rebuilt and the lost chunks are resubmitted. The items that were
+    being rendered become suspects and are retried alone: if one of them takes a worker down again
+    (or it had timed out), it gets a '.failed' marker and is reported as failed, like any other
+    file the Toolkit could not export.
+
+    Payloads failing with a transient I/O error (see TransientIOError) are retried in a final pass,
+    after a backoff, as set by the RetryPolicy 'retry'; 'summary' reports how many were retried.
+
+    With a BatchJournal, every finished payload is recorded as it is yielded, so the batch can be
+    resumed after a crash; the journal is closed (and deleted, if nothing is left) when the batch ends.
+
+    With a SourceIndex, the memory estimates and the duplicate search read the image headers and
+    content digests indexed by earlier sessions instead of the files.
+
+    Without a pool, a private one is started for the batch and shut down afterwards.
+
+    Usage:
+    ::
+        groups = [paths for paths, _ in Toolkit.prepare_queue(files, config)]
+        ScreenData(..., runner=ProcessBatch(groups, config, pool=WorkerPool.ensure(app=self.app)))
+    """
+    CHUNKS_PER_WORKER = 8
+    CANCEL_GRACE = 0.5
+    ITEM_TIMEOUT = 120.0
+    PROBE_TIMEOUT = 10.0
+    MAX_UNEXPLAINED_BREAKS = 3
+
+    def __init__(
+            self,
+            groups: Sequence[Sequence[str]],
+            config: RenderConfig,
+            *,
+            pool: WorkerPool | None = None,
+            chunk_size: int | None = None,
+            adaptive: bool = True,
+            memory_budget: int | None = None,
+            policy: SchedulingPolicy = "fifo",
+            item_timeout: float | None = ITEM_TIMEOUT,
+            retry: RetryPolicy | None = RetryPolicy(),
+            journal: BatchJournal | None = None,
+            dedupe: bool = True,
+            index: SourceIndex | None = None
+    ) -> None:
+        if policy not in Scheduler.POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}', expected one of {Scheduler.POLICIES}")
+        self._groups = tuple(tuple(group) for group in groups)
+        self._config = config
+        self._pool = pool
+        self._batch: BatchContext | None = None
+        self._cancelled = False
+        self._wake = asyncio.Event()
+        self.chunk_size = chunk_size
+        self.adaptive = adaptive
+        self._controller: ConcurrencyController | None = None
+        self._memory_budget = memory_budget
+        self._budget: MemoryBudget | None = None
+        self.policy = policy
+        self._costs: dict[int, int] = {}
+        self.item_timeout = item_timeout
+        self._timed_out: dict[int, str] = {}
+        self._suspects: set[int] = set()
+        self._unexplained_breaks = 0
+        self._n_yielded = 0
+        self.retry = retry
+        self._attempts: dict[int, int] = {}
+        self._deferred: List[Tuple[float, int]] = []
+        self._n_retries_failed = 0
+        self.journal = journal
+        self.dedupe = dedupe
+        self._duplicates: dict[int, int] = {}
+        self.index = index
+
+    @staticmethod
+    def _auto_chunk_size(total: int, workers: int) -> int:
+        """Small enough to balance the load, large enough to amortize the round trips."""
+        return max(1, min(WorkerPool.MAX_CHUNK_SIZE, total // (workers * ProcessBatch.CHUNKS_PER_WORKER)))
+
+    @property
+    def completed(self) -> int:
+        if self._pool is None or self._batch is None:
+            return 0
+        # Duplicates and items that failed for good after their retries were never counted by a worker
+        # (and payloads retried after a worker counted them are counted twice)
+        counted = self._pool.completed(self._batch) + len(self._duplicates)
+        return min(len(self._groups), max(counted, self._n_yielded))
+
+    @property
+    def status(self) -> str | None:
+        parts = [
+            component.status for component in (self._controller, self._budget)
+            if component is not None and component.status
+        ]
+        return " · ".join(parts) or None
+
+    @property
+    def summary(self) -> str | None:
+        if not self._attempts:
+            return None
+        return (
+            f"Retried {len(self._attempts)} item(s) after transient I/O errors "
+            f"({sum(self._attempts.values())} attempt(s)), {self._n_retries_failed} still failed."
+        )
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        if self._pool is not None and self._batch is not None:
+            self._pool.cancel_batch(self._batch)
+        self._wake.set()
+
+    def _limit(self, workers: int) -> int:
+        if self._controller is None:
+            return workers
+        return self._controller.update(self.completed)
+
+    def _collect(
+            self,
+            future: asyncio.Future,
+            in_flight: dict[asyncio.Future, Tuple[List[int], int]],
+            budget: MemoryBudget,
+            broken: List[List[int]]
+    ) -> List[BatchResult]:
+        """
+        Takes a finished chunk out of flight and returns its results. If the chunk failed as a whole
+        (e.g. its results could not be sent back), each of its items is failed.
+        The chunks lost to a broken pool are added to 'broken' instead.
+        """
+        chunk, cost = in_flight.pop(future)
+        budget.release(cost)
+        try:
+            results = future.result()
+        except BrokenProcessPool as e:
+            if self._unexplained_breaks >= self.MAX_UNEXPLAINED_BREAKS:
+                # The pool itself cannot work (e.g. workers fail to start): give up on the batch
+                self._cancelled = True
+                return [(item_id, e) for item_id in chunk]
+            broken.append(chunk)
+            return []
+        except Exception as e:
+            details = f"{type(e).__name__}: {e}"
+            for item_id in chunk:
+                Toolkit.record_failure(list(self._groups[item_id]), self._config, details)
+            return [(item_id, False) for item_id in chunk]
+        self._unexplained_breaks = 0
+        return results
+
+    async def _report(self, results: List[BatchResult]) -> None:
+        """Counts the results about to be yielded and records them in the journal."""
+        self._n_yielded += len(results)
+        if self.journal is not None:
+            self.journal.record(results)
+            if self.journal.sync_due:
+                await asyncio.to_thread(self.journal.sync)
+
+    def _defer(self, results: List[BatchResult]) -> List[BatchResult]:
+        """
+        Sets the payloads that failed with a transient I/O error aside for the final pass,
+        or fails them for good once they are out of retries. Returns the results to report.
+        """
+        reported: List[BatchResult] = []
+        for item_id, outcome in results:
+            if not isinstance(outcome, TransientIOError):
+                reported.append((item_id, outcome))
+                continue
+            attempt = self._attempts.get(item_id, 0) + 1
+            if self.retry is not None and attempt <= self.retry.attempts:
+                self._attempts[item_id] = attempt
+                ready_at = asyncio.get_running_loop().time() + self.retry.delay(attempt)
+                heapq.heappush(self._deferred, (ready_at, item_id))
+                continue
+            if item_id in self._attempts:
+                self._n_retries_failed += 1
+                details = f"{outcome} (still failing after {self._attempts[item_id]} retries)"
+            else:
+                details = str(outcome)
+            Toolkit.record_failure(list(self._groups[item_id]), self._config, details)
+            reported.append((item_id, False))
+        return reported
+
+    def _release_retries(self, plan: Deque[List[int]]) -> float | None:
+        """
+        Once the plan is drained, moves the deferred payloads whose backoff is over into it.
+        Returns the seconds until the next one is due, if any.
+        """
+        if plan or not self._deferred:
+            return None
+        now = asyncio.get_running_loop().time()
+        while self._deferred and self._deferred[0][0] <= now:
+            plan.append([heapq.heappop(self._deferred)[1]])
+        if not self._deferred:
+            return None
+        return self._deferred[0][0] - now
+
+    def _check_timeouts(self, pool: WorkerPool, batch: BatchContext) -> None:
+        """Kills the workers stuck on one item for longer than 'item_timeout'."""
+        if not self.item_timeout:
+            return
+        for pid, item_id, seconds in pool.running_items(batch):
+            if seconds > self.item_timeout and item_id not in self._timed_out:
+                self._timed_out[item_id] = f"Timed out after {self.item_timeout:.0f} seconds."
+                pool.kill(pid)
+
+    async def _recover(
+            self,
+            pool: WorkerPool,
+            batch: BatchContext,
+            broken: List[List[int]],
+            in_flight: dict[asyncio.Future, Tuple[List[int], int]],
+            budget: MemoryBudget,
+            plan: Deque[List[int]]
+    ) -> List[BatchResult]:
+        """
+        Handles a broken pool: fails the items that timed out or took a worker down twice,
+        requeues the rest of the lost chunks and returns the results to report.
+        """
+        # Read before the pool is rebuilt, which clears the activity slots
+        running = {item_id for _, item_id, _ in pool.running_items(batch)}
+        results: List[BatchResult] = []
+        if in_flight:
+            # The other chunks in flight break with the pool, unless they just finished
+            await asyncio.wait(in_flight)
+            for future in list(in_flight):
+                results.extend(self._collect(future, in_flight, budget, broken))
+        if not running:
+            self._unexplained_breaks += 1
+
+        retries: List[List[int]] = []
+        for chunk in broken:
+            remaining = []
+            for item_id in chunk:
+                isolated = item_id in self._suspects and (item_id in running or len(chunk) == 1)
+                reason = self._timed_out.pop(item_id, None)
+                if reason is None and isolated:
+                    reason = "The worker rendering it crashed twice (e.g. a corrupt file or out of memory)."
+                if reason is not None:
+                    Toolkit.record_failure(list(self._groups[item_id]), self._config, reason)
+                    results.append((item_id, False))
+                elif item_id in running or not running:
+                    # Crashed or was a bystander; only a retry on its own can tell
+                    self._suspects.add(item_id)
+                    plan.append([item_id])
+                else:
+                    remaining.append(item_id)
+                if item_id in running:
+                    Toolkit.discard_partial_outputs(list(self._groups[item_id]), self._config)
+            if remaining:
+                retries.append(remaining)
+        plan.extendleft(reversed(retries))
+
+        # The lost chunks may have finished some items, which will be counted again
+        pool.reset_progress(batch, self._n_yielded + len(results))
+        return results
+
+    async def _probe(self, chunk: List[int]) -> int:
+        """The chunk's cost, probed off the event loop; a stalled disk only costs PROBE_TIMEOUT."""
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(self._chunk_cost, chunk), self.PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return 0
+
+    def _is_isolated(self, chunk: List[int]) -> bool:
+        return len(chunk) == 1 and chunk[0] in self._suspects
+
+    def _kill(self, pool: WorkerPool, in_flight: dict[asyncio.Future, Tuple[List[int], int]]) -> None:
+        """Kills the workers still busy after a cancellation and removes what they left half-written."""
+        for future in in_flight:
+            future.cancel()
+        pool.restart()
+        for chunk, _ in in_flight.values():
+            for item_id in chunk:
+                Toolkit.discard_partial_outputs(list(self._groups[item_id]), self._config)
+        in_flight.clear()
+
+    def _cost(self, item_id: int) -> int:
+        """The (cached) peak-memory estimate of a payload, which doubles as its cost."""
+        cost = self._costs.get(item_id)
+        if cost is None:
+            cost = self._costs[item_id] = Toolkit.estimate_peak_memory(
+                list(self._groups[item_id]), self._config, self.index
+            )
+        return cost
+
+    def _chunk_cost(self, chunk: List[int]) -> int:
+        """The peak-memory estimate of a chunk: that of its largest payload."""
+        return max((self._cost(i) for i in chunk), default=0)
+
+    def _chunks(self, order: List[int], size: int, max_cost: int | None = None) -> List[List[int]]:
+        """Splits the ordered ids into chunks of at most 'size' items and, if given, 'max_cost'."""
+        chunks: List[List[int]] = []
+        chunk: List[int] = []
+        chunk_cost = 0
+        for item_id in order:
+            cost = self._costs.get(item_id, 0) if max_cost else 0
+            if chunk and (len(chunk) >= size or (max_cost and chunk_cost + cost > max_cost)):
+                chunks.append(chunk)
+                chunk, chunk_cost = [], 0
+            chunk.append(item_id)
+            chunk_cost += cost
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _plan(self, workers: int) -> List[List[int]]:
+        """
+        Finds the duplicates, orders the other payloads by the policy and splits them into chunks
+        (may read or probe every payload).
+        """
+        if self.dedupe:
+            self._duplicates = Deduplicator.find(self._groups, self.index)
+        skip = self._duplicates
+        order = [
+            item_id for item_id in Scheduler.order(
+                self.policy, self._groups, lambda i: 0 if i in skip else self._cost(i)
+            )
+            if item_id not in skip
+        ]
+        size = self.chunk_size or self._auto_chunk_size(len(order), workers)
+        max_cost = None
+        if self.policy == "largest_first":
+            max_cost = max(1, sum(self._costs.values()) // (workers * self.CHUNKS_PER_WORKER))
+        return self._chunks(order, size, max_cost)
+
+    async def results(self) -> AsyncIterator[List[BatchResult]]:
+        """Keeps one chunk per busy worker in flight and yields each chunk's results as it finishes."""
+        owns_pool = self._pool is None
+        pool = self._pool = self._pool or WorkerPool()
+        if owns_pool:
+            pool.start()
+        else:
+            await pool.ensure_healthy()
+
+        batch = self._batch = pool.begin_batch(self._config, self._groups)
+        plan = deque(await asyncio.to_thread(self._plan, pool.workers))
+        if self.adaptive:
+            self._controller = ConcurrencyController(pool.workers)
+        # Pooled canvases are counted like the estimates count canvases (CanvasPool.nbytes)
+        budget = self._budget = MemoryBudget(self._memory_budget, reserved=pool.workers * CanvasPool.MAX_BYTES)
+        pending: Tuple[List[int], int] | None = None
+        in_flight: dict[asyncio.Future, Tuple[List[int], int]] = {}
+        wake = asyncio.ensure_future(self._wake.wait())
+        try:
+            if self._duplicates:
+                results = [
+                    (item_id, Errors.DuplicateError(
+                        f"Same content as '{Toolkit.payload_name(self._groups[original])}'."
+                    ))
+                    for item_id, original in sorted(self._duplicates.items())
+                ]
+                await self._report(results)
+                yield results
+
+            while True:
+                if self._cancelled:
+                    if in_flight:
+                        # Give the workers CANCEL_GRACE to reach a checkpoint, then kill the stragglers
+                        done, _ = await asyncio.wait(in_flight, timeout=self.CANCEL_GRACE)
+                        for future in done:
+                            results = self._defer(self._collect(future, in_flight, budget, []))
+                            await self._report(results)
+                            yield results
+                        if in_flight:
+                            self._kill(pool, in_flight)
+                    return
+
+                self._check_timeouts(pool, batch)
+                retry_in = self._release_retries(plan) if pending is None else None
+                while not self._cancelled and len(in_flight) < self._limit(pool.workers):
+                    if pending is None:
+                        if not plan:
+                            break
+                        chunk = plan.popleft()
+                        pending = chunk, await self._probe(chunk)
+                    chunk, cost = pending
+                    # Suspects of a crash run alone, so a second crash is theirs for sure
+                    if in_flight and (self._is_isolated(chunk) or any(
+                            self._is_isolated(running) for running, _ in in_flight.values()
+                    )):
+                        break
+                    if not budget.try_admit(cost):
+                        break
+                    pending = None
+                    task = pool.executor.submit(Worker.run_chunk, batch.serial, batch.path, chunk)
+                    in_flight[asyncio.wrap_future(task)] = chunk, cost
+
+                if not in_flight:
+                    if pending is None and not plan:
+                        if retry_in is None:
+                            return
+                        # Only retries are left: sleep through their backoff, unless cancelled
+                        await asyncio.wait([wake], timeout=retry_in)
+                    continue
+
+                timeout = ConcurrencyController.INTERVAL
+                if retry_in is not None:
+                    timeout = min(timeout, retry_in)
+                done, _ = await asyncio.wait(
+                    [*in_flight, wake], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                broken: List[List[int]] = []
+                for future in done:
+                    if future is wake or future not in in_flight:
+                        continue
+                    results = self._collect(future, in_flight, budget, broken)
+                    if broken:
+                        # A worker died: every chunk in flight is lost with the pool
+                        results.extend(await self._recover(pool, batch, broken, in_flight, budget, plan))
+                        broken = []
+                    results = self._defer(results)
+                    if results:
+                        await self._report(results)
+                        yield results
+        finally:
+            wake.cancel()
+            if in_flight:
+                # Abandoned by the consumer: let the workers drop what they are doing
+                pool.cancel_batch(batch)
+            for future in in_flight:
+                future.cancel()
+            if owns_pool:
+                pool.shutdown()
+            pool.end_batch(batch)
+            if self.journal is not None:
+                self.journal.close()
@@ -0,0 +1,26 @@
+from typing import NamedTuple
+
+
+class RetryPolicy(NamedTuple):
+    """
+    How a ProcessBatch retries the payloads that failed with a transient I/O error
+    (see TransientIOError), e.g. a network share dropping a read. Decode errors are never retried.
+
+    A failed payload does not block the queue: it is set aside and retried in a final pass,
+    once the rest of the batch has been handed out, and no earlier than its backoff delay
+    ('backoff' seconds, multiplied by 'factor' after every attempt, up to 'max_backoff').
+    After 'attempts' retries, it gets a '.failed' marker like any other failure.
+
+    Usage:
+    ::
+        ProcessBatch(groups, config, retry=RetryPolicy(attempts=5, backoff=2.0))
+        ProcessBatch(groups, config, retry=None)  # fail on the first error
+    """
+    attempts: int = 3
+    backoff: float = 1.0
+    factor: float = 2.0
+    max_backoff: float = 30.0
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before the given retry (1 for the first)."""
+        return min(self.max_backoff, self.backoff * self.factor ** max(0, attempt - 1))
@@ -0,0 +1,340 @@
+import asyncio
+import atexit
+import itertools
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Sequence, Tuple
+
+from textual import log
+
+from panelizer.toolkit import OutputCache, OutputStager, RenderConfig, SourceIndex, SourcePrefetcher, Worker
+
+if TYPE_CHECKING:
+    from textual.app import App
+
+
+class BatchContext(NamedTuple):
+    """A batch registered with the WorkerPool: its serial number and context file."""
+    serial: int
+    path: str
+    total: int
+
+
+class WorkerPool:
+    """
+    A warm, persistent pool of worker processes, reused across batches for the lifetime of the app.
+
+    - The pool may grow to twice as many processes as CPUs, so I/O-bound batches can overlap their waits;
+      how many are kept busy is up to the batch (see ConcurrencyController).
+    - 'start' spawns one worker per CPU in the background (they import Pillow and the toolkit on their own),
+      so the first batch does not pay the process start-up. Any extra workers are spawned on demand.
+    - Workers are recycled once they have rendered RECYCLE_AFTER_ITEMS items, to contain leaks: the pool
+      is replaced before the next batch (see 'ensure_healthy'). Within a batch, the executor retires
+      a worker after RECYCLE_AFTER_ITEMS tasks at the latest.
+    - Each worker's address space is capped ('address_space' bytes, by default half of the physical
+      memory; 0 disables it), so a single hostile file fails alone instead of exhausting the machine.
+    - Outputs are encoded in 'staging_dir' (by default the tmpfs of OutputStager.default_root;
+      an empty string disables it) and published to the output directory 'flush_batch' at a time.
+    - Each worker reads the sources of its chunk ahead, within 'prefetch_budget' bytes (0 disables it).
+    - Outputs are cached in 'cache_dir' (by default OutputCache.default_root; an empty string
+      disables it), within 'cache_size' bytes, and copied from there when rendered again. Workers read
+      the content digests of sources they did not read ahead from the SourceIndex at 'index_path'
+      (by default SourceIndex.default_path; an empty string disables it).
+    - 'running_items' tells which item each worker is rendering and for how long; 'kill' stops one.
+    - 'ensure_healthy' pings the pool before each batch and rebuilds it if it is broken, hung or spent.
+    - 'cancel_batch' stops a batch cooperatively; 'restart' kills workers stuck inside an item.
+    - 'shutdown' stops the workers; 'ensure' binds it to the app's shutdown (and to interpreter exit).
+
+    Usage:
+    ::
+        # In your Screen's on_mount
+        self.worker_pool = WorkerPool.ensure(app=self.app)
+        self.worker_pool.start()
+        ...
+        ScreenData(..., runner=ProcessBatch(groups, config, pool=self.worker_pool))
+    """
+    MAX_WORKERS = 32
+    MAX_CHUNK_SIZE = 32
+    RECYCLE_AFTER_ITEMS = 512
+    PING_TIMEOUT = 10.0
+    SHUTDOWN_GRACE = 1.0
+    CONTEXT_DIR = Path(tempfile.gettempdir()) / "panelizer"
+
+    def __init__(
+            self,
+            workers: int | None = None,
+            *,
+            address_space: int | None = None,
+            staging_dir: str | os.PathLike | None = None,
+            flush_batch: int = OutputStager.FLUSH_BATCH,
+            prefetch_budget: int = SourcePrefetcher.BUDGET,
+            cache_dir: str | os.PathLike | None = None,
+            cache_size: int = OutputCache.MAX_SIZE,
+            index_path: str | os.PathLike | None = None
+    ) -> None:
+        self.workers = max(1, workers or min(self.MAX_WORKERS, 2 * self.default_workers()))
+        self.address_space = self.default_address_space() if address_space is None else address_space
+        if staging_dir is None:
+            staging_dir = OutputStager.default_root()
+        self.staging_dir = Path(staging_dir) if staging_dir else None
+        self.flush_batch = flush_batch
+        self.prefetch_budget = prefetch_budget
+        if cache_dir is None:
+            cache_dir = OutputCache.default_root()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_size = cache_size
+        if index_path is None:
+            index_path = SourceIndex.default_path()
+        self.index_path = Path(index_path) if index_path else None
+        self._context = multiprocessing.get_context("spawn")
+        self._executor: ProcessPoolExecutor | None = None
+        self._progress = None
+        self._activity = None
+        self._lock = threading.Lock()
+        self._serials = itertools.count(1)
+        self._batch: BatchContext | None = None
+        self._closed = False
+
+    @staticmethod
+    def ensure(*, app: "App") -> "WorkerPool":
+        """
+        Ensures the app has a 'worker_pool' attribute holding the shared WorkerPool.
+        The pool is shut down with the app (NeonApp.call_on_shutdown) or, at the latest, at interpreter exit.
+        """
+        if hasattr(app, "worker_pool"):
+            if not isinstance(app.worker_pool, WorkerPool):
+                raise AttributeError(
+                    f"App must have the 'worker_pool' attribute set to a WorkerPool. "
+                    f"Different type detected: {type(app.worker_pool)}"
+                )
+            return app.worker_pool
+        pool = WorkerPool()
+        if hasattr(app, "call_on_shutdown"):
+            app.call_on_shutdown(pool.shutdown)
+        atexit.register(pool.shutdown)
+        # noinspection PyTypeHints
+        app.worker_pool: WorkerPool = pool
+        return pool
+
+    @staticmethod
+    def default_workers() -> int:
+        """One worker per CPU available to this process."""
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except AttributeError:
+            return max(1, os.cpu_count() or 1)
+
+    @staticmethod
+    def default_address_space() -> int:
+        """Half of the physical memory (at least 1 GiB), or 0 (no limit) if it is unknown."""
+        try:
+            total = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (AttributeError, ValueError, OSError):
+            return 0
+        return max(1024 ** 3, total // 2)
+
+    @staticmethod
+    def _ensure_resource_tracker() -> None:
+        """
+        Spawned processes need multiprocessing's resource tracker, which is started with the descriptor
+        of sys.stderr. Textual replaces sys.stderr with a capture object without a real descriptor,
+        so the tracker is started against os.devnull instead.
+        """
+        saved = sys.stderr
+        with open(os.devnull, "w") as devnull:
+            sys.stderr = devnull
+            try:
+                resource_tracker.ensure_running()
+            finally:
+                sys.stderr = saved
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The running executor, (re)built on demand."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The worker pool has been shut down.")
+            executor = self._executor
+            if executor is None or getattr(executor, "_broken", False):
+                if executor is not None:
+                    self._stop(executor, grace=0)
+                executor = self._executor = self._build()
+            return executor
+
+    def _build(self) -> ProcessPoolExecutor:
+        self._ensure_resource_tracker()
+        if self._progress is None:
+            self._progress = self._context.Array("q", 3)
+            self._activity = self._context.Array("q", 2 * self.workers * Worker.SLOT_FIELDS)
+        # The workers of the previous executor (if any) are gone, and so are their slots
+        with self._activity.get_lock():
+            self._activity[:] = [0] * len(self._activity)
+        # Every chunk renders at least one item; the item count itself is checked between batches
+        max_tasks = self.RECYCLE_AFTER_ITEMS
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=Worker.init,
+            initargs=(
+                self._progress,
+                self._activity,
+                max_tasks,
+                self.address_space or None,
+                str(self.staging_dir) if self.staging_dir else None,
+                self.flush_batch,
+                self.prefetch_budget,
+                str(self.cache_dir) if self.cache_dir else None,
+                self.cache_size,
+                str(self.index_path) if self.index_path else None,
+            ),
+            max_tasks_per_child=max_tasks,
+        )
+
+    def start(self) -> None:
+        """Spawns one worker per CPU without waiting for them to finish starting up."""
+        if self._closed:
+            return
+        executor = self.executor
+        for _ in range(min(self.workers, self.default_workers())):
+            executor.submit(Worker.ping)
+
+    async def ensure_healthy(self) -> None:
+        """
+        Replaces the pool if a worker has rendered RECYCLE_AFTER_ITEMS items. Then pings every worker
+        and replaces the pool if a ping fails or times out, or if a worker is still stuck inside an item
+        of a past batch (it could not answer, but another worker would answer its ping).
+        """
+        if self._spent():
+            await asyncio.to_thread(self.restart, grace=self.SHUTDOWN_GRACE)
+        try:
+            executor = self.executor
+            pings = max(1, len(getattr(executor, "_processes", None) or {}))
+            futures = [asyncio.wrap_future(executor.submit(Worker.ping)) for _ in range(pings)]
+            await asyncio.wait_for(asyncio.gather(*futures), timeout=self.PING_TIMEOUT)
+            stuck = self._busy_workers()
+            if stuck:
+                raise RuntimeError(f"worker(s) {', '.join(map(str, stuck))} still busy with a past batch")
+        except Exception as e:
+            log.warning(f"[WorkerPool] Unhealthy pool, restarting: {e}")
+            self.restart()
+
+    def restart(self, *, grace: float = 0) -> None:
+        """Stops all workers (killing those still busy after 'grace' seconds) and starts a fresh pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            self._stop(executor, grace=grace)
+        self.start()
+
+    def _busy_workers(self) -> List[int]:
+        """The pids of the workers marked busy with an item."""
+        if self._activity is None:
+            return []
+        fields = Worker.SLOT_FIELDS
+        with self._activity.get_lock():
+            activity = self._activity[:]
+        return [activity[base] for base in range(0, len(activity), fields) if activity[base] and activity[base + 2]]
+
+    def _spent(self) -> bool:
+        """Whether a worker has rendered RECYCLE_AFTER_ITEMS items."""
+        if self._activity is None:
+            return False
+        fields = Worker.SLOT_FIELDS
+        with self._activity.get_lock():
+            activity = self._activity[:]
+        return any(
+            activity[base] and activity[base + 4] >= self.RECYCLE_AFTER_ITEMS
+            for base in range(0, len(activity), fields)
+        )
+
+    def begin_batch(self, config: RenderConfig, groups: Sequence[Sequence[str]]) -> BatchContext:
+        """Writes the batch context file and resets the shared progress counter to the new batch."""
+        _ = self.executor
+        serial = next(self._serials)
+        self.CONTEXT_DIR.mkdir(parents=True, exist_ok=True)
+        path = str(self.CONTEXT_DIR / f"batch-{os.getpid()}-{serial}.pkl")
+        Worker.write_context(path, config, groups)
+        with self._progress.get_lock():
+            self._progress[0] = serial
+            self._progress[1] = 0
+        self._batch = BatchContext(serial, path, len(groups))
+        return self._batch
+
+    def cancel_batch(self, batch: BatchContext) -> None:
+        """Asks the workers to stop the batch at their next checkpoint (see CancelToken)."""
+        if self._progress is not None:
+            self._progress[2] = batch.serial
+
+    def reset_progress(self, batch: BatchContext, completed: int) -> None:
+        """Sets the completed count of the batch, e.g. after the work of a broken pool was lost."""
+        if self._progress is None:
+            return
+        with self._progress.get_lock():
+            if self._progress[0] == batch.serial:
+                self._progress[1] = completed
+
+    def running_items(self, batch: BatchContext) -> List[Tuple[int, int, float]]:
+        """(pid, item id, seconds running) of every worker busy with an item of the batch."""
+        if self._activity is None:
+            return []
+        fields = Worker.SLOT_FIELDS
+        with self._activity.get_lock():
+            activity = self._activity[:]
+        now = time.monotonic_ns()
+        running = []
+        for base in range(0, len(activity), fields):
+            pid, serial, item, started, _ = activity[base:base + fields]
+            if pid and serial == batch.serial and item:
+                running.append((pid, item - 1, (now - started) / 1e9))
+        return running
+
+    @staticmethod
+    def kill(pid: int) -> None:
+        """Kills a worker outright (e.g. hung inside a decoder); the pool is rebuilt on its next use."""
+        try:
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass
+
+    def completed(self, batch: BatchContext) -> int:
+        """The number of items of the batch finished so far, read from shared memory."""
+        if self._progress is None or self._progress[0] != batch.serial:
+            return 0
+        return self._progress[1]
+
+    def end_batch(self, batch: BatchContext) -> None:
+        """Removes the batch context file."""
+        Path(batch.path).unlink(missing_ok=True)
+        if self._batch == batch:
+            self._batch = None
+
+    def shutdown(self) -> None:
+        """Stops all workers, giving busy ones a short grace period. Safe to call more than once."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            self._stop(executor, grace=self.SHUTDOWN_GRACE)
+        if self._batch is not None:
+            self.end_batch(self._batch)
+
+    @staticmethod
+    def _stop(executor: ProcessPoolExecutor, *, grace: float) -> None:
+        """Shuts an executor down, terminating workers still busy after the grace period."""
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        deadline = time.monotonic() + grace
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
@@ -1,8 +1,23 @@
 """
 A toolkit package containing the `Toolkit` class which contains all the methods necessary
-for Panelizer TUI data processing.
+for Panelizer TUI data processing, the `RenderConfig` driving it, the `CanvasPool`
+it renders panels onto, the `RenderJob` and `CancelToken` of a single payload, the `TransientIOError` worth retrying,
+the `OutputStager` publishing outputs from local storage, the `OutputCache` of outputs rendered before,
+the `SourcePrefetcher` and `MappedSource` reading sources, the `HeaderSniffer` and `SourceIndex`
+of their metadata and the `Worker` running it inside pool processes.
 """
 
+from .canvas_pool import CanvasPool
 from .core import Toolkit
+from .header_sniffer import HeaderSniffer, ImageInfo
+from .mapped_source import MappedSource
+from .output_cache import OutputCache
+from .output_stager import OutputStager
+from .prefetcher import SourcePrefetcher
+from .render_config import RenderConfig
+from .render_job import CancelToken, RenderJob
+from .source_index import SourceIndex
+from .transient_io import TransientIOError
+from .worker import Worker
 
-__all__ = ["Toolkit"]
+__all__ = ["CancelToken", "CanvasPool", "HeaderSniffer", "ImageInfo", "MappedSource", "OutputCache", "OutputStager", "RenderConfig", "RenderJob", "SourceIndex", "SourcePrefetcher", "Toolkit", "TransientIOError", "Worker"]
@@ -0,0 +1,134 @@
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
+
+from PIL import Image, ImageColor
+
+RGB = Tuple[int, int, int]
+Box = Tuple[int, int, int, int]
+
+
+class CanvasLease:
+    """
+    A pooled background canvas handed out by CanvasPool.lease.
+    Everything drawn on it must go through 'paste', so the pool knows which region to refill.
+    """
+
+    def __init__(self, image: Image.Image, color: RGB) -> None:
+        self.image = image
+        self.color = color
+        self._dirty: Box | None = None
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.image.size
+
+    def paste(self, img: Image.Image, pos: Tuple[int, int]) -> None:
+        """Pastes an image onto the canvas and grows the dirty region to cover it."""
+        self.image.paste(img, pos)
+        box = (
+            max(0, pos[0]),
+            max(0, pos[1]),
+            min(self.image.width, pos[0] + img.width),
+            min(self.image.height, pos[1] + img.height),
+        )
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return
+        if self._dirty is None:
+            self._dirty = box
+        else:
+            d = self._dirty
+            self._dirty = (min(d[0], box[0]), min(d[1], box[1]), max(d[2], box[2]), max(d[3], box[3]))
+
+    def _reset(self) -> None:
+        """Refills only the region touched since the canvas was handed out."""
+        if self._dirty is not None:
+            self.image.paste(self.color, self._dirty)
+            self._dirty = None
+
+
+class CanvasPool:
+    """
+    A per-thread pool of pre-filled RGB background canvases, keyed by (size, colour).
+    Batches render the same few canvas sizes over and over, so instead of allocating and
+    filling a fresh multi-megapixel buffer per panel, a released canvas only has its
+    dirty region refilled and is handed out again.
+
+    - Colours are parsed once and cached.
+    - Each thread (and so each worker process) keeps its own free lists; no locking is needed.
+    - At most MAX_PER_KEY canvases per key and MAX_BYTES in total are kept per thread;
+      anything beyond that is simply dropped. Canvases are counted as Pillow stores them,
+      BYTES_PER_PIXEL bytes per pixel (RGB is padded to 4). The engine's MemoryBudget reserves MAX_BYTES
+      per worker, so it is kept to a few canvases.
+
+    Usage:
+    ::
+        with CanvasPool.lease((1600, 2000), "#FFFFFF") as canvas:
+            canvas.paste(img, (100, 120))
+            canvas.image.save(path)
+    """
+    MAX_PER_KEY = 2
+    MAX_BYTES = 64 * 1024 * 1024
+    BYTES_PER_PIXEL = 4
+
+    _local = threading.local()
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def parse_color(color: str) -> RGB:
+        """Parses a colour string (e.g. '#D3D3D3' or 'white') into an RGB tuple."""
+        return ImageColor.getrgb(color)[:3]
+
+    @staticmethod
+    def nbytes(size: Tuple[int, int]) -> int:
+        """The memory taken by a canvas of the given size."""
+        return size[0] * size[1] * CanvasPool.BYTES_PER_PIXEL
+
+    @staticmethod
+    def _free_lists() -> Dict[Tuple[Tuple[int, int], RGB], List[Image.Image]]:
+        local = CanvasPool._local
+        if not hasattr(local, "free"):
+            local.free = {}
+            local.bytes = 0
+        return local.free
+
+    @staticmethod
+    def acquire(size: Tuple[int, int], color: str | RGB) -> CanvasLease:
+        """Returns a lease on a canvas of the given size, filled with the given colour."""
+        rgb = CanvasPool.parse_color(color) if isinstance(color, str) else color
+        free = CanvasPool._free_lists().get((size, rgb))
+        if free:
+            image = free.pop()
+            CanvasPool._local.bytes -= CanvasPool.nbytes(image.size)
+        else:
+            image = Image.new("RGB", size, rgb)
+        return CanvasLease(image, rgb)
+
+    @staticmethod
+    def release(lease: CanvasLease) -> None:
+        """Refills the dirty region of the canvas and keeps it for the next acquire, if there is room."""
+        image = lease.image
+        nbytes = CanvasPool.nbytes(image.size)
+        free = CanvasPool._free_lists().setdefault((image.size, lease.color), [])
+        if len(free) >= CanvasPool.MAX_PER_KEY or CanvasPool._local.bytes + nbytes > CanvasPool.MAX_BYTES:
+            return
+        lease._reset()
+        free.append(image)
+        CanvasPool._local.bytes += nbytes
+
+    @staticmethod
+    @contextmanager
+    def lease(size: Tuple[int, int], color: str | RGB) -> Iterator[CanvasLease]:
+        """Context manager around acquire/release."""
+        canvas = CanvasPool.acquire(size, color)
+        try:
+            yield canvas
+        finally:
+            CanvasPool.release(canvas)
+
+    @staticmethod
+    def clear() -> None:
+        """Drops all canvases pooled by the calling thread."""
+        CanvasPool._free_lists().clear()
+        CanvasPool._local.bytes = 0
@@ -1,39 +1,44 @@
 from pathlib import Path
-from typing import Tuple, Literal, List
+from typing import Tuple, Literal, List, Sequence, Hashable
 
-from PIL import Image, ImageOps, UnidentifiedImageError
+from PIL import Image, UnidentifiedImageError
+
+from .canvas_pool import CanvasPool
+from .output_cache import OutputCache
+from .output_stager import OutputStager
+from .prefetcher import SourcePrefetcher
+from .render_config import RenderConfig
+from .render_job import CancelToken, RenderJob
+from .header_sniffer import HeaderSniffer, ImageInfo
+from .source_index import SourceIndex
+from .transient_io import TransientIOError
 
 
 class Toolkit:
     """
     A static container for all image processing business logic for Panelizer.
-    Updated to support dynamic output directory naming via settings.
+    Every method is driven by a RenderConfig built once per batch (see RenderConfig.from_settings)
+    and, while rendering, by the RenderJob of the current payload (cancellation and staged outputs).
     """
-    RATIO_MAP = {
-        "3:4": 3 / 4,
-        "4:5": 4 / 5,
-        "2:3": 2 / 3,
-        "9:16": 9 / 16,
-    }
-    COLOR_MAP = {
-        "white": "#FFFFFF",
-        "black": "#000000",
-        "lightgray": "#D3D3D3",
-        "darkgray": "#333333",
-    }
-
     MIN_SPLIT_ASPECT = 2 / 3
     MAX_STACK_ASPECT = 2.2
     FILENAME_SUFFIX = "_pan"
+    # Part of the OutputCache key: bump it with every change to the rendered outputs
+    RENDER_VERSION = 1
 
     @staticmethod
-    def prepare_queue(files: List[str], settings: dict) -> List[Tuple[List[str], dict]]:
+    def prepare_queue(
+            files: List[str],
+            config: RenderConfig,
+            index: SourceIndex | None = None
+    ) -> List[Tuple[List[str], RenderConfig]]:
         """
-        Groups files into payloads. Handles logic for stacking landscape images.
-        Returns a list of payloads: ([file_paths...], settings_dict)
+        Groups files into payloads. Handles logic for stacking landscape images,
+        reading the image headers from the 'index' if given.
+        Returns a list of payloads: ([file_paths...], config)
         """
-        if not settings.get("stack_landscape_images"):
-            return [([f], settings) for f in files]
+        if not config.stack_landscape_images:
+            return [([f], config) for f in files]
 
         queue = []
         skip_count = 0
@@ -47,75 +52,194 @@ class Toolkit:
             current_file = files[i]
             stack_candidates = [current_file]
 
-            if Toolkit._is_stackable(current_file):
+            if Toolkit._is_stackable(current_file, index):
                 for j in range(1, 3):
                     if i + j < limit:
                         next_file = files[i + j]
-                        if Toolkit._are_compatible(current_file, next_file):
+                        if Toolkit._are_compatible(current_file, next_file, index):
                             stack_candidates.append(next_file)
                         else:
                             break
                     else:
                         break
             if len(stack_candidates) > 1:
-                queue.append((stack_candidates, settings))
+                queue.append((stack_candidates, config))
                 skip_count = len(stack_candidates) - 1
             else:
-                queue.append(([current_file], settings))
+                queue.append(([current_file], config))
 
         return queue
 
     @staticmethod
-    def get_queue_names(files: List[str], settings: dict) -> List[str]:
+    def discard_partial_outputs(file_paths: List[str], config: RenderConfig) -> None:
+        """Removes the staged outputs a killed worker may have left for this payload's folder."""
+        if file_paths:
+            RenderJob.discard_orphans(Path(file_paths[0]).parent / config.output_dir_name)
+
+    @staticmethod
+    def record_failure(file_paths: List[str], config: RenderConfig, details: str) -> None:
+        """Writes the '.failed' marker of a payload into its output directory."""
+        path = Path(file_paths[0])
+        output_dir = path.parent / config.output_dir_name
+        fail_file = output_dir / f"{path.name}.failed"
+        error_msg = f"Export failed for {path.name} (or stack).\nDetails: {details}"
+
+        try:
+            output_dir.mkdir(exist_ok=True)
+            with open(fail_file, "w", encoding="utf-8") as f:
+                f.write(error_msg)
+        except OSError:
+            pass
+
+    @staticmethod
+    def get_queue_names(files: List[str], config: RenderConfig, index: SourceIndex | None = None) -> List[str]:
         """Generates display names for the Loading Screen."""
-        payloads = Toolkit.prepare_queue(files, settings)
-        names = []
-        for path_list, _ in payloads:
-            if len(path_list) > 1:
-                names.append(f"Stack ({len(path_list)}): {Path(path_list[0]).name}...")
-            else:
-                names.append(Path(path_list[0]).name)
-        return names
+        payloads = Toolkit.prepare_queue(files, config, index)
+        return [Toolkit.payload_name(path_list) for path_list, _ in payloads]
 
     @staticmethod
-    def _is_stackable(file_path: str) -> bool:
-        """Checks if an image is suitable for stacking (Wide > 16:9 BUT < 2.2)."""
+    def payload_name(path_list: Sequence[str]) -> str:
+        """The display name of one payload."""
+        if len(path_list) > 1:
+            return f"Stack ({len(path_list)}): {Path(path_list[0]).name}..."
+        return Path(path_list[0]).name
+
+    @staticmethod
+    def estimate_peak_memory(file_paths: List[str], config: RenderConfig, index: SourceIndex | None = None) -> int:
+        """
+        Estimates the peak memory (in bytes) of rendering one payload, from the image headers only
+        (read from the 'index' if given).
+        Counts the decoded sources, the working images at output resolution (the fit intermediate
+        of a split panorama, the normalized and resized members of a stack) and the canvas.
+        Unreadable files count as nothing, they fail before decoding.
+        """
+        sources = []
+        for file_path in file_paths:
+            info = Toolkit._probe(file_path, index)
+            if info is not None and info.width and info.height:
+                sources.append((info.width, info.height, Toolkit._bytes_per_pixel(info.mode)))
+        if not sources:
+            return 0
+
+        canvas_h = config.canvas_height
+        ratio = config.canvas_ratio
+        if config.layout == "uniform" and config.enforcement is not None:
+            ratio = config.enforcement
+        border_px = int(canvas_h * (config.border / 100))
+
+        # Pillow keeps multi-band images at 4 bytes per pixel; canvases count as the CanvasPool counts them
+        decoded = sum(w * h * bpp for w, h, bpp in sources)
+        if len(sources) > 1:
+            # All members stay open; the narrower ones are first normalized to the widest
+            max_w = max(w for w, _, _ in sources)
+            normalized = sum(max_w * (h * max_w // w) * 4 for w, h, _ in sources if w != max_w)
+            stack_h = sum(h * max_w // w for w, h, _ in sources)
+            if config.layout == "uniform" and config.orientation == "outward":
+                canvas = CanvasPool.nbytes((max_w + 2 * border_px, stack_h + (len(sources) + 1) * border_px))
+                return decoded + normalized + canvas
+            canvas_w = max(int(canvas_h * ratio), max_w * canvas_h // stack_h)
+            return decoded + normalized + 2 * CanvasPool.nbytes((canvas_w, canvas_h))
+
+        w, h, _ = sources[0]
+        natural_w = w * canvas_h // h
+        if config.split_wide_images and w / h > 1.5:
+            # The whole strip is fitted at output height first (Pillow resamples horizontally first,
+            # through an output-width, source-height intermediate), then sliced into panels
+            canvas_w = int(canvas_h * ratio)
+            fitted = natural_w * (canvas_h + h) * 4
+            return decoded + fitted + 2 * CanvasPool.nbytes((canvas_w, canvas_h))
+        if config.layout == "framing":
+            canvas_w = int(canvas_h * ratio)
+        elif config.enforcement is None:
+            canvas_w = natural_w + 2 * border_px
+        else:
+            canvas_w = max(int(canvas_h * ratio), natural_w + 2 * border_px)
+        # The resized image never outgrows its canvas
+        return decoded + 2 * CanvasPool.nbytes((canvas_w, canvas_h + 2 * border_px))
+
+    @staticmethod
+    def _bytes_per_pixel(mode: str) -> int:
+        """Bytes per pixel of a decoded image in Pillow's memory layout."""
+        if mode in ("1", "L", "P"):
+            return 1
+        if mode.startswith("I;16"):
+            return 2
+        return 4
+
+    @staticmethod
+    def _probe(file_path: str, index: SourceIndex | None = None) -> ImageInfo | None:
+        """
+        The header of an image (from the 'index' if given, see HeaderSniffer),
+        or None if it is not a readable image.
+        """
+        if index is not None:
+            return index.info(file_path)
+        if not Path(file_path).is_file():
+            # Never block on a FIFO or device posing as an image
+            return None
         try:
-            with Image.open(file_path) as img:
-                ratio = img.width / img.height
-                # Must be wide enough (1.77) but not SO wide that it should be a panorama (2.2)
-                return 1.77 < ratio < Toolkit.MAX_STACK_ASPECT
+            return HeaderSniffer.probe(file_path)
         except (OSError, UnidentifiedImageError):
+            return None
+
+    @staticmethod
+    def _is_stackable(file_path: str, index: SourceIndex | None = None) -> bool:
+        """Checks if an image is suitable for stacking (Wide > 16:9 BUT < 2.2)."""
+        info = Toolkit._probe(file_path, index)
+        if info is None or not info.height:
             return False
+        ratio = info.width / info.height
+        # Must be wide enough (1.77) but not SO wide that it should be a panorama (2.2)
+        return 1.77 < ratio < Toolkit.MAX_STACK_ASPECT
 
     @staticmethod
-    def _are_compatible(file1: str, file2: str) -> bool:
+    def _are_compatible(file1: str, file2: str, index: SourceIndex | None = None) -> bool:
         """
         Checks if two images should be stacked together.
         1. Both must be wide (within stackable range).
         2. Ratios must be similar (within tolerance).
         """
-        try:
-            with Image.open(file1) as img1, Image.open(file2) as img2:
-                r1 = img1.width / img1.height
-                r2 = img2.width / img2.height
-
-                if not (1.77 < r2 < Toolkit.MAX_STACK_ASPECT):
-                    return False
-                # Allow 5% deviation
-                if abs(r1 - r2) / r1 > 0.05:
-                    return False
+        info1 = Toolkit._probe(file1, index)
+        info2 = Toolkit._probe(file2, index)
+        if info1 is None or info2 is None or not info1.height or not info2.height:
+            return False
+        r1 = info1.width / info1.height
+        r2 = info2.width / info2.height
 
-                return True
-        except (OSError, UnidentifiedImageError):
+        if not (1.77 < r2 < Toolkit.MAX_STACK_ASPECT):
+            return False
+        # Allow 5% deviation
+        if abs(r1 - r2) / r1 > 0.05:
             return False
 
+        return True
+
     @staticmethod
-    def process_image(payload: tuple[list[str], dict]) -> bool:
+    def process_image(
+            payload: tuple[list[str], RenderConfig],
+            token: CancelToken | None = None,
+            defer_transient: bool = False,
+            stager: OutputStager | None = None,
+            key: Hashable = None,
+            prefetcher: SourcePrefetcher | None = None,
+            cache: OutputCache | None = None,
+            index: SourceIndex | None = None
+    ) -> bool:
         """
         Main worker. Accepts a LIST of file paths.
+        The token is checked between stages and panels; once cancelled, CancelToken.Cancelled
+        is raised and the payload leaves no outputs behind.
+        With 'defer_transient', I/O errors likely to go away (see TransientIOError) are raised
+        for the caller to retry, instead of being recorded as a failure.
+        With a 'stager', the outputs are encoded locally and left for the caller to flush (under 'key').
+        With a 'prefetcher', the sources it read ahead are decoded from memory.
+        With a 'cache', outputs rendered before from the same sources and settings are copied
+        from it, and new outputs are added to it. The sources are hashed from the prefetcher's buffers,
+        or their digests read from the 'index' if given.
         """
-        file_paths, settings = payload
+        file_paths, config = payload
+        job = RenderJob(token, stager, key, prefetcher, index)
+        job.check()
 
         valid_paths = [Path(p) for p in file_paths if Path(p).exists()]
         if not valid_paths:
@@ -123,70 +247,105 @@ class Toolkit:
 
         path = valid_paths[0]
         try:
+            cache_key = None
+            if cache is not None:
+                digests = [job.source_digest(p) for p in valid_paths]
+                if None not in digests:
+                    cache_key = cache.key(digests, config.fingerprint, Toolkit.RENDER_VERSION)
+            if cache_key is not None:
+                with cache.lookup(cache_key) as outputs:
+                    if outputs is not None and Toolkit._restore(outputs, path, config, job):
+                        job.commit()
+                        return True
+
             if len(valid_paths) > 1:
-                Toolkit._render_stack(valid_paths, settings)
-                return True
-            with Image.open(path) as img:
-                is_wide = (img.width / img.height) > 1.5
-                if settings.get("split_wide_images") and is_wide:
-                    Toolkit._process_panorama(img, settings, path)
-                else:
-                    Toolkit._render_panel(
-                        img,
-                        settings,
-                        path.stem,
-                        path.parent,
-                        align="center"
-                    )
+                Toolkit._render_stack(valid_paths, config, job)
+            else:
+                Toolkit._render_single(path, config, job)
+            if cache_key is not None:
+                Toolkit._cache_outputs(cache, cache_key, path, job)
+            job.commit()
             return True
 
-        except (OSError, UnidentifiedImageError, ValueError, TypeError) as e:
-            out_name = settings.get("output_dir_name", "panelizer_output")
-            output_dir = path.parent / out_name
-            output_dir.mkdir(exist_ok=True)
+        except (
+                OSError, UnidentifiedImageError, ValueError, TypeError, MemoryError, Image.DecompressionBombError
+        ) as e:
+            job.discard()
+            if defer_transient and TransientIOError.is_transient(e):
+                raise TransientIOError.of(e, path.name) from None
+            Toolkit.record_failure([str(path)], config, str(e) or type(e).__name__)
+            return False
+        except Exception:
+            job.discard()
+            raise
 
-            fail_file = output_dir / f"{path.name}.failed"
-            error_msg = f"Export failed for {path.name} (or stack).\nDetails: {e}"
+    @staticmethod
+    def _render_single(path: Path, config: RenderConfig, job: RenderJob) -> None:
+        """Renders one image: one panel, or several for a panorama being split."""
+        with job.open_source(path) as img:
+            is_wide = (img.width / img.height) > 1.5
+            if config.split_wide_images and is_wide:
+                Toolkit._process_panorama(img, config, job, path)
+            else:
+                Toolkit._render_panel(
+                    img,
+                    config,
+                    job,
+                    path.stem,
+                    path.parent,
+                    align="center"
+                )
 
-            try:
-                with open(fail_file, "w", encoding="utf-8") as f:
-                    f.write(error_msg)
-            except OSError:
-                pass
+    @staticmethod
+    def _restore(outputs: List[Tuple[str, Path]], path: Path, config: RenderConfig, job: RenderJob) -> bool:
+        """
+        Writes the cached outputs of a payload (named after its first source).
+        Returns False, leaving nothing behind, if the cache could not be read.
+        """
+        output_dir = path.parent / config.output_dir_name
+        output_dir.mkdir(exist_ok=True)
+        try:
+            for tail, cached in outputs:
+                job.check()
+                job.restore(cached, output_dir / f"{path.stem}{tail}")
+        except OSError:
+            job.discard()
             return False
+        return True
+
+    @staticmethod
+    def _cache_outputs(cache: OutputCache, key: str, path: Path, job: RenderJob) -> None:
+        """Stores the outputs of a rendered payload in the cache, by their names minus the stem."""
+        outputs = job.outputs
+        if all(final.name.startswith(path.stem) for _, final in outputs):
+            cache.store(key, [(final.name[len(path.stem):], written) for written, final in outputs])
 
     @staticmethod
-    def _render_stack(paths: List[Path], settings: dict) -> None:
+    def _render_stack(paths: List[Path], config: RenderConfig, job: RenderJob) -> None:
         """
         Vertically stacks multiple images onto one panel.
         """
-        layout = settings.get("layout")
-        ref_h = int(settings.get("canvas_height") or 2500)
-        bg_color_name = settings.get("background_color") or "white"
-        bg_hex = Toolkit.COLOR_MAP.get(bg_color_name, "#FFFFFF")
+        ref_h = config.canvas_height
 
-        images = [Image.open(p) for p in paths]
+        images = [job.open_source(p) for p in paths]
         max_w = max(img.width for img in images)
         norm_images = []
 
         for img in images:
+            job.check()
             if img.width != max_w:
                 scale = max_w / img.width
-                norm_images.append(img.resize((max_w, int(img.height * scale)), Image.Resampling.LANCZOS))
+                norm_images.append(Toolkit._resize(img, (max_w, int(img.height * scale)), config))
             else:
                 norm_images.append(img)
         images = norm_images
 
-        if layout == "uniform":
-            pad_data = settings.get("padding") or {}
-            border_pct = pad_data.get("uniform") or 5
-            orientation = pad_data.get("orientation") or "inward"
-
-            border_px = int(ref_h * (border_pct / 100))
+        if config.layout == "uniform":
+            border_px = int(ref_h * (config.border / 100))
             gap_px = border_px
             total_gaps = gap_px * (len(images) - 1)
 
-            if orientation == "outward":
+            if config.orientation == "outward":
                 final_images = images
                 stack_h = sum(img.height for img in final_images) + total_gaps
                 canvas_w = max_w + (2 * border_px)
@@ -202,30 +361,30 @@ class Toolkit:
 
                 final_images = []
                 for img in images:
+                    job.check()
                     new_w = int(img.width * scale)
                     new_h = int(img.height * scale)
-                    final_images.append(img.resize((new_w, new_h), Image.Resampling.LANCZOS))
+                    final_images.append(Toolkit._resize(img, (new_w, new_h), config))
 
                 canvas_w = final_images[0].width + (2 * border_px)
                 start_x = border_px
                 start_y = border_px
 
-            canvas = Image.new("RGB", (canvas_w, canvas_h), bg_hex)
+            canvas_size = (canvas_w, canvas_h)
+            placements = []
             curr_y = start_y
             for img in final_images:
-                canvas.paste(img, (start_x, curr_y))
+                placements.append((img, (start_x, curr_y)))
                 curr_y += img.height + gap_px
 
         else:
-            ratio_str = settings.get("canvas_ratio") or "4:5"
-            ratio_val = Toolkit.RATIO_MAP.get(ratio_str) or 4 / 5
-            canvas_w = int(ref_h * ratio_val)
+            canvas_w = int(ref_h * config.canvas_ratio)
 
-            _, _, pad_t, _ = Toolkit._calculate_base_padding(canvas_w, ref_h, settings)
+            _, _, pad_t, _ = Toolkit._calculate_base_padding(canvas_w, ref_h, config)
             gap_px = pad_t
             total_gaps = gap_px * (len(images) - 1)
 
-            safe_w, safe_h = Toolkit._calculate_safe_area(canvas_w, ref_h, settings)
+            safe_w, safe_h = Toolkit._calculate_safe_area(canvas_w, ref_h, config)
             available_h_for_images = safe_h - total_gaps
 
             max_img_w = max_w
@@ -237,11 +396,13 @@ class Toolkit:
 
             resized_images = []
             for img in images:
+                job.check()
                 w = int(img.width * final_scale)
                 h = int(img.height * final_scale)
-                resized_images.append(img.resize((w, h), resample=Image.Resampling.LANCZOS))
+                resized_images.append(Toolkit._resize(img, (w, h), config))
 
-            canvas = Image.new("RGB", (canvas_w, ref_h), bg_hex)
+            canvas_size = (canvas_w, ref_h)
+            placements = []
 
             stack_content_h = sum(img.height for img in resized_images) + total_gaps
 
@@ -250,41 +411,37 @@ class Toolkit:
 
             for r_img in resized_images:
                 current_x = (canvas_w - r_img.width) // 2
-                canvas.paste(r_img, (current_x, current_y))
+                placements.append((r_img, (current_x, current_y)))
                 current_y += r_img.height + gap_px
 
-        out_name = settings.get("output_dir_name", "panelizer_output")
-        output_dir = paths[0].parent / out_name
+        output_dir = paths[0].parent / config.output_dir_name
         output_dir.mkdir(exist_ok=True)
 
         stem = paths[0].stem + "_stacked"
         save_path = output_dir / f"{stem}.jpg"
 
-        if canvas.mode in ("RGBA", "P"):
-            canvas = canvas.convert("RGB")
-        canvas.save(save_path, quality=95, subsampling=0)
+        job.check()
+        with CanvasPool.lease(canvas_size, config.background) as canvas:
+            for img, pos in placements:
+                canvas.paste(img, pos)
+            job.save(canvas.image, save_path, quality=95, subsampling=0)
 
     @staticmethod
-    def _process_panorama(img: Image.Image, settings: dict, path: Path) -> None:
-        canvas_h = int(settings.get("canvas_height") or 2500)
-
-        layout = settings.get("layout")
-        pad_data = settings.get("padding") or {}
-        enforcement = pad_data.get("enforcement", "none")
+    def _process_panorama(img: Image.Image, config: RenderConfig, job: RenderJob, path: Path) -> None:
+        canvas_h = config.canvas_height
+        enforcement = config.enforcement
 
-        if layout == "uniform" and enforcement != "none":
-            ratio_val = Toolkit.RATIO_MAP.get(enforcement) or 4 / 5
+        if config.layout == "uniform" and enforcement is not None:
+            ratio_val = enforcement
         else:
-            ratio_val = Toolkit.RATIO_MAP.get(settings.get("canvas_ratio") or "4:5", 4 / 5)
+            ratio_val = config.canvas_ratio
 
         canvas_w = int(canvas_h * ratio_val)
 
-        if layout == "uniform":
-            border_pct = pad_data.get("uniform") or 5
-            orientation = pad_data.get("orientation") or "inward"
-            border_px = int(canvas_h * (border_pct / 100))
+        if config.layout == "uniform":
+            border_px = int(canvas_h * (config.border / 100))
 
-            if enforcement != "none":
+            if enforcement is not None:
                 scale = canvas_h / img.height
                 natural_width = img.width * scale
 
@@ -294,12 +451,8 @@ class Toolkit:
 
                 total_target_w = num_panels * canvas_w
 
-                work_img = ImageOps.fit(
-                    img,
-                    (total_target_w, canvas_h),
-                    method=Image.Resampling.LANCZOS,
-                    centering=(0.5, 0.5)
-                )
+                work_img = Toolkit._fit(img, (total_target_w, canvas_h), config)
+                job.check()
 
                 current_x = 0
                 for i in range(num_panels):
@@ -318,7 +471,8 @@ class Toolkit:
 
                     Toolkit._render_panel(
                         slice_img,
-                        settings,
+                        config,
+                        job,
                         path.stem + suffix,
                         path.parent,
                         align="center",
@@ -327,7 +481,7 @@ class Toolkit:
                     )
                 return
 
-            if orientation == "inward":
+            if config.orientation == "inward":
                 pad_l = 0
                 pad_r = 0
             else:
@@ -335,9 +489,9 @@ class Toolkit:
                 pad_r = border_px
         else:
             # Framing Logic
-            pad_l, pad_r, _, _ = Toolkit._calculate_base_padding(canvas_w, canvas_h, settings)
+            pad_l, pad_r, _, _ = Toolkit._calculate_base_padding(canvas_w, canvas_h, config)
 
-        _, safe_h = Toolkit._calculate_safe_area(canvas_w, canvas_h, settings)
+        _, safe_h = Toolkit._calculate_safe_area(canvas_w, canvas_h, config)
 
         width_first = canvas_w - pad_l
         width_last = canvas_w - pad_r
@@ -360,12 +514,8 @@ class Toolkit:
             layout_map = ["first"] + ["middle"] * num_middle + ["last"]
             total_target_w = width_first + width_last + (num_middle * width_middle)
 
-        work_img = ImageOps.fit(
-            img,
-            (total_target_w, safe_h),
-            method=Image.Resampling.LANCZOS,
-            centering=(0.5, 0.5)
-        )
+        work_img = Toolkit._fit(img, (total_target_w, safe_h), config)
+        job.check()
 
         current_x = 0
         align: Literal["center", "left", "right"]
@@ -390,7 +540,8 @@ class Toolkit:
 
             Toolkit._render_panel(
                 slice_img,
-                settings,
+                config,
+                job,
                 path.stem + suffix,
                 path.parent,
                 align=align,
@@ -399,39 +550,123 @@ class Toolkit:
             )
 
     @staticmethod
-    def _calculate_base_padding(target_w: int, target_h: int, settings: dict) -> Tuple[int, int, int, int]:
-        """Calculates the base framing padding (Left, Right, Top, Bottom) in pixels."""
-        pad_data = settings.get("padding") or {}
-        pad_l = int(target_w * ((pad_data.get("left") or 0) / 100))
-        pad_r = int(target_w * ((pad_data.get("right") or 0) / 100))
-        pad_t = int(target_h * ((pad_data.get("top") or 0) / 100))
-        pad_b = int(target_h * ((pad_data.get("bottom") or 0) / 100))
-        return pad_l, pad_r, pad_t, pad_b
+    def _resize(
+            img: Image.Image,
+            size: Tuple[int, int],
+            config: RenderConfig,
+            box: Tuple[float, float, float, float] | None = None
+    ) -> Image.Image:
+        """Resizes (a box of) the image with the selected resampling preset."""
+        resample, reducing_gap = config.resample
+        return img.resize(size, resample=resample, box=box, reducing_gap=reducing_gap)
+
+    @staticmethod
+    def _fit_box(
+            img: Image.Image,
+            size: Tuple[int, int],
+            centering: Tuple[float, float] = (0.5, 0.5)
+    ) -> Tuple[float, float, float, float]:
+        """Returns the source window that ImageOps.fit would crop to match the ratio of 'size'."""
+        out_w, out_h = size
+        output_ratio = out_w / out_h
+        img_ratio = img.width / img.height
+
+        if img_ratio == output_ratio:
+            crop_w, crop_h = img.width, img.height
+        elif img_ratio > output_ratio:
+            crop_w, crop_h = output_ratio * img.height, img.height
+        else:
+            crop_w, crop_h = img.width, img.width / output_ratio
+
+        left = (img.width - crop_w) * centering[0]
+        top = (img.height - crop_h) * centering[1]
+        return left, top, left + crop_w, top + crop_h
+
+    @staticmethod
+    def _fit(
+            img: Image.Image,
+            size: Tuple[int, int],
+            config: RenderConfig,
+            centering: Tuple[float, float] = (0.5, 0.5)
+    ) -> Image.Image:
+        """Same as ImageOps.fit (crop to the target ratio, then resize), using the resampling preset."""
+        return Toolkit._resize(img, size, config, box=Toolkit._fit_box(img, size, centering))
+
+    @staticmethod
+    def _resize_crop(
+            img: Image.Image,
+            size: Tuple[int, int],
+            crop_box: Tuple[int, int, int, int],
+            config: RenderConfig,
+            source_box: Tuple[float, float, float, float] | None = None
+    ) -> Image.Image:
+        """
+        Same as resizing 'source_box' (default: the whole image) to 'size' and then cropping 'crop_box',
+        but only the visible source window is resampled, in a single pass.
+        """
+        src_l, src_t, src_r, src_b = source_box or (0, 0, img.width, img.height)
+        scale_x = (src_r - src_l) / size[0]
+        scale_y = (src_b - src_t) / size[1]
+        left, top, right, bottom = crop_box
+        window = (
+            src_l + left * scale_x,
+            src_t + top * scale_y,
+            src_l + right * scale_x,
+            src_t + bottom * scale_y,
+        )
+        return Toolkit._resize(img, (right - left, bottom - top), config, box=window)
 
     @staticmethod
-    def _calculate_safe_area(w: int, h: int, settings: dict) -> Tuple[int, int]:
-        """Returns (safe_width, safe_height) based on layout settings."""
-        layout = settings.get("layout")
+    def _inward_crop_box(
+            w: int, h: int, b_left: int, b_right: int, b_top: int, b_bottom: int
+    ) -> Tuple[int, int, int, int]:
+        """Returns the part of a (w, h) image left visible by inward borders, at least one pixel."""
+        crop_box = (b_left, b_top, w - b_right, h - b_bottom)
+        # Safety
+        if crop_box[2] <= crop_box[0] or crop_box[3] <= crop_box[1]:
+            mid_x, mid_y = w // 2, h // 2
+            crop_box = (mid_x, mid_y, mid_x + 1, mid_y + 1)
+        return crop_box
 
-        if layout == "uniform":
-            pad_data = settings.get("padding") or {}
-            border_pct = pad_data.get("uniform") or 5
-            orientation = pad_data.get("orientation") or "inward"
+    @staticmethod
+    def _contain(img: Image.Image, size: Tuple[int, int], config: RenderConfig) -> Image.Image:
+        """Same as ImageOps.contain (largest size that fits inside the box), using the resampling preset."""
+        max_w, max_h = size
+        img_ratio = img.width / img.height
+        if img_ratio > max_w / max_h:
+            size = (max_w, round(img.height / img.width * max_w))
+        elif img_ratio < max_w / max_h:
+            size = (round(img.width / img.height * max_h), max_h)
+        return Toolkit._resize(img, size, config)
+
+    @staticmethod
+    def _calculate_base_padding(target_w: int, target_h: int, config: RenderConfig) -> Tuple[int, int, int, int]:
+        """Calculates the base framing padding (Left, Right, Top, Bottom) in pixels."""
+        pad_l = int(target_w * (config.pad_left / 100))
+        pad_r = int(target_w * (config.pad_right / 100))
+        pad_t = int(target_h * (config.pad_top / 100))
+        pad_b = int(target_h * (config.pad_bottom / 100))
+        return pad_l, pad_r, pad_t, pad_b
 
-            border_px = int(h * (border_pct / 100))
+    @staticmethod
+    def _calculate_safe_area(w: int, h: int, config: RenderConfig) -> Tuple[int, int]:
+        """Returns (safe_width, safe_height) based on the layout."""
+        if config.layout == "uniform":
+            border_px = int(h * (config.border / 100))
 
-            if orientation == "outward":
+            if config.orientation == "outward":
                 return w, h
             else:
                 return w - (2 * border_px), h - (2 * border_px)
         else:
-            p_l, p_r, p_t, p_b = Toolkit._calculate_base_padding(w, h, settings)
+            p_l, p_r, p_t, p_b = Toolkit._calculate_base_padding(w, h, config)
             return w - p_l - p_r, h - p_t - p_b
 
     @staticmethod
     def _render_panel(
             img: Image.Image,
-            settings: dict,
+            config: RenderConfig,
+            job: RenderJob,
             stem: str,
             source_dir: Path,
             align: Literal["center", "left", "right"] = "center",
@@ -442,50 +677,40 @@ class Toolkit:
         if pad_overrides is None:
             pad_overrides = {}
 
-        layout = settings.get("layout")
-        canvas_height = settings.get("canvas_height") or 2500
-        bg_color_name = settings.get("background_color") or "white"
-        bg_hex = Toolkit.COLOR_MAP.get(bg_color_name, "#FFFFFF")
-
-        if layout == "uniform":
-            canvas, final_img, pos = Toolkit._apply_uniform_layout(
-                img, canvas_height, settings, bg_hex, pad_overrides, bypass_resize
+        job.check()
+        if config.layout == "uniform":
+            canvas_size, final_img, pos = Toolkit._apply_uniform_layout(
+                img, config.canvas_height, config, pad_overrides, bypass_resize
             )
         else:
-            canvas, final_img, pos = Toolkit._apply_framing_layout(
-                img, canvas_height, settings, bg_hex, align, pad_overrides, bypass_resize
+            canvas_size, final_img, pos = Toolkit._apply_framing_layout(
+                img, config.canvas_height, config, align, pad_overrides, bypass_resize
             )
 
-        canvas.paste(final_img, pos)
-
-        out_name = settings.get("output_dir_name", "panelizer_output")
-        output_dir = source_dir / out_name
+        output_dir = source_dir / config.output_dir_name
         output_dir.mkdir(exist_ok=True)
 
         save_path = output_dir / f"{stem}{Toolkit.FILENAME_SUFFIX}.jpg"
 
-        if canvas.mode in ("RGBA", "P"):
-            canvas = canvas.convert("RGB")
-        canvas.save(save_path, quality=95, subsampling=0)
+        job.check()
+        with CanvasPool.lease(canvas_size, config.background) as canvas:
+            canvas.paste(final_img, pos)
+            job.save(canvas.image, save_path, quality=95, subsampling=0)
         return save_path.name
 
     @staticmethod
     def _apply_framing_layout(
             img: Image.Image,
             target_h: int,
-            settings: dict,
-            bg_color: str,
+            config: RenderConfig,
             align: str,
             pad_overrides: dict,
             bypass_resize: bool
-    ) -> Tuple[Image.Image, Image.Image, Tuple[int, int]]:
+    ) -> Tuple[Tuple[int, int], Image.Image, Tuple[int, int]]:
 
-        ratio_str = settings.get("canvas_ratio") or "4:5"
-        ratio = Toolkit.RATIO_MAP.get(ratio_str) or 4 / 5
-        target_w = int(target_h * ratio)
-        canvas = Image.new("RGB", (target_w, target_h), bg_color)
+        target_w = int(target_h * config.canvas_ratio)
 
-        pad_l, pad_r, pad_t, pad_b = Toolkit._calculate_base_padding(target_w, target_h, settings)
+        pad_l, pad_r, pad_t, pad_b = Toolkit._calculate_base_padding(target_w, target_h, config)
 
         if "left" in pad_overrides: pad_l = pad_overrides["left"]
         if "right" in pad_overrides: pad_r = pad_overrides["right"]
@@ -498,7 +723,7 @@ class Toolkit:
         if bypass_resize:
             resized_img = img
         else:
-            resized_img = ImageOps.contain(img, (safe_w, safe_h), method=Image.Resampling.LANCZOS)
+            resized_img = Toolkit._contain(img, (safe_w, safe_h), config)
 
         res_w, res_h = resized_img.size
         y_pos = pad_t + ((safe_h - res_h) // 2)
@@ -509,24 +734,19 @@ class Toolkit:
         else:
             x_pos = pad_l + ((safe_w - res_w) // 2)
 
-        return canvas, resized_img, (x_pos, y_pos)
+        return (target_w, target_h), resized_img, (x_pos, y_pos)
 
     @staticmethod
     def _apply_uniform_layout(
             img: Image.Image,
             target_h: int,
-            settings: dict,
-            bg_color: str,
+            config: RenderConfig,
             pad_overrides: dict,
             bypass_resize: bool
-    ) -> Tuple[Image.Image, Image.Image, Tuple[int, int]]:
-
-        pad_data = settings.get("padding") or {}
-        border_pct = pad_data.get("uniform") or 5
-        orientation = pad_data.get("orientation") or "inward"
-        enforcement = pad_data.get("enforcement") or "none"
+    ) -> Tuple[Tuple[int, int], Image.Image, Tuple[int, int]]:
 
-        base_border = int(target_h * (border_pct / 100))
+        orientation = config.orientation
+        base_border = int(target_h * (config.border / 100))
 
         b_left = 0 if "left" in pad_overrides else base_border
         b_right = 0 if "right" in pad_overrides else base_border
@@ -534,34 +754,24 @@ class Toolkit:
         b_bottom = base_border
 
         # HANDLE ENFORCEMENT
-        if enforcement != "none":
-            ratio_val = Toolkit.RATIO_MAP.get(enforcement) or 4 / 5
+        if config.enforcement is not None:
+            ratio_val = config.enforcement
 
             if orientation == "inward":
                 target_w = int(target_h * ratio_val)
 
                 if bypass_resize:
-                    base_img = img
+                    canvas_w, canvas_h = img.size
+                    crop_box = Toolkit._inward_crop_box(canvas_w, canvas_h, b_left, b_right, b_top, b_bottom)
+                    resized_img = img.crop(crop_box)
                 else:
-                    base_img = ImageOps.fit(
-                        img,
-                        (target_w, target_h),
-                        method=Image.Resampling.LANCZOS,
-                        centering=(0.5, 0.5)
+                    # Only the window left visible inside the border is resampled
+                    canvas_w, canvas_h = target_w, target_h
+                    crop_box = Toolkit._inward_crop_box(canvas_w, canvas_h, b_left, b_right, b_top, b_bottom)
+                    resized_img = Toolkit._resize_crop(
+                        img, (target_w, target_h), crop_box, config,
+                        source_box=Toolkit._fit_box(img, (target_w, target_h))
                     )
-
-                new_w, new_h = base_img.size
-                # noinspection DuplicatedCode
-                canvas_w = new_w
-                canvas_h = new_h
-
-                crop_box = (b_left, b_top, new_w - b_right, new_h - b_bottom)
-                # Safety
-                if crop_box[2] <= crop_box[0] or crop_box[3] <= crop_box[1]:
-                    mid_x, mid_y = new_w // 2, new_h // 2
-                    crop_box = (mid_x, mid_y, mid_x + 1, mid_y + 1)
-
-                resized_img = base_img.crop(crop_box)
                 pos = (b_left, b_top)
 
             else:
@@ -573,7 +783,7 @@ class Toolkit:
                     new_h = target_h
                     scale = new_h / img.height if img.height else 1.0
                     new_w = int(img.width * scale)
-                    base_img = img.resize((new_w, new_h), resample=Image.Resampling.LANCZOS)
+                    base_img = Toolkit._resize(img, (new_w, new_h), config)
 
                 min_w = new_w + b_left + b_right
                 min_h = new_h + b_top + b_bottom
@@ -598,31 +808,22 @@ class Toolkit:
             # noinspection DuplicatedCode
             if bypass_resize:
                 new_w, new_h = img.size
-                base_img = img
             else:
                 new_h = target_h
                 scale = new_h / img.height if img.height else 1.0
                 new_w = int(img.width * scale)
-                base_img = img.resize((new_w, new_h), resample=Image.Resampling.LANCZOS)
 
             if orientation == "outward" or bypass_resize:
                 canvas_w = new_w + b_left + b_right
                 canvas_h = new_h + b_top + b_bottom
-                resized_img = base_img
+                resized_img = img if bypass_resize else Toolkit._resize(img, (new_w, new_h), config)
                 pos = (b_left, b_top)
             else:
-                # noinspection DuplicatedCode
+                # Only the window left visible inside the border is resampled
                 canvas_w = new_w
                 canvas_h = new_h
-                crop_box = (b_left, b_top, new_w - b_right, new_h - b_bottom)
-
-                # Safety Check
-                if crop_box[2] <= crop_box[0] or crop_box[3] <= crop_box[1]:
-                    mid_x, mid_y = new_w // 2, new_h // 2
-                    crop_box = (mid_x, mid_y, mid_x + 1, mid_y + 1)
-
-                resized_img = base_img.crop(crop_box)
+                crop_box = Toolkit._inward_crop_box(new_w, new_h, b_left, b_right, b_top, b_bottom)
+                resized_img = Toolkit._resize_crop(img, (new_w, new_h), crop_box, config)
                 pos = (b_left, b_top)
 
-        canvas = Image.new("RGB", (canvas_w, canvas_h), bg_color)
-        return canvas, resized_img, pos
\ No newline at end of file
+        return (canvas_w, canvas_h), resized_img, pos
\ No newline at end of file
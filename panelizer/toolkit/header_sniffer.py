@@ -0,0 +1,150 @@
+import os
+import struct
+from typing import BinaryIO, NamedTuple
+
+from PIL import Image
+
+
+class ImageInfo(NamedTuple):
+    """What planning needs to know about a source image, from its header."""
+    width: int
+    height: int
+    mode: str
+    # EXIF orientation (1-8, 1: as stored); the dimensions are those of the stored image
+    orientation: int = 1
+
+
+class HeaderSniffer:
+    """
+    Reads the dimensions, mode and orientation of JPEG and PNG files straight from their headers,
+    with a few small reads, instead of going through Pillow's plugin chain. Other formats (and
+    headers it does not fully understand) are left to Pillow, so the result is always the one
+    Image.open would give.
+
+    - JPEG: the segments are skipped up to the first SOFn marker; the EXIF orientation is read
+      from an APP1 segment on the way.
+    - PNG: the IHDR chunk, which always comes first.
+
+    Usage:
+    ::
+        info = HeaderSniffer.probe(path)  # raises like Image.open if the file is not an image
+    """
+    PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+    # Start of frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the range
+    JPEG_SOF = frozenset((0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF))
+    # Markers without a length field
+    JPEG_STANDALONE = frozenset((0x01, *range(0xD0, 0xD8)))
+    JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+    # (bit depth, colour type) -> mode, as Pillow reports it
+    PNG_MODES = {
+        (1, 0): "1", (2, 0): "L", (4, 0): "L", (8, 0): "L", (16, 0): "I;16",
+        (8, 2): "RGB", (16, 2): "RGB",
+        (1, 3): "P", (2, 3): "P", (4, 3): "P", (8, 3): "P",
+        (8, 4): "LA",
+        (8, 6): "RGBA", (16, 6): "RGBA",
+    }
+    EXIF_ORIENTATION = 0x0112
+
+    @staticmethod
+    def probe(path: str | os.PathLike) -> ImageInfo:
+        """
+        The header of an image, sniffed or read by Pillow.
+        Raises OSError (UnidentifiedImageError if it is not an image), like Image.open.
+        """
+        with open(path, "rb") as f:
+            info = HeaderSniffer.sniff(f)
+        if info is not None:
+            return info
+        with Image.open(path) as img:
+            return ImageInfo(img.width, img.height, img.mode, HeaderSniffer._pillow_orientation(img))
+
+    @staticmethod
+    def sniff(f: BinaryIO) -> ImageInfo | None:
+        """The header of a JPEG or PNG file, or None if it should be read by Pillow."""
+        head = f.read(24)
+        try:
+            if head.startswith(b"\xff\xd8\xff"):
+                f.seek(2)
+                return HeaderSniffer._sniff_jpeg(f)
+            if head.startswith(HeaderSniffer.PNG_SIGNATURE) and head[12:16] == b"IHDR":
+                return HeaderSniffer._sniff_png(head + f.read(2))
+        except struct.error:
+            pass
+        return None
+
+    @staticmethod
+    def _sniff_png(head: bytes) -> ImageInfo | None:
+        width, height, depth, color_type = struct.unpack(">IIBB", head[16:26])
+        mode = HeaderSniffer.PNG_MODES.get((depth, color_type))
+        if mode is None or not width or not height:
+            return None
+        return ImageInfo(width, height, mode)
+
+    @staticmethod
+    def _sniff_jpeg(f: BinaryIO) -> ImageInfo | None:
+        orientation = 1
+        while True:
+            byte = f.read(1)
+            if byte != b"\xff":
+                return None
+            marker = f.read(1)
+            # Fill bytes
+            while marker == b"\xff":
+                marker = f.read(1)
+            if not marker:
+                return None
+            marker = marker[0]
+            if marker in HeaderSniffer.JPEG_STANDALONE:
+                continue
+            if marker in (0xD8, 0xD9, 0xDA):
+                # A second SOI, or no frame header before the image data
+                return None
+            length = struct.unpack(">H", f.read(2))[0] - 2
+            if length < 0:
+                return None
+            if marker in HeaderSniffer.JPEG_SOF:
+                precision, height, width, layers = struct.unpack(">BHHB", f.read(6))
+                mode = HeaderSniffer.JPEG_MODES.get(layers)
+                if precision != 8 or mode is None or not width or not height:
+                    return None
+                return ImageInfo(width, height, mode, orientation)
+            if marker == 0xE1 and orientation == 1:
+                segment = f.read(length)
+                if len(segment) < length:
+                    return None
+                orientation = HeaderSniffer._exif_orientation(segment)
+            else:
+                f.seek(length, os.SEEK_CUR)
+
+    @staticmethod
+    def _exif_orientation(segment: bytes) -> int:
+        """The orientation tag of IFD0 in an APP1 segment, or 1 if it has none."""
+        if not segment.startswith(b"Exif\x00\x00"):
+            return 1
+        tiff = segment[6:]
+        order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+        if order is None:
+            return 1
+        try:
+            offset = struct.unpack(order + "I", tiff[4:8])[0]
+            count = struct.unpack(order + "H", tiff[offset:offset + 2])[0]
+            for i in range(count):
+                entry = offset + 2 + 12 * i
+                tag, type_ = struct.unpack(order + "HH", tiff[entry:entry + 4])
+                # A SHORT value, stored in the first bytes of the value field
+                if tag == HeaderSniffer.EXIF_ORIENTATION and type_ == 3:
+                    value = struct.unpack(order + "H", tiff[entry + 8:entry + 10])[0]
+                    return value if 1 <= value <= 8 else 1
+        except struct.error:
+            pass
+        return 1
+
+    @staticmethod
+    def _pillow_orientation(img: Image.Image) -> int:
+        # noinspection PyBroadException
+        try:
+            value = img.getexif().get(HeaderSniffer.EXIF_ORIENTATION, 1)
+        except Exception:
+            # A corrupt EXIF block never fails the probe
+            return 1
+        return value if isinstance(value, int) and 1 <= value <= 8 else 1
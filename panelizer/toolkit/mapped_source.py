@@ -0,0 +1,103 @@
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Dict
+
+from PIL import Image, UnidentifiedImageError
+
+
+class MappedSource:
+    """
+    Opens large source files through a read-only memory map, so the decoder reads straight from
+    the page cache instead of through a buffered file object and its read calls. Worker processes
+    rendering the same files (stack members, panoramas) share the mapped pages.
+
+    Only files of at least MIN_SIZE bytes are mapped; below that, the mapping costs more than it
+    saves. 'open_image' returns None wherever a file cannot be mapped (unsupported filesystem
+    or platform, empty file, address space exhausted), and the caller opens it by path instead.
+    Uncompressed single-tile images are reopened by path too, as Pillow then maps their pixels
+    itself without any copy.
+
+    An I/O error while reading a mapped file raises SIGBUS instead of an OSError, which would
+    crash the worker instead of reaching the TransientIOError retry. So only files on the local
+    filesystems of LOCAL_FS_TYPES are mapped (read from /proc/self/mountinfo); network shares,
+    FUSE mounts and filesystems that cannot be identified (e.g. on other platforms) are read.
+    """
+    MIN_SIZE = 8 * 1024 ** 2
+    LOCAL_FS_TYPES = frozenset((
+        "ext2", "ext3", "ext4", "xfs", "btrfs", "bcachefs", "f2fs", "zfs", "jfs", "reiserfs", "nilfs2",
+        "tmpfs", "ramfs", "overlay",
+    ))
+    MOUNTINFO = Path("/proc/self/mountinfo")
+
+    # st_dev -> whether the filesystem is local
+    _local_devices: Dict[int, bool] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_local(st_dev: int) -> bool:
+        """Whether a device number belongs to a filesystem of LOCAL_FS_TYPES."""
+        with MappedSource._lock:
+            local = MappedSource._local_devices.get(st_dev)
+            if local is None:
+                local = MappedSource._fs_type(st_dev) in MappedSource.LOCAL_FS_TYPES
+                MappedSource._local_devices[st_dev] = local
+            return local
+
+    @staticmethod
+    def _fs_type(st_dev: int) -> str | None:
+        """The type of the filesystem mounted with this device number, or None if unknown."""
+        try:
+            device = f"{os.major(st_dev)}:{os.minor(st_dev)}"
+            with open(MappedSource.MOUNTINFO, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    # 36 35 98:0 /mnt1 /mnt2 rw,noatime master:1 - ext3 /dev/root rw
+                    fields, _, rest = line.partition(" - ")
+                    fields = fields.split()
+                    if len(fields) > 2 and fields[2] == device:
+                        return rest.split(maxsplit=1)[0] if rest else None
+        except (OSError, AttributeError):
+            # No mountinfo, or no device numbers (Windows)
+            pass
+        return None
+
+    @staticmethod
+    def map(path: Path) -> mmap.mmap | None:
+        """A read-only map of the whole file, or None if it is small or cannot be mapped."""
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_size < MappedSource.MIN_SIZE or not MappedSource.is_local(st.st_dev):
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if hasattr(mmap, "MADV_WILLNEED"):
+            try:
+                # Start reading the file in the background, it is about to be decoded in full
+                mapped.madvise(mmap.MADV_WILLNEED)
+            except OSError:
+                pass
+        return mapped
+
+    @staticmethod
+    def open_image(path: Path) -> Image.Image | None:
+        """Opens an image from its memory map, or returns None if it should be opened by path."""
+        mapped = MappedSource.map(path)
+        if mapped is None:
+            return None
+        try:
+            img = Image.open(mapped)
+        except UnidentifiedImageError:
+            mapped.close()
+            # Same message as when opened by path
+            raise UnidentifiedImageError(f"cannot identify image file {str(path)!r}") from None
+        except BaseException:
+            mapped.close()
+            raise
+        if len(img.tile) == 1 and img.tile[0][0] == "raw":
+            img.close()
+            mapped.close()
+            return None
+        return img
@@ -0,0 +1,218 @@
+import contextlib
+import hashlib
+import os
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class OutputCache:
+    """
+    A local, content-addressed cache of rendered outputs, shared by every run and source directory.
+    Rendering the same sources with the same settings again (e.g. for another client folder) copies
+    the cached outputs instead of decoding, resampling and encoding them.
+
+    - An entry's key hashes the content digests of the payload's sources (see 'digest'), the
+      RenderConfig fingerprint and the render version, so renamed or moved sources still hit, and
+      changed settings or rendering code never do.
+    - An entry holds the encoded outputs under their name minus the payload's stem (e.g. '_pan.jpg'
+      or '_2_pan.jpg'), so they can be restored for sources of any name.
+    - Entries are written to a temporary directory and renamed into place, so readers only ever see
+      complete entries. A hit refreshes the entry's modification time; once the cache grows past
+      'max_size' bytes, the least recently used entries are evicted.
+    - Processes share the cache through a lock file: lookups and stores hold it shared, eviction
+      exclusively. Without file locking (e.g. on Windows), an entry evicted mid-copy is a miss.
+    - Hits are copied with a reflink where the filesystem supports it (see 'copy').
+
+    Any error while reading or writing the cache is a miss; the payload is rendered as usual.
+
+    Usage:
+    ::
+        cache = OutputCache(OutputCache.default_root())
+        key = cache.key([OutputCache.digest(path) for path in paths], config.fingerprint, Toolkit.RENDER_VERSION)
+        with cache.lookup(key) as outputs:  # [(name tail, cached file)], or None on a miss
+            ...  # copy them while the entry cannot be evicted
+        cache.store(key, [(tail, rendered_file), ...])
+    """
+    MAX_SIZE = 2 * 1024 ** 3
+    READ_SIZE = 1024 * 1024
+    ENTRIES_DIR = "entries"
+    TMP_DIR = "tmp"
+    LOCK_FILE = ".lock"
+    # Linux ioctl cloning a whole file (btrfs, XFS, bcachefs...)
+    FICLONE = 0x40049409
+
+    def __init__(self, root: Path, max_size: int = MAX_SIZE) -> None:
+        self.root = root
+        self.max_size = max(0, max_size)
+        # Bytes stored since the last eviction pass, started with one at the first store
+        self._stored: int | None = None
+
+    @staticmethod
+    def default_root() -> Path:
+        """The per-user cache directory of the platform."""
+        if sys.platform == "win32":
+            base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+        elif sys.platform == "darwin":
+            base = Path.home() / "Library" / "Caches"
+        else:
+            base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        return base / "panelizer" / "outputs"
+
+    @staticmethod
+    def key(digests: Sequence[bytes], fingerprint: str, version: int | str) -> str:
+        """The entry key of a payload, from the content digests of its sources."""
+        key = hashlib.blake2b(f"{version}\0{fingerprint}\0{len(digests)}".encode("utf-8"), digest_size=20)
+        for digest in digests:
+            key.update(digest)
+        return key.hexdigest()
+
+    @staticmethod
+    def digest(source: bytes | str | os.PathLike) -> bytes:
+        """
+        The content digest of a source, from its bytes or read from its path (raises OSError).
+        The SourceIndex stores the same digests.
+        """
+        digest = hashlib.blake2b(digest_size=32)
+        if isinstance(source, bytes):
+            digest.update(source)
+            return digest.digest()
+        with open(source, "rb") as f:
+            while chunk := f.read(OutputCache.READ_SIZE):
+                digest.update(chunk)
+        return digest.digest()
+
+    @contextlib.contextmanager
+    def lookup(self, key: str) -> Iterator[List[Tuple[str, Path]] | None]:
+        """
+        Yields the (name tail, cached file) pairs of an entry, or None on a miss.
+        The entry is not evicted before the block exits.
+        """
+        entry = self._entry(key)
+        with contextlib.ExitStack() as stack:
+            try:
+                stack.enter_context(self._locked(exclusive=False))
+                outputs = sorted((path.name, path) for path in entry.iterdir())
+                # Mark it as recently used
+                os.utime(entry)
+            except OSError:
+                outputs = None
+            yield outputs or None
+
+    def store(self, key: str, outputs: Sequence[Tuple[str, Path]]) -> None:
+        """Copies rendered outputs into a new entry (keeps an existing one) and evicts if needed."""
+        if not outputs or self.max_size == 0:
+            return
+        size = 0
+        tmp = self.root / self.TMP_DIR / f"{os.getpid()}-{uuid.uuid4().hex}"
+        try:
+            with self._locked(exclusive=False):
+                tmp.mkdir(parents=True)
+                for tail, path in outputs:
+                    OutputCache.copy(path, tmp / tail)
+                    size += (tmp / tail).stat().st_size
+                entry = self._entry(key)
+                entry.parent.mkdir(parents=True, exist_ok=True)
+                # Atomic; fails if another process stored the same entry first
+                tmp.rename(entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        if self._stored is None or self._stored + size > self.max_size // 16:
+            self._stored = 0
+            self.evict()
+        else:
+            self._stored += size
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache fits in 'max_size' bytes."""
+        try:
+            with self._locked(exclusive=True):
+                entries = sorted(self._scan())
+                total = sum(size for _, size, _ in entries)
+                for _, size, entry in entries:
+                    if total <= self.max_size:
+                        break
+                    shutil.rmtree(entry, ignore_errors=True)
+                    total -= size
+                self._sweep_tmp()
+        except OSError:
+            pass
+
+    def _scan(self) -> Iterator[Tuple[float, int, Path]]:
+        """(last use, size, path) of every entry."""
+        entries_dir = self.root / self.ENTRIES_DIR
+        if not entries_dir.is_dir():
+            return
+        for bucket in entries_dir.iterdir():
+            for entry in bucket.iterdir():
+                try:
+                    used = entry.stat().st_mtime
+                    size = sum(path.stat().st_size for path in entry.iterdir())
+                except OSError:
+                    continue
+                yield used, size, entry
+
+    def _sweep_tmp(self) -> None:
+        """Removes the temporary entries of processes killed mid-store (called under the exclusive lock)."""
+        tmp_dir = self.root / self.TMP_DIR
+        if not tmp_dir.is_dir():
+            return
+        for tmp in tmp_dir.iterdir():
+            pid = tmp.name.partition("-")[0]
+            if pid.isdigit() and not self._is_alive(int(pid)):
+                shutil.rmtree(tmp, ignore_errors=True)
+            elif time.time() - tmp.stat().st_mtime > 24 * 3600:
+                # A reused pid cannot keep a stale entry forever
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        if pid == os.getpid():
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    def _entry(self, key: str) -> Path:
+        return self.root / self.ENTRIES_DIR / key[:2] / key
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """Holds the cache's lock file, shared or exclusive (no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.root / self.LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def copy(source: Path, target: Path) -> None:
+        """Copies a file, as a reflink (sharing its blocks) where the filesystem supports it."""
+        if fcntl is not None and sys.platform.startswith("linux"):
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                try:
+                    fcntl.ioctl(dst.fileno(), OutputCache.FICLONE, src.fileno())
+                    return
+                except OSError:
+                    # Not supported, or across filesystems
+                    pass
+        shutil.copyfile(source, target)
@@ -0,0 +1,176 @@
+import atexit
+import errno
+import itertools
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Hashable, List, Tuple
+
+
+class OutputStager:
+    """
+    Encodes outputs on a local staging directory (tmpfs by default) and publishes them to their
+    final paths in batches, so a slow or remote output directory only sees one large sequential
+    write per output instead of the encoder's many small ones.
+
+    - 'stage_path' gives the local path to encode an output to; 'publish' queues finished outputs
+      under a key (e.g. the payload id) and 'flush' moves them into place once 'due' (every
+      'flush_batch' outputs) or at the end of a chunk.
+    - Publishing is atomic: an output on the same filesystem is renamed into place, otherwise
+      it is copied next to its final path under a '.part' name and then renamed. No partial
+      file ever appears under an output name.
+    - The outputs of a key (e.g. the panels of a panorama) are published together: they are only
+      renamed into place once all of them were copied, and if one still fails, those already
+      published are removed.
+    - Each process stages into its own directory, removed at exit; the directories of dead
+      processes are swept when a new one is created.
+
+    Usage:
+    ::
+        stager = OutputStager(OutputStager.default_root() or Path("/mnt/ssd/stage"), flush_batch=32)
+        stager.publish([(stager.stage_path(final), final)], key=item_id)
+        failed = stager.flush()  # {key: OSError} of the outputs that could not be published
+    """
+    DEFAULT_ROOT = Path("/dev/shm")
+    DIR_PREFIX = "panelizer-stage-"
+    FLUSH_BATCH = 8
+    PART_SUFFIX = ".part"
+
+    def __init__(self, root: Path, flush_batch: int = FLUSH_BATCH) -> None:
+        self.root = root
+        self.flush_batch = max(1, flush_batch)
+        self._dir: Path | None = None
+        self._names = itertools.count(1)
+        self._pending: List[Tuple[Hashable, Path, Path]] = []
+
+    @staticmethod
+    def default_root() -> Path | None:
+        """The tmpfs at DEFAULT_ROOT if it is usable, otherwise None (no staging)."""
+        root = OutputStager.DEFAULT_ROOT
+        if root.is_dir() and os.access(root, os.W_OK | os.X_OK):
+            return root
+        return None
+
+    @property
+    def dir(self) -> Path:
+        """This process's staging directory, created on first use."""
+        if self._dir is None:
+            self._sweep()
+            path = self.root / f"{self.DIR_PREFIX}{os.getpid()}"
+            path.mkdir(exist_ok=True)
+            self._dir = path
+            atexit.register(self.close)
+        return self._dir
+
+    @property
+    def due(self) -> bool:
+        return len(self._pending) >= self.flush_batch
+
+    def stage_path(self, final_path: Path) -> Path:
+        """A fresh local path to encode an output to."""
+        return self.dir / f"{next(self._names)}-{final_path.name}"
+
+    def publish(self, outputs: List[Tuple[Path, Path]], key: Hashable = None) -> None:
+        """Queues (staged path, final path) pairs to be moved into place by the next 'flush'."""
+        self._pending.extend((key, staged, final) for staged, final in outputs)
+
+    def flush(self) -> Dict[Hashable, OSError]:
+        """
+        Publishes every queued output. Returns the error of each key that failed to publish;
+        none of the outputs of such a key are left in place.
+        """
+        failed: Dict[Hashable, OSError] = {}
+        pending, self._pending = self._pending, []
+        by_key: Dict[Hashable, List[Tuple[Path, Path]]] = {}
+        for key, staged, final in pending:
+            by_key.setdefault(key, []).append((staged, final))
+        for key, outputs in by_key.items():
+            try:
+                self._publish_all(outputs)
+            except OSError as e:
+                failed[key] = e
+        return failed
+
+    def _publish_all(self, outputs: List[Tuple[Path, Path]]) -> None:
+        """Moves a key's outputs into place, all of them or none."""
+        ready: List[Tuple[Path, Path]] = []
+        published: List[Path] = []
+        try:
+            # Copy what crosses filesystems first, the slow part that is likely to fail
+            for staged, final in outputs:
+                ready.append((self._prepare(staged, final), final))
+            for source, final in ready:
+                self._move(source, final)
+                published.append(final)
+        except BaseException:
+            for source, _ in ready:
+                if source.name.endswith(self.PART_SUFFIX):
+                    source.unlink(missing_ok=True)
+            for final in published:
+                final.unlink(missing_ok=True)
+            raise
+        finally:
+            for staged, _ in outputs:
+                staged.unlink(missing_ok=True)
+
+    def _prepare(self, staged: Path, final: Path) -> Path:
+        """The file to rename into place: the staged one, or a '.part' copy next to the final path."""
+        if staged.stat().st_dev == final.parent.stat().st_dev:
+            return staged
+        return self._copy_part(staged, final)
+
+    def _copy_part(self, source: Path, final: Path) -> Path:
+        part = final.with_name(final.name + self.PART_SUFFIX)
+        try:
+            # copyfile uses sendfile/copy_file_range where available: one large sequential transfer
+            shutil.copyfile(source, part)
+        except BaseException:
+            part.unlink(missing_ok=True)
+            raise
+        return part
+
+    def discard(self, outputs: List[Tuple[Path, Path]]) -> None:
+        """Removes staged outputs that will not be published."""
+        for staged, _ in outputs:
+            staged.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Drops whatever is still queued and removes the staging directory."""
+        self.discard([(staged, final) for _, staged, final in self._pending])
+        self._pending.clear()
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    def _move(self, source: Path, final: Path) -> None:
+        try:
+            os.replace(source, final)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        # Same device number, yet another mount (e.g. a bind mount)
+        part = self._copy_part(source, final)
+        try:
+            os.replace(part, final)
+        except BaseException:
+            part.unlink(missing_ok=True)
+            raise
+
+    def _sweep(self) -> None:
+        """Removes the staging directories left by processes that no longer exist."""
+        try:
+            candidates = list(self.root.glob(f"{self.DIR_PREFIX}*"))
+        except OSError:
+            return
+        for path in candidates:
+            try:
+                pid = int(path.name[len(self.DIR_PREFIX):])
+                os.kill(pid, 0)
+            except ValueError:
+                continue
+            except ProcessLookupError:
+                shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                # e.g. EPERM: the process exists under another user
+                continue
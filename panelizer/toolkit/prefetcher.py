@@ -0,0 +1,132 @@
+import collections
+import os
+import threading
+from typing import Deque, Iterable
+
+
+class SourcePrefetcher:
+    """
+    Reads the source files of upcoming payloads into memory on a background thread, so the next
+    file is already loaded while the current one is being resampled. Aimed at high-latency mounts,
+    where the many small reads of a decoder each pay a round trip.
+
+    - 'schedule' queues paths in the order they will be rendered.
+    - At most 'depth' files are buffered ahead, within 'budget' bytes; a file larger than
+      the budget is not buffered but hinted to the kernel (posix_fadvise WILLNEED) instead.
+    - 'take' hands over a file's bytes (waiting if it is being read right now) and frees its
+      share of the budget, along with the buffers of files scheduled before it, which were passed
+      over. Files that were not read ahead, or failed to, return None, so the decoder reads them
+      itself and reports the real error.
+    - 'clear' drops everything that was not taken, e.g. at the end of a cancelled chunk.
+
+    Usage:
+    ::
+        prefetcher = SourcePrefetcher()
+        prefetcher.schedule(paths)
+        data = prefetcher.take(paths[0])
+        img = Image.open(io.BytesIO(data) if data is not None else paths[0])
+    """
+    DEPTH = 4
+    BUDGET = 32 * 1024 ** 2
+
+    def __init__(self, depth: int = DEPTH, budget: int = BUDGET) -> None:
+        self.depth = max(1, depth)
+        self.budget = max(1, budget)
+        self._queue: Deque[str] = collections.deque()
+        # In schedule order, since files are read in that order
+        self._buffers: collections.OrderedDict[str, bytes] = collections.OrderedDict()
+        self._in_use = 0
+        self._reading: str | None = None
+        self._wanted: str | None = None
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, paths: Iterable[str]) -> None:
+        """Queues files to read ahead, in the order they will be taken."""
+        with self._cond:
+            self._queue.extend(paths)
+            self._cond.notify_all()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="source-prefetcher", daemon=True)
+            self._thread.start()
+
+    def take(self, path: str) -> bytes | None:
+        """The bytes of a file read ahead, or None if the caller should read it itself."""
+        with self._cond:
+            self._wanted = path
+            self._cond.notify_all()
+            while self._reading == path:
+                self._cond.wait()
+            self._wanted = None
+
+            data = None
+            if path in self._buffers:
+                while data is None:
+                    first, buffer = self._buffers.popitem(last=False)
+                    self._in_use -= len(buffer)
+                    if first == path:
+                        data = buffer
+            elif path in self._queue:
+                # Everything read so far was scheduled before this file
+                self._queue.remove(path)
+                self._buffers.clear()
+                self._in_use = 0
+            self._cond.notify_all()
+            return data
+
+    def clear(self) -> None:
+        """Drops the queue and every buffer that was not taken."""
+        with self._cond:
+            self._generation += 1
+            self._queue.clear()
+            self._buffers.clear()
+            self._in_use = 0
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue or len(self._buffers) >= self.depth:
+                    self._cond.wait()
+                path = self._reading = self._queue.popleft()
+                generation = self._generation
+            data = None
+            try:
+                data = self._read(path, generation)
+            finally:
+                with self._cond:
+                    self._reading = None
+                    if data is not None and generation == self._generation:
+                        self._buffers[path] = data
+                        self._in_use += len(data)
+                    self._cond.notify_all()
+
+    def _read(self, path: str, generation: int) -> bytes | None:
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > self.budget:
+                    self._advise(f.fileno())
+                    return None
+                with self._cond:
+                    # Wait for room, unless the file is needed right now
+                    while (
+                            self._in_use and self._in_use + size > self.budget
+                            and self._wanted != path and generation == self._generation
+                    ):
+                        self._cond.wait()
+                    if generation != self._generation:
+                        return None
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _advise(fd: int) -> None:
+        """Asks the kernel to start reading the whole file, where supported."""
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
@@ -0,0 +1,147 @@
+import hashlib
+import json
+from typing import Literal, NamedTuple, Tuple
+
+from PIL import Image
+
+from .canvas_pool import CanvasPool
+
+
+class RenderConfig(NamedTuple):
+    """
+    The immutable render configuration of a whole batch.
+    Built once (and validated up front) from the loosely typed settings dict, so the Toolkit
+    never has to look anything up per call: ratios, colours and paddings are already resolved.
+    Being a NamedTuple, it is slotted, hashable and cheap to pickle.
+
+    Usage:
+    ::
+        config = RenderConfig.from_settings(settings_dict)  # raises ValueError if invalid
+        queue = Toolkit.prepare_queue(files, config)
+        config.fingerprint  # stable key of everything that affects the rendered pixels
+    """
+    layout: Literal["framing", "uniform"] = "framing"
+    canvas_height: int = 2500
+    canvas_ratio: float = 4 / 5
+    background: Tuple[int, int, int] = (255, 255, 255)
+    pad_left: float = 0
+    pad_right: float = 0
+    pad_top: float = 0
+    pad_bottom: float = 0
+    border: float = 5
+    orientation: Literal["inward", "outward"] = "inward"
+    enforcement: float | None = None
+    split_wide_images: bool = False
+    stack_landscape_images: bool = False
+    resampling: str = "max"
+    output_dir_name: str = "panelizer_output"
+
+    RATIO_MAP = {
+        "3:4": 3 / 4,
+        "4:5": 4 / 5,
+        "2:3": 2 / 3,
+        "9:16": 9 / 16,
+    }
+    COLOR_MAP = {
+        "white": "#FFFFFF",
+        "black": "#000000",
+        "lightgray": "#D3D3D3",
+        "darkgray": "#333333",
+    }
+
+    # Resampling presets: (filter, reducing_gap). A reducing_gap lets Pillow shrink by an integer
+    # factor with a cheap box reduction first, then resample the rest with the filter.
+    # Smaller gaps are faster, None is a single full-quality pass.
+    RESAMPLING_PRESETS = {
+        "draft": (Image.Resampling.BILINEAR, 2.0),
+        "balanced": (Image.Resampling.LANCZOS, 3.0),
+        "max": (Image.Resampling.LANCZOS, None),
+    }
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "RenderConfig":
+        """
+        Resolves and validates a settings dict (as built by the HomeScreen).
+        Missing or empty values fall back to the defaults; invalid ones raise a ValueError
+        listing every problem at once.
+        """
+        errors = []
+        pad_data = settings.get("padding") or {}
+
+        def choice(value, options, default, name):
+            if not value:
+                return default
+            if value not in options:
+                errors.append(f"unknown {name} '{value}'")
+                return default
+            return value
+
+        def number(value, default, name, low=0.0, high=100.0):
+            if value is None or value == "":
+                return default
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                errors.append(f"{name} must be a number, got '{value}'")
+                return default
+            if not low <= value < high:
+                errors.append(f"{name} must be between {low:g} and {high:g}, got {value:g}")
+                return default
+            return value
+
+        layout = choice(settings.get("layout"), ("framing", "uniform"), "framing", "layout")
+        canvas_height = int(number(settings.get("canvas_height"), 2500, "canvas height", 1, 100_000) or 2500)
+        ratio_name = choice(settings.get("canvas_ratio"), cls.RATIO_MAP, "4:5", "canvas ratio")
+        color_name = choice(settings.get("background_color"), cls.COLOR_MAP, "white", "background colour")
+        orientation = choice(pad_data.get("orientation"), ("inward", "outward"), "inward", "border orientation")
+        enforcement = choice(pad_data.get("enforcement"), ("none", *cls.RATIO_MAP), "none", "enforcement ratio")
+        resampling = choice(settings.get("resampling"), cls.RESAMPLING_PRESETS, "max", "resampling preset")
+
+        pad_left = number(pad_data.get("left"), 0, "left padding") or 0
+        pad_right = number(pad_data.get("right"), 0, "right padding") or 0
+        pad_top = number(pad_data.get("top"), 0, "top padding") or 0
+        pad_bottom = number(pad_data.get("bottom"), 0, "bottom padding") or 0
+        border = number(pad_data.get("uniform"), 5, "border", 0, 50) or 5
+
+        if layout == "framing":
+            if pad_left + pad_right >= 100:
+                errors.append("left and right padding leave no room for the image")
+            if pad_top + pad_bottom >= 100:
+                errors.append("top and bottom padding leave no room for the image")
+
+        if errors:
+            raise ValueError("Invalid render settings: " + "; ".join(errors))
+
+        return cls(
+            layout=layout,
+            canvas_height=canvas_height,
+            canvas_ratio=cls.RATIO_MAP[ratio_name],
+            background=CanvasPool.parse_color(cls.COLOR_MAP[color_name]),
+            pad_left=pad_left,
+            pad_right=pad_right,
+            pad_top=pad_top,
+            pad_bottom=pad_bottom,
+            border=border,
+            orientation=orientation,
+            enforcement=None if enforcement == "none" else cls.RATIO_MAP[enforcement],
+            split_wide_images=bool(settings.get("split_wide_images")),
+            stack_landscape_images=bool(settings.get("stack_landscape_images")),
+            resampling=resampling,
+            output_dir_name=settings.get("output_dir_name") or "panelizer_output",
+        )
+
+    @property
+    def resample(self) -> Tuple[Image.Resampling, float | None]:
+        """The (filter, reducing_gap) pair of the resampling preset."""
+        return self.RESAMPLING_PRESETS[self.resampling]
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        A stable hex key of every field that affects the rendered pixels.
+        The output directory name is left out, so the same render in another run shares the key.
+        """
+        fields = self._asdict()
+        del fields["output_dir_name"]
+        raw = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,166 @@
+import io
+import os
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Tuple
+
+from PIL import Image, UnidentifiedImageError
+
+from .mapped_source import MappedSource
+from .output_cache import OutputCache
+from .output_stager import OutputStager
+from .prefetcher import SourcePrefetcher
+from .source_index import SourceIndex
+
+
+class CancelToken:
+    """
+    A cooperative cancellation flag, polled by the Toolkit between stages and panels.
+    The check is any callable, e.g. a read of shared memory set by the parent process (see Worker).
+    """
+
+    class Cancelled(Exception):
+        """Raised at the next checkpoint once the token is cancelled."""
+
+    def __init__(self, is_cancelled: Callable[[], bool] | None = None) -> None:
+        self._is_cancelled = is_cancelled
+
+    @property
+    def cancelled(self) -> bool:
+        return self._is_cancelled is not None and self._is_cancelled()
+
+    def check(self) -> None:
+        """Raises CancelToken.Cancelled if the work should stop."""
+        if self.cancelled:
+            raise CancelToken.Cancelled()
+
+
+class RenderJob:
+    """
+    The per-payload state threaded through the Toolkit: its CancelToken, where its sources are read
+    from (see 'open_source') and its staged outputs.
+
+    Outputs are written under a PART_SUFFIX name and only renamed into place by 'commit', once the
+    whole payload (all panels of a panorama) has been rendered. A cancelled or failed payload leaves
+    no half-written or partial set of outputs behind: 'discard' removes what was staged, and parts
+    orphaned by a killed process are removed with 'discard_orphans'.
+
+    With an OutputStager, outputs are encoded on its local staging directory instead, and 'commit'
+    hands them over to be published under 'key' (see OutputStager.flush).
+    With a SourcePrefetcher, sources read ahead are decoded from memory; large sources
+    are decoded from a memory map (see MappedSource).
+    'source_digest' hashes a source for the OutputCache without reading it twice: from the
+    prefetcher's buffer (kept for 'open_source'), else from the SourceIndex, else from the file.
+    """
+    PART_SUFFIX = ".part"
+
+    def __init__(
+            self,
+            token: CancelToken | None = None,
+            stager: OutputStager | None = None,
+            key: Hashable = None,
+            prefetcher: SourcePrefetcher | None = None,
+            index: SourceIndex | None = None
+    ) -> None:
+        self.token = token or CancelToken()
+        self.stager = stager
+        self.key = key
+        self.prefetcher = prefetcher
+        self.index = index
+        # Sources taken from the prefetcher before being opened (None: not read ahead)
+        self._taken: Dict[str, bytes | None] = {}
+        self._parts: List[Path] = []
+        self._staged: List[Tuple[Path, Path]] = []
+
+    def check(self) -> None:
+        self.token.check()
+
+    def source_digest(self, path: Path) -> bytes | None:
+        """The content digest of a source (see OutputCache.digest), or None if it cannot be read."""
+        data = self._take(path)
+        if data is not None:
+            return OutputCache.digest(data)
+        if self.index is not None:
+            return self.index.digest(path)
+        try:
+            return OutputCache.digest(path)
+        except OSError:
+            return None
+
+    def open_source(self, path: Path) -> Image.Image:
+        """Opens a source image, from the prefetcher's buffer or a memory map if possible."""
+        data = self._take(path)
+        self._taken.pop(str(path), None)
+        if data is None:
+            img = MappedSource.open_image(path)
+            return img if img is not None else Image.open(path)
+        try:
+            return Image.open(io.BytesIO(data))
+        except UnidentifiedImageError:
+            # Same message as when opened by path
+            raise UnidentifiedImageError(f"cannot identify image file {str(path)!r}") from None
+
+    def _take(self, path: Path) -> bytes | None:
+        """A source's buffer from the prefetcher, taken once and kept until it is opened."""
+        if self.prefetcher is None:
+            return None
+        key = str(path)
+        if key not in self._taken:
+            self._taken[key] = self.prefetcher.take(key)
+        return self._taken[key]
+
+    def save(self, image: Image.Image, save_path: Path, **params) -> None:
+        """Saves a JPEG output on the stager, or under its part name."""
+        self._write(save_path, lambda target: image.save(target, format="JPEG", **params))
+
+    def restore(self, cached: Path, save_path: Path) -> None:
+        """Writes an output from the OutputCache, like 'save'."""
+        self._write(save_path, lambda target: OutputCache.copy(cached, target))
+
+    @property
+    def outputs(self) -> List[Tuple[Path, Path]]:
+        """The (written file, final path) pairs of every output saved so far."""
+        parts = [(path.with_name(path.name + self.PART_SUFFIX), path) for path in self._parts]
+        return parts + self._staged
+
+    def _write(self, save_path: Path, write: Callable[[Path], None]) -> None:
+        if self.stager is not None:
+            stage_path = None
+            try:
+                stage_path = self.stager.stage_path(save_path)
+                write(stage_path)
+                self._staged.append((stage_path, save_path))
+                return
+            except OSError:
+                # e.g. the staging area is full: write this output in place instead
+                if stage_path is not None:
+                    stage_path.unlink(missing_ok=True)
+        part_path = save_path.with_name(save_path.name + self.PART_SUFFIX)
+        self._parts.append(save_path)
+        write(part_path)
+
+    def commit(self) -> None:
+        """Moves every output into place, or queues it on the stager."""
+        for save_path in self._parts:
+            os.replace(save_path.with_name(save_path.name + self.PART_SUFFIX), save_path)
+        if self._staged:
+            self.stager.publish(self._staged, self.key)
+        self._parts = []
+        self._staged = []
+
+    def discard(self) -> None:
+        """Removes every output written so far."""
+        for save_path in self._parts:
+            save_path.with_name(save_path.name + self.PART_SUFFIX).unlink(missing_ok=True)
+        if self._staged:
+            self.stager.discard(self._staged)
+        self._parts = []
+        self._staged = []
+
+    @staticmethod
+    def discard_orphans(output_dir: Path) -> None:
+        """Removes the parts left in an output directory by a process killed mid-payload."""
+        try:
+            for part_path in output_dir.glob(f"*{RenderJob.PART_SUFFIX}"):
+                part_path.unlink(missing_ok=True)
+        except OSError:
+            pass
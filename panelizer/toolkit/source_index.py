@@ -0,0 +1,241 @@
+import multiprocessing
+import os
+import sqlite3
+import stat
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from PIL import UnidentifiedImageError
+
+from .header_sniffer import HeaderSniffer, ImageInfo
+from .output_cache import OutputCache
+
+
+class SourceIndex:
+    """
+    A persistent index of source image metadata (dimensions, mode and orientation, read by the
+    HeaderSniffer, and content digest), so reopening
+    a folder does not probe every file again. Backed by a local SQLite database and shared by
+    every session.
+
+    - Rows are keyed by path and only trusted while the file keeps its size and modification time;
+      a changed file is probed again and its row replaced.
+    - The rows of a directory are loaded in one query the first time one of its files is looked up,
+      so a lookup is one stat call and a dict access.
+    - 'warm' probes the files that are not indexed yet on a background thread, e.g. right after
+      a folder is selected, so planning the batch later only reads the index. Its rows are written
+      WRITE_BATCH at a time, in one transaction each.
+    - Files that cannot be identified are indexed too (as None), so they are not probed again.
+    - Safe to use from several threads; if the database cannot be used, every lookup probes the
+      file directly (reported in the main process only, never by worker processes).
+
+    Usage:
+    ::
+        index = SourceIndex(SourceIndex.default_path())
+        index.warm(paths)
+        info = index.info(path)  # ImageInfo, or None if it is not a readable image
+        digest = index.digest(path)  # hash of the content, or None if unreadable
+        index.close()  # e.g. at shutdown, so the write-ahead log is checkpointed
+    """
+    FILE_NAME = "sources.sqlite3"
+    SCHEMA_VERSION = 2
+    BUSY_TIMEOUT = 5.0
+    WRITE_BATCH = 256
+
+    # Row: (size, mtime_ns, width, height, mode, orientation, digest); width is -1 for unidentified files
+    _Row = Tuple[int, int, int | None, int | None, str | None, int | None, bytes | None]
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._db: sqlite3.Connection | None = None
+        self._broken = False
+        self._lock = threading.RLock()
+        self._rows: Dict[str, Dict[str, SourceIndex._Row]] = {}
+        # (dir, name, *row) of rows not written to the database yet
+        self._unsaved: List[tuple] = []
+        self._warm_generation = 0
+
+    @staticmethod
+    def default_path() -> Path:
+        """Next to the OutputCache, in the per-user cache directory."""
+        return OutputCache.default_root().parent / SourceIndex.FILE_NAME
+
+    def info(self, path: str | os.PathLike) -> ImageInfo | None:
+        """The dimensions and mode of an image, or None if it is not a readable image."""
+        return self._info(path, defer=False)
+
+    def _info(self, path: str | os.PathLike, defer: bool) -> ImageInfo | None:
+        st, row = self._lookup(path)
+        if st is None:
+            return None
+        if row is not None and row[2] is not None:
+            return ImageInfo(row[2], row[3], row[4], row[5]) if row[2] >= 0 else None
+        try:
+            info = HeaderSniffer.probe(path)
+        except UnidentifiedImageError:
+            info = None
+        except OSError:
+            # Maybe transient: leave it out of the index
+            return None
+        if info is None:
+            self._store(path, st, row, defer, width=-1, height=-1, mode="", orientation=1)
+        else:
+            self._store(path, st, row, defer, **info._asdict())
+        return info
+
+    def digest(self, path: str | os.PathLike) -> bytes | None:
+        """A hash of the whole content of a file, or None if it cannot be read."""
+        st, row = self._lookup(path)
+        if st is None:
+            return None
+        if row is not None and row[6] is not None:
+            return row[6]
+        try:
+            digest = OutputCache.digest(path)
+        except OSError:
+            return None
+        self._store(path, st, row, defer=False, digest=digest)
+        return digest
+
+    def warm(self, paths: Iterable[str | os.PathLike]) -> None:
+        """Indexes the given files on a background thread; a new call abandons the previous one."""
+        paths = list(paths)
+        with self._lock:
+            self._warm_generation += 1
+            generation = self._warm_generation
+
+        def run() -> None:
+            try:
+                for path in paths:
+                    if self._warm_generation != generation:
+                        return
+                    self._info(path, defer=True)
+            finally:
+                with self._lock:
+                    self._save()
+
+        threading.Thread(target=run, name="source-index-warm", daemon=True).start()
+
+    def close(self) -> None:
+        """Writes the pending rows and closes the database; later lookups probe files directly."""
+        with self._lock:
+            self._warm_generation += 1
+            self._save()
+            self._broken = True
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _lookup(self, path: str | os.PathLike) -> Tuple[os.stat_result | None, _Row | None]:
+        """The file's stat (None if it is not a regular file) and its row, if still valid."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None, None
+        # Never block on a FIFO or device posing as an image
+        if not stat.S_ISREG(st.st_mode):
+            return None, None
+        directory, name = os.path.split(os.path.abspath(path))
+        row = self._directory(directory).get(name)
+        if row is not None and (row[0], row[1]) != (st.st_size, st.st_mtime_ns):
+            row = None
+        return st, row
+
+    def _directory(self, directory: str) -> Dict[str, _Row]:
+        """The rows of a directory, loaded from the database on first use."""
+        with self._lock:
+            rows = self._rows.get(directory)
+            if rows is not None:
+                return rows
+            rows = self._rows[directory] = {}
+            db = self._connect()
+            if db is None:
+                return rows
+            try:
+                for name, *row in db.execute(
+                        "SELECT name, size, mtime_ns, width, height, mode, orientation, digest FROM files WHERE dir = ?",
+                        (directory,)
+                ):
+                    rows[name] = tuple(row)
+            except sqlite3.Error as e:
+                self._fail(e)
+            return rows
+
+    def _store(
+            self,
+            path: str | os.PathLike,
+            st: os.stat_result,
+            row: _Row | None,
+            defer: bool,
+            **values
+    ) -> None:
+        """
+        Saves new values of a file's row, keeping the other (still valid) ones.
+        A deferred row is written with the next WRITE_BATCH rows.
+        """
+        _, _, width, height, mode, orientation, digest = row or (st.st_size, st.st_mtime_ns, *[None] * 5)
+        width = values.get("width", width)
+        height = values.get("height", height)
+        mode = values.get("mode", mode)
+        orientation = values.get("orientation", orientation)
+        digest = values.get("digest", digest)
+        directory, name = os.path.split(os.path.abspath(path))
+        new_row = (st.st_size, st.st_mtime_ns, width, height, mode, orientation, digest)
+        with self._lock:
+            self._directory(directory)[name] = new_row
+            self._unsaved.append((directory, name, *new_row))
+            if not defer or len(self._unsaved) >= self.WRITE_BATCH:
+                self._save()
+
+    def _save(self) -> None:
+        """Writes the pending rows in one transaction (called under the lock)."""
+        rows, self._unsaved = self._unsaved, []
+        if not rows:
+            return
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            with db:
+                db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            self._fail(e)
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """The database connection (called under the lock), or None if it cannot be used."""
+        if self._db is not None or self._broken:
+            return self._db
+        db = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                with db:
+                    db.execute("DROP TABLE IF EXISTS files")
+                    db.execute(
+                        "CREATE TABLE files ("
+                        "dir TEXT NOT NULL, name TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                        "width INTEGER, height INTEGER, mode TEXT, orientation INTEGER, digest BLOB, "
+                        "PRIMARY KEY (dir, name)) WITHOUT ROWID"
+                    )
+                    db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        except (OSError, sqlite3.Error) as e:
+            if db is not None:
+                db.close()
+            self._fail(e)
+            return None
+        self._db = db
+        return db
+
+    def _fail(self, error: Exception) -> None:
+        """Stops using the database for the rest of the session (called under the lock)."""
+        # A worker process writes straight to the terminal, over the app; it just probes files
+        if multiprocessing.parent_process() is None:
+            print(f"[SourceIndex] Error using the index, probing files directly: {error}")
+        self._broken = True
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,27 @@
+import errno
+
+
+class TransientIOError(OSError):
+    """
+    An I/O error worth retrying, such as a network share timing out or a stale NFS handle,
+    as opposed to a file that cannot be decoded. Raised by Toolkit.process_image(defer_transient=True)
+    in place of writing a '.failed' marker, so the caller can retry the payload later.
+    """
+    ERRNOS = frozenset(
+        getattr(errno, name) for name in (
+            "EIO", "EAGAIN", "EWOULDBLOCK", "EINTR", "EBUSY", "ETIMEDOUT", "ESTALE", "ENOLCK",
+            "ECONNRESET", "ECONNABORTED", "ECONNREFUSED", "ENOTCONN", "EPIPE",
+            "ENETDOWN", "ENETUNREACH", "ENETRESET", "EHOSTDOWN", "EHOSTUNREACH", "EREMOTEIO",
+        )
+        if hasattr(errno, name)
+    )
+
+    @staticmethod
+    def is_transient(error: BaseException) -> bool:
+        """Whether an error is I/O-class and likely to go away (decode errors carry no errno)."""
+        return isinstance(error, OSError) and error.errno in TransientIOError.ERRNOS
+
+    @staticmethod
+    def of(error: OSError, file_name: str) -> "TransientIOError":
+        """The retryable copy of an error, naming the file it happened on."""
+        return TransientIOError(error.errno, f"{error.strerror or error} ({file_name})")
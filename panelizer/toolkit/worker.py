@@ -0,0 +1,282 @@
+import atexit
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, List, Sequence, Tuple
+
+from PIL import Image
+
+from .core import Toolkit
+from .output_cache import OutputCache
+from .output_stager import OutputStager
+from .prefetcher import SourcePrefetcher
+from .render_config import RenderConfig
+from .render_job import CancelToken
+from .source_index import SourceIndex
+from .transient_io import TransientIOError
+
+
+class Worker:
+    """
+    The worker-process side of the batch engine. Only imports the toolkit (no textual),
+    so spawned processes start fast.
+
+    Worker processes are long-lived and serve many batches. Each batch is identified by a serial
+    number and its context (the RenderConfig and the path groups of all payloads) is written
+    to a file once; a worker loads it the first time it sees a new serial, so the context
+    crosses the process boundary once per worker and batch. Tasks are just chunks of payload ids,
+    and each chunk answers with one list of (id, result) pairs.
+
+    Progress flows through a shared array: [current batch serial, completed items, cancelled serial].
+    Workers only count items of the current batch, so stragglers of a cancelled batch
+    never leak into the next one. Setting the cancelled serial trips the CancelToken of every
+    payload of that batch at its next checkpoint, and the rest of the chunk is skipped.
+
+    Each worker also claims a slot of a shared activity array: [pid, batch serial, item id + 1,
+    start time in monotonic ns, items rendered], where the item id is 0 while idle. The parent reads it
+    to time out hung items, to tell which items were running when a worker crashed and to retire
+    workers that have rendered enough items (see WorkerPool.RECYCLE_AFTER_ITEMS).
+
+    With an OutputStager, outputs are encoded on local storage and published every 'flush_batch'
+    outputs and before a chunk returns, so only published payloads are ever reported as done
+    or counted as completed.
+
+    With a SourcePrefetcher, the sources of a chunk are read ahead on a background thread
+    while the worker renders, within 'prefetch_budget' bytes.
+
+    With an OutputCache, payloads rendered before (in any run or directory) are copied from it.
+    With a SourceIndex, the sources that were not read ahead are looked up there instead of being
+    read in full to compute the cache key.
+    """
+    SLOT_FIELDS = 5
+
+    _progress: Any = None
+    _activity: Any = None
+    _slot: int = -1
+    _tasks_left: int | None = None
+    _serial: int = 0
+    _config: RenderConfig | None = None
+    _groups: Tuple[Tuple[str, ...], ...] = ()
+    _stager: OutputStager | None = None
+    _prefetcher: SourcePrefetcher | None = None
+    _cache: OutputCache | None = None
+    _index: SourceIndex | None = None
+
+    @staticmethod
+    def init(
+            progress: Any,
+            activity: Any = None,
+            max_tasks: int | None = None,
+            address_space: int | None = None,
+            staging_dir: str | None = None,
+            flush_batch: int = OutputStager.FLUSH_BATCH,
+            prefetch_budget: int = SourcePrefetcher.BUDGET,
+            cache_dir: str | None = None,
+            cache_size: int = OutputCache.MAX_SIZE,
+            index_path: str | None = None
+    ) -> None:
+        """
+        Pool initializer. Claims an activity slot, caps the address space of the process
+        (so a hostile file fails with a MemoryError instead of exhausting the machine),
+        sets up output staging (in 'staging_dir', None: no staging), source read-ahead (0: none)
+        the output cache (in 'cache_dir', None: no cache) and the source index (at 'index_path',
+        None: no index) and warms up Pillow's plugin registry before the first task arrives.
+        """
+        Worker._progress = progress
+        Worker._activity = activity
+        Worker._tasks_left = max_tasks
+        Worker._claim_slot()
+        if address_space:
+            Worker._limit_address_space(address_space)
+        if staging_dir:
+            Worker._stager = OutputStager(Path(staging_dir), flush_batch)
+        if prefetch_budget:
+            Worker._prefetcher = SourcePrefetcher(budget=prefetch_budget)
+        if cache_dir:
+            Worker._cache = OutputCache(Path(cache_dir), cache_size)
+        if index_path:
+            Worker._index = SourceIndex(Path(index_path))
+            atexit.register(Worker._index.close)
+        Image.init()
+
+    @staticmethod
+    def _claim_slot() -> None:
+        activity = Worker._activity
+        if activity is None:
+            return
+        with activity.get_lock():
+            for slot in range(len(activity) // Worker.SLOT_FIELDS):
+                base = slot * Worker.SLOT_FIELDS
+                if activity[base] == 0:
+                    activity[base:base + Worker.SLOT_FIELDS] = [os.getpid(), 0, 0, 0, 0]
+                    Worker._slot = slot
+                    return
+
+    @staticmethod
+    def _release_slot() -> None:
+        if Worker._activity is None or Worker._slot < 0:
+            return
+        base = Worker._slot * Worker.SLOT_FIELDS
+        with Worker._activity.get_lock():
+            Worker._activity[base:base + Worker.SLOT_FIELDS] = [0] * Worker.SLOT_FIELDS
+        Worker._slot = -1
+
+    @staticmethod
+    def _mark(serial: int, item_id: int | None) -> None:
+        """Publishes the item being rendered (None: idle) to the worker's activity slot."""
+        if Worker._activity is None or Worker._slot < 0:
+            return
+        base = Worker._slot * Worker.SLOT_FIELDS
+        started = time.monotonic_ns()
+        with Worker._activity.get_lock():
+            if item_id is None:
+                Worker._activity[base + 1:base + 4] = [0, 0, 0]
+            else:
+                Worker._activity[base + 1:base + 4] = [serial, item_id + 1, started]
+
+    @staticmethod
+    def _count_items(count: int) -> None:
+        """Adds rendered items to the worker's activity slot."""
+        if Worker._activity is None or Worker._slot < 0:
+            return
+        with Worker._activity.get_lock():
+            Worker._activity[Worker._slot * Worker.SLOT_FIELDS + 4] += count
+
+    @staticmethod
+    def _limit_address_space(limit: int) -> None:
+        """Sets RLIMIT_AS where the platform supports it; a no-op elsewhere."""
+        try:
+            import resource
+        except ImportError:
+            return
+        try:
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        except (ValueError, OSError):
+            pass
+
+    @staticmethod
+    def ping() -> int:
+        """A no-op task used to spawn and health-check workers; it renders no item."""
+        Worker._task_done()
+        return os.getpid()
+
+    @staticmethod
+    def write_context(path: str, config: RenderConfig, groups: Sequence[Sequence[str]]) -> None:
+        """Writes a batch context file for 'run_chunk' (called in the parent process)."""
+        with open(path, "wb") as f:
+            pickle.dump((config, tuple(tuple(group) for group in groups)), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load_context(serial: int, path: str) -> None:
+        if Worker._serial == serial:
+            return
+        with open(path, "rb") as f:
+            Worker._config, Worker._groups = pickle.load(f)
+        Worker._serial = serial
+
+    @staticmethod
+    def _is_cancelled(serial: int) -> bool:
+        progress = Worker._progress
+        return progress is not None and progress[2] == serial
+
+    @staticmethod
+    def run_chunk(serial: int, context_path: str, ids: Sequence[int]) -> List[Tuple[int, Any]]:
+        """
+        Renders the payloads with the given ids and returns their results in one message.
+        A cancelled chunk returns early, without the payloads it did not finish.
+        Transient I/O errors are returned as TransientIOError results, for the parent to retry;
+        they do not count as completed. Any other error fails its payload alone (with a '.failed'
+        marker), never the chunk or the batch.
+        """
+        Worker._load_context(serial, context_path)
+        token = CancelToken(lambda: Worker._is_cancelled(serial))
+        stager = Worker._stager
+        prefetcher = Worker._prefetcher
+        if prefetcher is not None:
+            # Normalized like the Toolkit's paths, so 'take' finds them
+            prefetcher.schedule(str(Path(p)) for i in ids for p in Worker._groups[i])
+        results = []
+        # Results before this index are counted in the shared progress
+        counted = 0
+        for item_id in ids:
+            Worker._mark(serial, item_id)
+            try:
+                result = Toolkit.process_image(
+                    (list(Worker._groups[item_id]), Worker._config),
+                    token,
+                    defer_transient=True,
+                    stager=stager,
+                    key=item_id,
+                    prefetcher=prefetcher,
+                    cache=Worker._cache,
+                    index=Worker._index
+                )
+            except CancelToken.Cancelled:
+                break
+            except TransientIOError as e:
+                result = e
+            except Exception as e:
+                # e.g. a decoder error outside the ones process_image expects: one bad file is one failure
+                Toolkit.record_failure(list(Worker._groups[item_id]), Worker._config, f"{type(e).__name__}: {e}")
+                result = False
+            results.append((item_id, result))
+            if stager is None:
+                counted = Worker._count_progress(serial, results, counted)
+            elif stager.due:
+                Worker._flush(results)
+                counted = Worker._count_progress(serial, results, counted)
+        if stager is not None:
+            Worker._flush(results)
+            counted = Worker._count_progress(serial, results, counted)
+        if prefetcher is not None:
+            prefetcher.clear()
+        Worker._mark(serial, None)
+        Worker._count_items(len(ids))
+        Worker._task_done()
+        return results
+
+    @staticmethod
+    def _count_progress(serial: int, results: List[Tuple[int, Any]], counted: int) -> int:
+        """
+        Adds the results from index 'counted' on to the batch's completed count, once their outputs
+        are published (a publish may still turn them into TransientIOError, retried and counted later).
+        Returns the new number of counted results.
+        """
+        done = sum(1 for _, result in results[counted:] if not isinstance(result, TransientIOError))
+        progress = Worker._progress
+        if done and progress is not None:
+            with progress.get_lock():
+                if progress[0] == serial:
+                    progress[1] += done
+        return len(results)
+
+    @staticmethod
+    def _flush(results: List[Tuple[int, Any]]) -> None:
+        """Publishes the staged outputs and turns the payloads that failed to publish into failures."""
+        failed = Worker._stager.flush()
+        if not failed:
+            return
+        for index, (item_id, _) in enumerate(results):
+            error = failed.get(item_id)
+            if error is None:
+                continue
+            paths = list(Worker._groups[item_id])
+            if TransientIOError.is_transient(error):
+                results[index] = item_id, TransientIOError.of(error, Path(paths[0]).name)
+            else:
+                Toolkit.record_failure(paths, Worker._config, str(error) or type(error).__name__)
+                results[index] = item_id, False
+
+    @staticmethod
+    def _task_done() -> None:
+        # Mirrors the executor's own count of tasks (pings included), only a backstop to the item count
+        if Worker._tasks_left is None:
+            return
+        Worker._tasks_left -= 1
+        if Worker._tasks_left <= 0:
+            # The pool retires this process after this task; free the slot for its successor
+            Worker._release_slot()
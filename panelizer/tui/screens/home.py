@@ -1,6 +1,6 @@
 import asyncio
 from pathlib import Path
-from typing import Literal
+from typing import Callable, Literal, Sequence
 
 from textual import on
 from textual.app import ComposeResult
@@ -9,27 +9,52 @@ from textual.screen import Screen
 from textual.validation import Integer
 from textual.widgets import Select
 
-from panelizer.toolkit import Toolkit
+from panelizer.engine import BatchJournal, ProcessBatch, WorkerPool
+from panelizer.toolkit import RenderConfig, SourceIndex, Toolkit
 from textual_neon import SettingsPalette, CompleteInputGrid, CompleteSelect, \
     Toggle, NeonButton, DirSelectDialog, ChoicePalette, ListSelectDialog, \
     PathButton, Settings, ChoiceButton, SettingsButton, Paths, ScreenData, \
-    NeonHeader, NeonSelect, LoadingScreen, DoneScreen, CompleteInput
+    NeonHeader, NeonSelect, LoadingScreen, DoneScreen, CompleteInput, ConfirmDialog
 
 
 class HomeScreen(Screen[dict]):
     CSS_PATH = ["../css/home.tcss"]
     BINDINGS = []
+    # Settings keys mirrored by widgets, kept in sync through Settings.subscribe
+    PADDING_INPUTS = {
+        "img_pad_left": "#pad-left",
+        "img_pad_right": "#pad-right",
+        "img_pad_top": "#pad-top",
+        "img_pad_bottom": "#pad-bottom",
+        "img_pad_uniform": "#img-pad-uniform",
+    }
+    SELECTS = {
+        "layout": "#layout-select",
+        "background_color": "#bg-select",
+        "resampling_quality": "#resampling-select",
+        "canvas_height": "#height-select",
+        "canvas_ratio": "#ratio-select",
+        "uniform_border_orientation": "#uniform-orientation-select",
+        "uniform_border_enforcement": "#uniform-enforcement-select",
+    }
+    TOGGLES = {
+        "split_wide_active": "#split-wide-toggle",
+        "stack_landscape_active": "#stack-landscape-toggle",
+    }
 
     def __init__(self, data: ScreenData, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.data = data
         self.settings = Settings.ensure(app=self.app)
+        self.worker_pool = WorkerPool.ensure(app=self.app)
+        self.source_index = self._ensure_source_index()
         s = self.settings
         self.allowed_extensions: list[str] = s.get("allowed_extensions")
         self._selected_dir = Path(s.get("start_dir"))
         self.selected_files: list[str] = []
         self.file_mode: Literal["all", "select"] = "all"
         self.max_pad_percentage = 30
+        self._unsubscribers: list[Callable[[], None]] = []
 
     def compose(self) -> ComposeResult:
         s = self.settings
@@ -74,12 +99,19 @@ class HomeScreen(Screen[dict]):
                         units=["%", "%", "%", "%"],
                         id="pad-grid"
                     )
-                    yield CompleteSelect(
-                        select_id="height-select",
-                        label="Canvas Height",
-                        initial=s.get("canvas_height"),
-                        options=s.get("canvas_height_options"),
-                    )
+                    with Horizontal(id="height-quality-row"):
+                        yield CompleteSelect(
+                            select_id="height-select",
+                            label="Canvas Height",
+                            initial=s.get("canvas_height"),
+                            options=s.get("canvas_height_options"),
+                        )
+                        yield CompleteSelect(
+                            select_id="resampling-select",
+                            label="Resampling",
+                            initial=s.get("resampling_quality"),
+                            options=s.get("resampling_quality_options"),
+                        )
                     yield CompleteSelect(
                         select_id="ratio-select",
                         label="Aspect Ratio",
@@ -144,10 +176,55 @@ class HomeScreen(Screen[dict]):
             self.query_one(input_id, CompleteInput).validators.append(img_pad_validator)
         self.query_one("#img-pad-uniform", CompleteInput).validators.append(img_pad_validator)
         self._update_path_display()
-        self._update_padding_inputs()
         current_layout = self.settings.get("layout")
         self._refresh_layout_inputs(current_layout)
+        self._subscribe_to_settings()
+        # Warm up the worker processes in the background, after the first paint
+        self.call_after_refresh(self.worker_pool.start)
         await self._select_all_files()
+        self.run_worker(self._offer_resume, exclusive=True)
+
+    def _ensure_source_index(self) -> SourceIndex:
+        """The app's shared SourceIndex, closed with the app so its connection and log are not left open."""
+        index = getattr(self.app, "source_index", None)
+        if isinstance(index, SourceIndex):
+            return index
+        index = SourceIndex(SourceIndex.default_path())
+        if hasattr(self.app, "call_on_shutdown"):
+            self.app.call_on_shutdown(index.close)
+        # noinspection PyTypeHints
+        self.app.source_index: SourceIndex = index
+        return index
+
+    def on_unmount(self) -> None:
+        for unsubscribe in self._unsubscribers:
+            unsubscribe()
+        self._unsubscribers.clear()
+
+    def _subscribe_to_settings(self) -> None:
+        """Binds each settings-backed widget to its own keys, so only the affected widgets are updated."""
+        s = self.settings
+        self._unsubscribers = [
+            s.subscribe(self.PADDING_INPUTS.keys(), self._padding_settings_changed),
+            s.subscribe(self.SELECTS.keys(), self._select_settings_changed),
+            s.subscribe(self.TOGGLES.keys(), self._toggle_settings_changed),
+        ]
+
+    def _padding_settings_changed(self, changes: list[Settings.Change]) -> None:
+        for change in changes:
+            self.query_one(self.PADDING_INPUTS[change.key], CompleteInput).value = str(change.new)
+
+    def _select_settings_changed(self, changes: list[Settings.Change]) -> None:
+        for change in changes:
+            select = self.query_one(self.SELECTS[change.key], Select)
+            if select.value != change.new:
+                select.value = change.new
+            if change.key == "layout":
+                self._refresh_layout_inputs(change.new)
+
+    def _toggle_settings_changed(self, changes: list[Settings.Change]) -> None:
+        for change in changes:
+            self.query_one(self.TOGGLES[change.key], Toggle).is_active = change.new
 
     def _refresh_layout_inputs(self, layout: str) -> None:
         """Toggles visibility between the grid and the uniform input container."""
@@ -196,12 +273,15 @@ class HomeScreen(Screen[dict]):
                 self.settings.set(setting_key, val)
 
             event.input.value = str(val)
-            self._update_padding_inputs()
 
     @on(Select.Changed, "#bg-select")
     def bg_select_changed(self, event: Select.Changed) -> None:
         self.settings.set("background_color", str(event.value))
 
+    @on(Select.Changed, "#resampling-select")
+    def resampling_select_changed(self, event: Select.Changed) -> None:
+        self.settings.set("resampling_quality", str(event.value))
+
     @on(Select.Changed, "#layout-select")
     def layout_select_changed(self, event: Select.Changed) -> None:
         new_layout = str(event.value)
@@ -241,14 +321,14 @@ class HomeScreen(Screen[dict]):
     @on(SettingsButton.Pressed, "#restore-settings-btn")
     def restore_defaults_button_pressed(self) -> None:
         self.settings.load()
-        self._update_ui_from_preferences()
+        self._restore_selected_dir()
         self.notify("Preferences have been restored.", title="Preferences Restored", severity="information")
 
-    @on(SettingsButton.Pressed, "#reset-defaults-btn")
+    @on(SettingsButton.Pressed, "#reset-settings-btn")
     def reset_defaults_button_pressed(self) -> None:
         self.settings.reset_all()
         self.settings.save()
-        self._update_ui_from_preferences()
+        self._restore_selected_dir()
         self.notify(
             "Preferences have been reset to factory defaults.\n"
             "Click 'Save' to overwrite your settings with these values.",
@@ -345,17 +425,81 @@ class HomeScreen(Screen[dict]):
             "split_wide_images": s.get("split_wide_active"),
             "stack_landscape_images": s.get("stack_landscape_active"),
             "padding": padding,
+            "resampling": s.get("resampling_quality"),
             "output_dir_name": output_dir_name,  # Passed to Toolkit
         }
 
-        payload = Toolkit.prepare_queue(self.selected_files, settings_dict)
-        payload_names = Toolkit.get_queue_names(self.selected_files, settings_dict)
+        # Resolve and validate everything once; workers only ever see the immutable config
+        try:
+            config = RenderConfig.from_settings(settings_dict)
+        except ValueError as e:
+            self.notify(str(e), title="Invalid Settings", severity="error")
+            return
+
+        payload = await asyncio.to_thread(Toolkit.prepare_queue, self.selected_files, config, self.source_index)
+        groups = [paths for paths, _ in payload]
+        payload_names = [Toolkit.payload_name(group) for group in groups]
+        journal = await asyncio.to_thread(BatchJournal.create, self._selected_dir, settings_dict, config, groups)
+
+        await self._run_batch(config, groups, payload_names, journal)
+
+    async def _offer_resume(self) -> None:
+        """Offers to resume the newest unfinished batch of the selected directory, if there is one."""
+        journals = await asyncio.to_thread(BatchJournal.find, self._selected_dir)
+        if not journals:
+            return
+        journal = journals[0]
+        total = len(journal.groups)
+        choice = await self.app.push_screen_wait(
+            ConfirmDialog(
+                "Unfinished Batch",
+                f"A batch into '{journal.output_dir_name}' was interrupted "
+                f"with {total - len(journal.pending)} of {total} items done.\n"
+                f"Resume it, rendering only the remaining items into the same folder?",
+                confirm_label="Resume",
+                deny_label="Discard"
+            )
+        )
+        if choice is True:
+            await self._resume_workflow(journal)
+        elif choice is False:
+            await asyncio.to_thread(journal.discard)
+
+    async def _resume_workflow(self, journal: BatchJournal) -> None:
+        """Re-renders the unfinished items of a journal with the settings it was started with."""
+        try:
+            config = RenderConfig.from_settings(journal.settings)
+        except ValueError as e:
+            self.notify(str(e), title="Cannot Resume", severity="error")
+            return
+        if config.fingerprint != journal.fingerprint:
+            self.notify(
+                "The batch was started by a version with different settings.",
+                title="Cannot Resume",
+                severity="error"
+            )
+            return
+
+        groups = journal.resume()
+        await self._run_batch(config, groups, [Toolkit.payload_name(group) for group in groups], journal)
+
+    async def _run_batch(
+            self,
+            config: RenderConfig,
+            groups: Sequence[Sequence[str]],
+            payload_names: list[str],
+            journal: BatchJournal | None
+    ) -> None:
+        """Runs the loading screen over the payloads, then shows the done screen."""
+        output_dir_name = config.output_dir_name
+        payload = [(list(paths), config) for paths in groups]
 
         data = ScreenData(
             source="home",
             payload=payload,
             payload_names=payload_names,
             function=Toolkit.process_image,
+            runner=ProcessBatch(groups, config, pool=self.worker_pool, journal=journal, index=self.source_index),
         )
 
         status, results = await self.app.push_screen_wait(
@@ -389,19 +533,11 @@ class HomeScreen(Screen[dict]):
             )
         )
 
-    def _update_padding_inputs(self) -> None:
-        """Updates padding input values by reading directly from settings."""
-        s = self.settings
-        self.query_one("#pad-left", CompleteInput).value = str(s.get("img_pad_left"))
-        self.query_one("#pad-right", CompleteInput).value = str(s.get("img_pad_right"))
-        self.query_one("#pad-top", CompleteInput).value = str(s.get("img_pad_top"))
-        self.query_one("#pad-bottom", CompleteInput).value = str(s.get("img_pad_bottom"))
-        self.query_one("#img-pad-uniform", CompleteInput).value = str(s.get("img_pad_uniform"))
-
     async def _select_files_worker(self) -> None:
         """A screen-level worker that pushes a file select dialog and updates the UI."""
         all_matching_files = await asyncio.to_thread(self._get_all_files_in_dir_blocking)
-        files = list(map(self._file_path_to_tuple, all_matching_files))
+        selected = set(self.selected_files)
+        files = [self._file_path_to_tuple(path, selected) for path in all_matching_files]
 
         if not files:
             self.notify(
@@ -432,18 +568,14 @@ class HomeScreen(Screen[dict]):
                 self._selected_dir = new_path
                 self._update_path_display()
         await self._select_all_files()
+        await self._offer_resume()
 
-    def _update_ui_from_preferences(self) -> None:
-        """Pulls all values from self.settings and updates the UI widgets."""
-        s = self.settings
-        self._selected_dir = Path(s.get("start_dir"))
-        self._update_path_display()
-        self._update_padding_inputs()
-        bg_select = self.query_one("#bg-select", Select)
-        bg_select.set_options(s.get("background_color_options"))
-        bg_select.value = s.get("background_color")
-        self.query_one("#split-wide-toggle", Toggle).is_active = s.get("split_wide_active")
-        self.query_one("#stack-landscape-toggle", Toggle).is_active = s.get("stack_landscape_active")
+    def _restore_selected_dir(self) -> None:
+        """Moves back to the saved start directory. Widgets follow the settings through their subscriptions."""
+        new_dir = Path(self.settings.get("start_dir"))
+        if new_dir != self._selected_dir:
+            self._selected_dir = new_dir
+            self._update_path_display()
 
     def _update_path_display(self) -> None:
         """Updates the PathButton label from the internal _selected_dir state."""
@@ -451,17 +583,19 @@ class HomeScreen(Screen[dict]):
         path = self._selected_dir.as_posix()
         path_btn.label = path
 
-    def _file_path_to_tuple(self, path: Path) -> tuple[str, str, bool]:
+    @staticmethod
+    def _file_path_to_tuple(path: Path, selected: set[str]) -> tuple[str, str, bool]:
         """Formats a Path object into a tuple for the ListSelectDialog."""
         path_str = path.as_posix()
-        is_selected = path_str in set(self.selected_files)
-        return path.name, path_str, is_selected
+        return path.name, path_str, path_str in selected
 
     async def _select_all_files(self) -> None:
         """Sets the file mode to 'all' and populates selected_files with all valid files."""
         self.file_mode = "all"
         all_files = await asyncio.to_thread(self._get_all_files_in_dir_blocking)
         self.selected_files = [path.as_posix() for path in all_files]
+        # Probe the folder while the settings are being chosen, so starting the batch is instant
+        self.source_index.warm(self.selected_files)
         self.query_one("#file-mode-palette", ChoicePalette).select(0)
 
     def _select_individual_files(self) -> None:
@@ -1,6 +1,6 @@
 import json
 from importlib import resources
-from typing import Any
+from typing import Any, Callable
 
 from textual import work
 from textual.app import App
@@ -142,6 +142,7 @@ class NeonApp(App[Any]):
         self.too_small_modal_open = False
         self.SCREENS.update({"too_small": TooSmallScreen})
         self.state_machine = StateMachine(app=self)
+        self._shutdown_callbacks: list[Callable[[], Any]] = []
         # Overrides the default toggle button inner icon for more clarity
         ToggleButton.BUTTON_INNER = "●"
 
@@ -170,6 +171,22 @@ class NeonApp(App[Any]):
         """
         pass
 
+    def call_on_shutdown(self, callback: Callable[[], Any]) -> None:
+        """
+        Registers a callback to run when the app shuts down, e.g. to stop background processes.
+        Callbacks run in reverse order of registration.
+        """
+        self._shutdown_callbacks.append(callback)
+
+    def on_unmount(self) -> None:
+        """Runs the registered shutdown callbacks."""
+        for callback in reversed(self._shutdown_callbacks):
+            try:
+                callback()
+            except Exception as e:
+                print(f"[NeonApp] Shutdown callback failed: {e}")
+        self._shutdown_callbacks.clear()
+
     async def on_mount(self) -> None:
         """Handles the initial size check on app startup."""
         width, height = self.size
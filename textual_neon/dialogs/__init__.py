@@ -2,9 +2,10 @@
 A textual_neon package containing elements based on the Dialog class from `textual_fspicker`.
 """
 
+from .confirm import ConfirmDialog
 from .dir_select import DirSelectDialog
 from .file_select import FileSelectDialog
 from .list_select import ListSelectDialog
 from .neon_dialog import NeonDialog
 
-__all__ = ["DirSelectDialog", "FileSelectDialog", "ListSelectDialog", "NeonDialog"]
\ No newline at end of file
+__all__ = ["ConfirmDialog", "DirSelectDialog", "FileSelectDialog", "ListSelectDialog", "NeonDialog"]
\ No newline at end of file
@@ -0,0 +1,84 @@
+from textual import on
+from textual.app import ComposeResult
+from textual.containers import Horizontal
+from textual_fspicker.base_dialog import Dialog
+
+from textual_neon.dialogs.neon_dialog import NeonDialog
+from textual_neon.widgets.inert_label import InertLabel
+from textual_neon.widgets.neon_button import NeonButton
+
+
+class ConfirmDialog(NeonDialog):
+    """
+    A small modal dialog asking a question with two answers.
+
+    Returns True when the confirm button is pressed, False for the other answer,
+    or None if closed (escape), so callers can tell "no" from "not now".
+
+    Usage:
+    ::
+        choice = await self.app.push_screen_wait(
+            ConfirmDialog("Unfinished Batch", "Resume it?", confirm_label="Resume", deny_label="Discard")
+        )
+    """
+    DEFAULT_CSS = """
+    ConfirmDialog {
+
+        & > Dialog {
+            layout: vertical;
+            width: 70;
+            height: auto;
+            max-width: 90%;
+        }
+
+        & InertLabel#message {
+            width: 100%;
+            margin: 1 2 1 2;
+        }
+
+        & Horizontal#dialog-buttons {
+            align: right bottom;
+            height: auto;
+            width: 100%;
+            padding: 0 1 0 1;
+
+            & > NeonButton {
+                margin: 0 1 0 1;
+                width: auto;
+            }
+        }
+    }
+    """
+
+    def __init__(
+            self,
+            title: str,
+            message: str,
+            *,
+            confirm_label: str = "Confirm",
+            deny_label: str = "Cancel"
+    ) -> None:
+        super().__init__(title=title)
+        self._message = message
+        self._confirm_label = confirm_label
+        self._deny_label = deny_label
+
+    def compose(self) -> ComposeResult:
+        dialog = Dialog(id="dialog")
+        dialog.border_title = self._title
+        with dialog:
+            yield InertLabel(self._message, id="message")
+            with Horizontal(id="dialog-buttons"):
+                yield NeonButton(self._confirm_label, variant="primary", id="confirm")
+                yield NeonButton(self._deny_label, variant="primary", id="deny")
+
+    def on_mount(self) -> None:
+        self.query_one("#confirm", NeonButton).focus()
+
+    @on(NeonButton.Pressed, "#confirm")
+    def confirm_button_pressed(self) -> None:
+        self.dismiss(True)
+
+    @on(NeonButton.Pressed, "#deny")
+    def deny_button_pressed(self) -> None:
+        self.dismiss(False)
@@ -1,64 +1,82 @@
-from typing import Any, Iterable, Tuple
+from typing import Iterable
 
 from textual import on
 from textual.app import ComposeResult
 from textual.containers import Horizontal
-from textual.widgets import SelectionList
+from textual.widgets import Input
 from textual_fspicker.base_dialog import Dialog
 
+from textual_neon.utils.selection_index import SelectionIndex, SelectionItem
+from textual_neon.widgets.inert_label import InertLabel
 from textual_neon.widgets.minimal_button import MinimalButton
 from textual_neon.dialogs.neon_dialog import NeonDialog
 from textual_neon.widgets.neon_button import NeonButton
-
-SelectionItem = Tuple[str, Any] | Tuple[str, Any, bool]
+from textual_neon.widgets.neon_input import NeonInput
+from textual_neon.widgets.virtual_selection_list import VirtualSelectionList
 
 
 class ListSelectDialog(NeonDialog):
     """
     A modal dialog for selecting one or more items from a list.
+    Backed by a SelectionIndex and a virtualized list, so it opens and filters instantly
+    even for tens of thousands of items.
+
+    The filter accepts a substring or a glob (e.g. '*.png'). 'Select All' and 'Select None'
+    apply to the filtered items only, which doubles as select-by-pattern.
+    Shift+arrows and shift+click select ranges.
 
-    Returns the list of selected values when "Select" is pressed,
+    Returns the list of selected values (in their original order) when "Confirm" is pressed,
     or None if closed.
     """
     DEFAULT_CSS = """
     ListSelectDialog {
-        
+
         & > Dialog {
             layout: vertical;
-            width: auto;
-            height: auto;
+            width: 80%;
+            height: 80%;
             max-width: 80%;
             max-height: 80%;
         }
-    
-        & SelectionList {
+
+        & VirtualSelectionList {
             border: round $foreground 70%;
             margin: 0;
             padding: 0;
-            width: auto;
-            height: auto;
+            width: 100%;
+            height: 1fr;
             min-width: 50;
-            min-height: 20;
-            
+            min-height: 10;
+
             &:focus, &:hover, &:focus-within {
                 border: round $foreground;
             }
         }
-        
+
+        & NeonInput#filter {
+            margin: 1 0 0 0;
+        }
+
         & Horizontal#selection-buttons {
-            dock: top;
-            width: auto;
+            width: 100%;
             height: auto;
             margin: 1 0 0 0;
+
+            & > InertLabel#count {
+                width: 1fr;
+                text-align: right;
+                color: $foreground 70%;
+                margin: 0 1 0 0;
+            }
         }
-    
+
         & Horizontal#dialog-buttons {
             dock: bottom;
             align: right bottom;
             height: auto;
             width: 100%;
             padding: 0 1 0 1;
-            
+
             & > NeonButton {
                 margin: 0 1 0 1;
                 width: auto;
@@ -67,12 +85,9 @@ class ListSelectDialog(NeonDialog):
     }
     """
 
-    def __init__(self, title: str, items: Iterable[SelectionItem]) -> None:
+    def __init__(self, title: str, items: Iterable[SelectionItem] | SelectionIndex) -> None:
         super().__init__(title=title)
-        self._items = items
-        self._initial_selection = [
-            item for item in items if len(item) > 2 and item[2]
-        ]
+        self._index = items if isinstance(items, SelectionIndex) else SelectionIndex(items)
 
     def compose(self) -> ComposeResult:
         """Create the dialog's widgets."""
@@ -82,25 +97,56 @@ class ListSelectDialog(NeonDialog):
             with Horizontal(id="selection-buttons"):
                 yield MinimalButton("Select All", variant="primary", id="all")
                 yield MinimalButton("Select None", variant="primary", id="none")
-            yield SelectionList(*self._items, id="list")
+                yield InertLabel(self._count_text(), id="count")
+            yield NeonInput(placeholder="Filter (text or glob, e.g. *.png)", id="filter")
+            yield VirtualSelectionList(self._index, id="list")
             with Horizontal(id="dialog-buttons"):
                 yield NeonButton("Confirm", variant="primary", id="confirm")
                 yield NeonButton("Cancel", variant="primary", id="cancel")
 
+    def on_mount(self) -> None:
+        self.query_one(VirtualSelectionList).focus()
+
+    def _count_text(self) -> str:
+        index = self._index
+        shown = len(index.view)
+        text = f"{index.selected_count} of {len(index)} selected"
+        if shown != len(index):
+            text += f" ({shown} shown)"
+        return text
+
+    def _refresh_count(self) -> None:
+        self.query_one("#count", InertLabel).update(self._count_text())
+
+    @on(Input.Changed, "#filter")
+    def filter_changed(self, event: Input.Changed) -> None:
+        event.stop()
+        self.query_one(VirtualSelectionList).apply_filter(event.value.strip())
+        self._refresh_count()
+
+    @on(Input.Submitted, "#filter")
+    def filter_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        self.query_one(VirtualSelectionList).focus()
+
+    @on(VirtualSelectionList.Changed)
+    def selection_changed(self, event: VirtualSelectionList.Changed) -> None:
+        event.stop()
+        self._refresh_count()
+
     @on(NeonButton.Pressed, "#all")
     def select_all_button_pressed(self) -> None:
-        selection_list = self.query_one(SelectionList)
-        selection_list.select_all()
+        self._index.select_view()
+        self.query_one(VirtualSelectionList).notify_changed()
 
     @on(NeonButton.Pressed, "#none")
     def select_none_button_pressed(self) -> None:
-        selection_list = self.query_one(SelectionList)
-        selection_list.deselect_all()
+        self._index.deselect_view()
+        self.query_one(VirtualSelectionList).notify_changed()
 
     @on(NeonButton.Pressed, "#confirm")
     def confirm_button_pressed(self) -> None:
-        selection_list = self.query_one(SelectionList)
-        self.dismiss(selection_list.selected)
+        self.dismiss(self._index.selected_values())
 
     @on(NeonButton.Pressed, "#cancel")
     def cancel_button_pressed(self) -> None:
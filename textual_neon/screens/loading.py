@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import inspect
 from typing import Any, Literal
 
@@ -9,6 +10,7 @@ from textual.css.query import NoMatches
 from textual.screen import Screen
 from textual.widgets import Digits, ProgressBar, LoadingIndicator
 
+from textual_neon.utils.batch_runner import BatchRunner
 from textual_neon.utils.errors import Errors
 from textual_neon.utils.screen_data import ScreenData
 from textual_neon.widgets.inert_label import InertLabel
@@ -21,6 +23,9 @@ class LoadingScreen(Screen):
     """
     A loading screen displaying progress and logs, centered on the screen.
     Uses the Digits, ProgressBar, LoadingIndicator, and NeonLog widgets.
+
+    Items are processed one by one with ScreenData.function, unless ScreenData.runner is set,
+    in which case the BatchRunner's results are consumed as they arrive (in any order).
     """
     DEFAULT_CSS = """
     LoadingScreen {
@@ -80,6 +85,14 @@ class LoadingScreen(Screen):
                     }
                 }
             }
+            InertLabel#runner-status {
+                display: none;
+                width: 100%;
+                margin: -1 0 1 0;
+                padding: 0 1 0 1;
+                color: $foreground 60%;
+                text-align: center;
+            }
             LoadingIndicator {
                 width: 100%;
                 height: 1fr;
@@ -135,6 +148,7 @@ class LoadingScreen(Screen):
         self._items = data.payload
         self._names = data.payload_names
         self._function = data.function
+        self._runner: BatchRunner | None = data.runner
         self._title = title
         self._total = len(self._items)
         self._justified_digits: int = len(str(self._total))
@@ -171,6 +185,7 @@ class LoadingScreen(Screen):
                 yield InertLabel("  ╱\n ╱ \n╱  ", id="out-of")
                 yield Digits(f"{self._total}".rjust(self._justified_digits, '0'), id="total")
             yield ProgressBar(self._total, show_bar=True, show_percentage=False, show_eta=False)
+            yield InertLabel("", id="runner-status")
             yield LoadingIndicator()
             yield NeonLog(show_clear_button=self.show_clear_button, id="log")
         with Horizontal():
@@ -211,14 +226,23 @@ class LoadingScreen(Screen):
         if self._progress_bar:
             self._progress_bar.add_class("-stopped")
 
-        self._is_cancelled = True
+        self._cancel_processing()
 
     @on(NeonButton.Pressed, "#cancel")
     def cancel_button_pressed(self) -> None:
         """Handle cancel button press. Always dismisses with a 'cancel' status and no data."""
-        self._is_cancelled = True
+        self._cancel_processing()
         self.dismiss(("cancel", None))
 
+    def on_unmount(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+
+    def _cancel_processing(self) -> None:
+        self._is_cancelled = True
+        if self._runner is not None:
+            self._runner.cancel()
+
     @on(NeonButton.Pressed, "#continue")
     def continue_button_pressed(self) -> None:
         """Handle the continued button press. Dismisses with 'continue' and the processed data."""
@@ -243,6 +267,10 @@ class LoadingScreen(Screen):
         ] = "continue"
 
         try:
+            if self._runner is not None:
+                self._finalize_processing(await self._process_with_runner())
+                return
+
             is_async_func = inspect.iscoroutinefunction(self._function)
             for i, item in enumerate(self._items):
                 if self._is_cancelled:
@@ -307,40 +335,118 @@ class LoadingScreen(Screen):
                 result = await self._function(item)
             else:
                 result = await asyncio.to_thread(self._function, item)
+        except Exception as e:
+            return self._record_outcome(item_name, e)
+        return self._record_outcome(item_name, result)
 
-            if self._is_cancelled:
-                return "stop_cancelled"
+    async def _process_with_runner(
+            self
+    ) -> Literal["continue", "stop_processing_error", "stop_unexpected_error", "stop_cancelled"]:
+        """
+        Consumes the BatchRunner's results, in whatever order and batch size they arrive.
+        The progress display is polled from the runner, so it stays live between batches.
+        """
+        action: Literal[
+            "continue", "stop_processing_error", "stop_unexpected_error", "stop_cancelled"
+        ] = "continue"
+        timer = self.set_interval(0.25, self._poll_runner)
+        try:
+            async with contextlib.aclosing(self._runner.results()) as batches:
+                async for batch in batches:
+                    for index, outcome in batch:
+                        item_name = self._names[index][:50]
+                        action = self._record_outcome(item_name, outcome)
+                        if action != "continue":
+                            break
+                        if outcome is not False and not isinstance(outcome, Exception):
+                            self._log.write_line(f"Processed [{self._n_processed}/{self._total}]: {item_name}")
+                    if action != "continue":
+                        break
+                    self._show_progress(self._runner_progress)
+        finally:
+            timer.stop()
+            self._runner.cancel()
+
+        if action == "continue" and self._is_cancelled:
+            action = "stop_cancelled"
+        return action
+
+    @property
+    def _n_processed(self) -> int:
+        return self._n_successes + self._n_failed + self._n_duplicates
+
+    @property
+    def _runner_progress(self) -> int:
+        """
+        The one count the progress display follows with a runner: its live count, which runs ahead
+        of the results received so far, but never behind them.
+        """
+        return max(self._runner.completed, self._n_processed)
 
-            if result is False:
-                self._n_failed += 1
-                self._log.write_line(f"VALIDATION FAILED: {item_name} (Skipping)")
-            else:
-                self._n_successes += 1
-                self._results.append(result)
+    def _poll_runner(self) -> None:
+        """Shows the runner's live progress and, if it has one, its status line."""
+        self._show_progress(self._runner_progress)
+        status = self._runner.status
+        if status is None:
+            return
+        try:
+            label = self.query_one("#runner-status", InertLabel)
+            label.update(status)
+            label.display = True
+        except NoMatches:
+            pass
+
+    def _show_progress(self, completed: int) -> None:
+        """Updates the progress bar and the current-item digits to an absolute count."""
+        try:
+            if self._progress_bar:
+                self._progress_bar.update(progress=completed)
+            if self._current_digits:
+                self._current_digits.update(f"{completed}".rjust(self._justified_digits, '0'))
+        except NoMatches:
+            pass
+
+    def _record_outcome(
+            self, item_name: str, outcome: Any
+    ) -> Literal["continue", "stop_processing_error", "stop_unexpected_error", "stop_cancelled"]:
+        """
+        Classifies a single item's result (or the exception it raised), logs it and updates the counts.
+
+        Args:
+            item_name: The display name of the item for logging.
+            outcome: The function's return value, or the exception it raised.
+
+        Returns:
+            A string literal indicating the processing outcome.
+        """
+        if self._is_cancelled:
+            return "stop_cancelled"
 
-        except Errors.DuplicateError as e:
-            if self._is_cancelled:
-                return "stop_cancelled"
+        if isinstance(outcome, Errors.DuplicateError):
             self._n_duplicates += 1
-            log_msg = f"DUPLICATE FOUND: {item_name}. {e}"
+            log_msg = f"DUPLICATE FOUND: {item_name}. {outcome}"
             self._log.write_line(f"{log_msg} Skipping, first instance kept.")
 
-        except Errors.ProcessingError as e:
-            if self._is_cancelled:
-                return "stop_cancelled"
+        elif isinstance(outcome, Errors.ProcessingError):
             self._n_failed += 1
-            self._log.write_line(f"\nPROCESSING ERROR: {item_name} - {e}")
+            self._log.write_line(f"\nPROCESSING ERROR: {item_name} - {outcome}")
             return "stop_processing_error"
 
-        except Exception as e:
-            if self._is_cancelled:
-                return "stop_cancelled"
-            if "NoMatches" in str(e):
+        elif isinstance(outcome, Exception):
+            if "NoMatches" in str(outcome):
                 return "stop_unexpected_error"
             self._n_failed += 1
-            self._log.write_line(f"\nUNEXPECTED ERROR: {item_name} - {e}")
+            self._log.write_line(f"\nUNEXPECTED ERROR: {item_name} - {outcome}")
             return "stop_unexpected_error"
 
+        elif outcome is False:
+            self._n_failed += 1
+            self._log.write_line(f"VALIDATION FAILED: {item_name} (Skipping)")
+
+        else:
+            self._n_successes += 1
+            self._results.append(outcome)
+
         return "continue"
 
     def _finalize_processing(
@@ -397,6 +503,9 @@ class LoadingScreen(Screen):
         self._log.write_line(
             f"Successes: {self._n_successes}, Duplicates: {self._n_duplicates}, Failed: {self._n_failed}"
         )
+        summary = self._runner.summary if self._runner is not None else None
+        if summary is not None:
+            self._log.write_line(summary)
 
         if self._success:
             self._continue_button.visible = True
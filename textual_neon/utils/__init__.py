@@ -3,9 +3,12 @@ A textual_neon package containing single-file utilities.
 """
 
 from .ascii_painter import AsciiPainter
+from .batch_runner import BatchRunner, BatchResult
 from .errors import Errors
+from .log_spill import LogSpill
 from .settings import Settings
 from .paths import Paths
 from .screen_data import ScreenData
+from .selection_index import SelectionIndex, SelectionItem
 
-__all__ = ["AsciiPainter", "Errors", "Settings", "Paths", "ScreenData"]
\ No newline at end of file
+__all__ = ["AsciiPainter", "BatchRunner", "BatchResult", "Errors", "LogSpill", "Settings", "Paths", "ScreenData", "SelectionIndex", "SelectionItem"]
\ No newline at end of file
@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, List, Tuple
+
+BatchResult = Tuple[int, Any]
+
+
+class BatchRunner(ABC):
+    """
+    A pluggable executor for the LoadingScreen.
+    Instead of calling ScreenData.function item by item, the LoadingScreen iterates the runner's
+    results, which may arrive in batches and out of order (e.g. from a process pool).
+
+    - 'results' yields lists of (index, outcome), where the index points into ScreenData.payload
+      and the outcome is the function's return value or the exception it raised.
+    - 'completed' may run ahead of the yielded results (e.g. a shared progress counter),
+      the LoadingScreen polls it to keep the progress display live between batches.
+    - 'cancel' asks the runner to stop handing out new work.
+    - 'status' is an optional one-line description of what the runner is doing (e.g. its concurrency),
+      shown under the progress bar.
+    - 'summary' is an optional line about the whole run (e.g. how many items were retried),
+      written to the log once the batch is over.
+
+    Usage:
+    ::
+        ScreenData(
+            source="home",
+            payload=payload,
+            payload_names=names,
+            function=process_one,
+            runner=MyPoolRunner(payload),
+        )
+    """
+
+    @property
+    @abstractmethod
+    def completed(self) -> int:
+        """The number of items finished so far."""
+
+    @abstractmethod
+    def results(self) -> AsyncIterator[List[BatchResult]]:
+        """Runs the batch, yielding lists of (index, outcome) as they finish."""
+
+    @abstractmethod
+    def cancel(self) -> None:
+        """Stops handing out new work. Results already in flight may still be yielded."""
+
+    @property
+    def status(self) -> str | None:
+        """An optional one-line status, polled together with 'completed'."""
+        return None
+
+    @property
+    def summary(self) -> str | None:
+        """An optional one-line summary, read when the batch is over."""
+        return None
@@ -0,0 +1,157 @@
+import itertools
+import os
+import queue
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+class LogSpill:
+    """
+    An append-only, size-rotated text file that is written from a background thread.
+    Used by log widgets to move lines out of memory without ever blocking the event loop.
+
+    - 'append' only queues the lines; a daemon thread writes them in batches.
+    - When the active file exceeds 'max_bytes', it is rotated to '<name>.1' ... '<name>.<backups>'
+      and the oldest backup is dropped, so disk usage is bounded as well.
+    - 'iter_lines' streams everything still on disk, oldest first. It blocks until all queued
+      lines are written, so only call it off the UI thread (e.g. via asyncio.to_thread).
+
+    Usage:
+    ::
+        spill = LogSpill(LogSpill.default_path("loading-log"))
+        spill.append(["evicted line 1", "evicted line 2"])
+        ...
+        text = await asyncio.to_thread(lambda: "\\n".join(spill.iter_lines()))
+        ...
+        spill.close(delete=True)
+    """
+    DEFAULT_DIR = Path(tempfile.gettempdir()) / "textual_neon"
+
+    _CLEAR = object()
+    _CLOSE = object()
+    _counter = itertools.count(1)
+
+    @staticmethod
+    def default_path(name: str) -> Path:
+        """Returns a per-process spill file path in the default temp directory."""
+        return LogSpill.DEFAULT_DIR / f"{name}-{os.getpid()}-{next(LogSpill._counter)}.log"
+
+    def __init__(self, path: Path, *, max_bytes: int = 8 * 1024 * 1024, backups: int = 3) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = max(0, backups)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def append(self, lines: Iterable[str]) -> None:
+        """Queues lines to be appended to the file. Never blocks on disk."""
+        lines = list(lines)
+        if not lines or self._closed:
+            return
+        self._ensure_thread()
+        self._queue.put(lines)
+
+    def clear(self) -> None:
+        """Queues the removal of the file and all its backups."""
+        if self._thread is not None:
+            self._queue.put(self._CLEAR)
+
+    def flush(self) -> None:
+        """Blocks until every queued line has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yields all spilled lines still on disk, from the oldest backup to the active file."""
+        self.flush()
+        for file_path in [*reversed(self._backup_paths()), self.path]:
+            try:
+                with file_path.open("r", encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        yield line.rstrip("\n")
+            except FileNotFoundError:
+                continue
+
+    def close(self, *, delete: bool = False) -> None:
+        """Writes out pending lines, stops the writer thread and optionally deletes the files."""
+        if self._closed:
+            return
+        if delete:
+            self.clear()
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(self._CLOSE)
+
+    def _backup_paths(self) -> list[Path]:
+        return [self.path.with_name(f"{self.path.name}.{i}") for i in range(1, self.backups + 1)]
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._writer_loop, name=f"log-spill:{self.path.name}", daemon=True
+                )
+                self._thread.start()
+
+    def _writer_loop(self) -> None:
+        """Drains the queue in batches, so bursts turn into a few large writes."""
+        handle = None
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    for entry in batch:
+                        if entry is self._CLOSE:
+                            return
+                        if entry is self._CLEAR:
+                            if handle:
+                                handle.close()
+                                handle = None
+                            self._remove_files()
+                            continue
+                        handle = self._write(handle, "".join(f"{line}\n" for line in entry))
+                    if handle:
+                        handle.flush()
+                except OSError as e:
+                    print(f"[LogSpill] Error writing to '{self.path}': {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            if handle:
+                handle.close()
+
+    def _write(self, handle, data: str):
+        if handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            handle = self.path.open("a", encoding="utf-8")
+        if handle.tell() and handle.tell() + len(data) > self.max_bytes:
+            handle.close()
+            self._rotate()
+            handle = self.path.open("a", encoding="utf-8")
+        handle.write(data)
+        return handle
+
+    def _rotate(self) -> None:
+        backups = self._backup_paths()
+        if not backups:
+            self.path.unlink(missing_ok=True)
+            return
+        backups[-1].unlink(missing_ok=True)
+        for older, newer in zip(reversed(backups), reversed([self.path, *backups[:-1]])):
+            if newer.exists():
+                os.replace(newer, older)
+
+    def _remove_files(self) -> None:
+        for file_path in [self.path, *self._backup_paths()]:
+            file_path.unlink(missing_ok=True)
@@ -1,5 +1,7 @@
 from typing import NamedTuple, Callable, Any, List, Set, Tuple, Awaitable
 
+from textual_neon.utils.batch_runner import BatchRunner
+
 
 class ScreenData(NamedTuple):
     # noinspection GrazieInspection
@@ -7,6 +9,8 @@ class ScreenData(NamedTuple):
         A named tuple defining the data passed between screens.
         Stores the source screen's name, the payload, optional names for the items in the payload and
         a function to process the payload to aggregate iterative results for the next screen (if applicable).
+        An optional BatchRunner replaces the item-by-item function calls of the LoadingScreen
+        (e.g. to process the payload in a process pool).
 
         Usage:
         ::
@@ -29,4 +33,5 @@ class ScreenData(NamedTuple):
     source: str
     payload: List[Any] | Set[Any] | Tuple[Any, ...] | None
     payload_names: list[str] | None = None
-    function: Callable[[Any], bool | Awaitable[bool]] | None = None
\ No newline at end of file
+    function: Callable[[Any], bool | Awaitable[bool]] | None = None
+    runner: BatchRunner | None = None
\ No newline at end of file
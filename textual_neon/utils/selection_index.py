@@ -0,0 +1,149 @@
+import re
+from fnmatch import translate
+from typing import Any, Iterable, Tuple
+
+SelectionItem = Tuple[str, Any] | Tuple[str, Any, bool]
+
+GLOB_CHARS = frozenset("*?[")
+
+
+class SelectionIndex:
+    """
+    An index over a flat list of selectable items, built once and then only queried.
+
+    - Items are stored in parallel lists (labels, values, casefolded labels) addressed by position.
+    - The selection is a set of positions, so toggling and counting never walk the item list.
+    - The 'view' is the list of positions matching the current filter. Filters are plain
+      substrings or globs (any of '*?['). Extending a substring filter only re-filters the
+      current view instead of the whole index.
+
+    Usage:
+    ::
+        index = SelectionIndex([("a.jpg", "/pics/a.jpg", True), ("b.png", "/pics/b.png")])
+        index.set_filter("*.png")
+        index.select_view()
+        index.selected_values()  # ["/pics/a.jpg", "/pics/b.png"]
+    """
+
+    def __init__(self, items: Iterable[SelectionItem]) -> None:
+        self._labels: list[str] = []
+        self._values: list[Any] = []
+        self._folded: list[str] = []
+        self._selected: set[int] = set()
+
+        for pos, item in enumerate(items):
+            label = str(item[0])
+            self._labels.append(label)
+            self._values.append(item[1])
+            self._folded.append(label.casefold())
+            if len(item) > 2 and item[2]:
+                self._selected.add(pos)
+
+        self._query: str = ""
+        self._view: list[int] = list(range(len(self._labels)))
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    @property
+    def query(self) -> str:
+        """The currently applied filter query."""
+        return self._query
+
+    @property
+    def view(self) -> list[int]:
+        """Positions of the items matching the current filter, in original order."""
+        return self._view
+
+    @property
+    def selected_count(self) -> int:
+        """The number of selected items, including those hidden by the filter."""
+        return len(self._selected)
+
+    def label(self, pos: int) -> str:
+        return self._labels[pos]
+
+    def value(self, pos: int) -> Any:
+        return self._values[pos]
+
+    def is_selected(self, pos: int) -> bool:
+        return pos in self._selected
+
+    @staticmethod
+    def is_glob(query: str) -> bool:
+        """Returns True if the query should be treated as a glob pattern."""
+        return any(char in GLOB_CHARS for char in query)
+
+    def matching(self, query: str, *, within: Iterable[int] | None = None) -> list[int]:
+        """
+        Returns the positions whose labels match the query (case-insensitive).
+        An empty query matches everything.
+        """
+        candidates = range(len(self._labels)) if within is None else within
+        if not query:
+            return list(candidates)
+
+        folded = self._folded
+        needle = query.casefold()
+        if self.is_glob(needle):
+            match = re.compile(translate(needle)).match
+            return [pos for pos in candidates if match(folded[pos])]
+        return [pos for pos in candidates if needle in folded[pos]]
+
+    def set_filter(self, query: str) -> list[int]:
+        """
+        Applies a new filter and returns the new view.
+        Narrowing a plain substring query re-filters only the current view.
+        """
+        previous = self._query
+        if query == previous:
+            return self._view
+
+        narrowing = (
+                previous
+                and query.startswith(previous)
+                and not self.is_glob(previous)
+                and not self.is_glob(query)
+        )
+        self._view = self.matching(query, within=self._view if narrowing else None)
+        self._query = query
+        return self._view
+
+    def toggle(self, pos: int) -> bool:
+        """Toggles a single item and returns its new state."""
+        if pos in self._selected:
+            self._selected.discard(pos)
+            return False
+        self._selected.add(pos)
+        return True
+
+    def set_selected(self, positions: Iterable[int], selected: bool = True) -> None:
+        """Selects or deselects all given positions."""
+        if selected:
+            self._selected.update(positions)
+        else:
+            self._selected.difference_update(positions)
+
+    def select_range(self, start: int, end: int, selected: bool = True) -> None:
+        """Selects or deselects an inclusive range of rows in the current view."""
+        low, high = sorted((start, end))
+        self.set_selected(self._view[max(0, low):high + 1], selected)
+
+    def select_view(self) -> None:
+        """Selects every item matching the current filter."""
+        self.set_selected(self._view, True)
+
+    def deselect_view(self) -> None:
+        """Deselects every item matching the current filter."""
+        self.set_selected(self._view, False)
+
+    def select_matching(self, query: str, selected: bool = True) -> int:
+        """Selects or deselects every item matching a query, independent of the view."""
+        positions = self.matching(query)
+        self.set_selected(positions, selected)
+        return len(positions)
+
+    def selected_values(self) -> list[Any]:
+        """Returns the values of all selected items, in their original order."""
+        values = self._values
+        return [values[pos] for pos in sorted(self._selected)]
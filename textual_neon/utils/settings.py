@@ -1,13 +1,21 @@
+import atexit
 import functools
 import inspect
 import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Callable
+from typing import Any, Dict, Callable, Iterable, Iterator, NamedTuple
 
 from textual.app import App
 
 from textual_neon.utils.paths import Paths
 
+_MISSING = object()
+
 
 class Settings:
     """
@@ -17,9 +25,21 @@ class Settings:
     - 'Settings' holds the user's saved settings, which are loaded from and saved
       to a JSON config file using 'load', 'set' and 'save'.
     - 'Get' operations prioritize settings before falling back to the registry.
+    - 'save' never touches the disk on the calling thread. It snapshots the settings and hands them
+      to a background writer, which waits 'save_delay' seconds for further saves and then writes
+      only the newest snapshot (temp file, fsync, atomic rename). Use 'flush' to wait for the write.
+    - Consumers 'subscribe' to the keys they depend on and are called only when the effective value
+      of one of those keys changes (via set, reset, reset_all, load or unregister_default).
+      Changes made inside a 'transaction' are merged and delivered once, when it ends.
     """
     DEFAULT_PREFS_DIR = Paths.app_base_dir() / "settings"
 
+    class Change(NamedTuple):
+        """A change of a setting's effective value, delivered to subscribers."""
+        key: str
+        old: Any
+        new: Any
+
     @staticmethod
     def ensure(*, app: "App") -> "Settings":
         """
@@ -72,11 +92,144 @@ class Settings:
         app.settings = Settings(config_dir=Settings.DEFAULT_PREFS_DIR)
         return app.settings
 
-    def __init__(self, config_dir: Path = DEFAULT_PREFS_DIR, config_file: str = "settings.json"):
+    def __init__(
+            self,
+            config_dir: Path = DEFAULT_PREFS_DIR,
+            config_file: str = "settings.json",
+            *,
+            save_delay: float = 0.5,
+    ):
         self.config_file: Path = config_dir / config_file
+        self.save_delay = save_delay
         self._registry: Dict[str, Any] = {}
         self._user_prefs: Dict[str, Any] = {}
 
+        self._save_cond = threading.Condition()
+        self._pending_save: str | None = None
+        self._save_deadline = 0.0
+        self._flush_requested = False
+        # The snapshot being written, until it is renamed into place
+        self._writing_snapshot: str | None = None
+        self._writer: threading.Thread | None = None
+
+        self._subscribers: Dict[str, list[Callable[[list["Settings.Change"]], Any]]] = {}
+        self._transaction_depth = 0
+        self._transaction_changes: Dict[str, Settings.Change] = {}
+
+    def subscribe(
+            self,
+            keys: str | Iterable[str],
+            callback: Callable[[list["Settings.Change"]], Any],
+    ) -> Callable[[], None]:
+        """
+        Calls 'callback' with the list of changes whenever any of 'keys' changes its effective value.
+        Returns a function that removes the subscription.
+
+        Usage:
+        ::
+            # In your Screen's on_mount
+            self._unsubscribe = self.settings.subscribe(
+                ["img_pad_left", "img_pad_right"], self._on_padding_changed
+            )
+            ...
+            def _on_padding_changed(self, changes: list[Settings.Change]) -> None:
+                for change in changes:
+                    self.query_one(f"#{change.key}", Input).value = str(change.new)
+            ...
+            # In on_unmount
+            self._unsubscribe()
+        """
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        for key in keys:
+            self._subscribers.setdefault(key, []).append(callback)
+
+        def unsubscribe() -> None:
+            for k in keys:
+                callbacks = self._subscribers.get(k, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._subscribers.pop(k, None)
+
+        return unsubscribe
+
+    @contextmanager
+    def transaction(self) -> Iterator["Settings"]:
+        """
+        Groups several changes into one notification per subscriber, sent when the outermost
+        transaction ends. A key changed several times is reported once, from its first old value
+        to its last new value (and not at all if it ends up unchanged).
+
+        Usage:
+        ::
+            with self.settings.transaction() as s:
+                s.set("img_pad_left", 5)
+                s.set("img_pad_right", 5)
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                changes = self._transaction_changes
+                self._transaction_changes = {}
+                self._dispatch([change for change in changes.values() if change.old != change.new])
+
+    def _effective(self, key: str) -> Any:
+        if key in self._user_prefs:
+            return self._user_prefs[key]
+        return self._registry.get(key, _MISSING)
+
+    @contextmanager
+    def _tracking(self, keys: Iterable[str] | None = None) -> Iterator[None]:
+        """
+        Records the effective values of 'keys' (all known keys if None) around a mutation
+        and reports the ones that changed. Free when nobody is subscribed.
+        """
+        if not self._subscribers:
+            yield
+            return
+        if keys is None:
+            before = {**self._registry, **self._user_prefs}
+        else:
+            before = {key: self._effective(key) for key in keys}
+        yield
+        if keys is None:
+            after = {**self._registry, **self._user_prefs}
+            keys = before.keys() | after.keys()
+        else:
+            after = {key: self._effective(key) for key in keys}
+
+        changes = []
+        for key in keys:
+            old = before.get(key, _MISSING)
+            new = after.get(key, _MISSING)
+            if old != new:
+                changes.append(Settings.Change(key, old, new))
+        self._notify(changes)
+
+    def _notify(self, changes: list["Settings.Change"]) -> None:
+        if not changes:
+            return
+        if self._transaction_depth:
+            for change in changes:
+                first = self._transaction_changes.get(change.key)
+                self._transaction_changes[change.key] = (
+                    change if first is None else Settings.Change(change.key, first.old, change.new)
+                )
+            return
+        self._dispatch(changes)
+
+    def _dispatch(self, changes: list["Settings.Change"]) -> None:
+        """Calls each interested subscriber once with the changes to the keys it subscribed to."""
+        per_callback: Dict[int, tuple[Callable, list[Settings.Change]]] = {}
+        for change in changes:
+            for callback in list(self._subscribers.get(change.key, ())):
+                per_callback.setdefault(id(callback), (callback, []))[1].append(change)
+        for callback, relevant in per_callback.values():
+            callback(relevant)
+
     def register_default(self, key: str, value: Any) -> None:
         """Registers a hardcoded 'factory default' value."""
         caller_self = None
@@ -98,15 +251,17 @@ class Settings:
                 f"called by it to ensure a single source of truth.\n"
                 f"{UserWarning}"
             )
-        self._registry[key] = value
+        with self._tracking([key]):
+            self._registry[key] = value
 
     def unregister_default(self, key: str) -> None:
         """
         Removes a 'factory default' from the registry.
         Also removes any corresponding settings to prevent orphans.
         """
-        self._registry.pop(key, None)
-        self._user_prefs.pop(key, None)
+        with self._tracking([key]):
+            self._registry.pop(key, None)
+            self._user_prefs.pop(key, None)
 
     def get(self, key: str) -> Any:
         """
@@ -127,7 +282,8 @@ class Settings:
         Sets a user setting in memory.
         This does NOT save it to the file until 'save()' is called.
         """
-        self._user_prefs[key] = value
+        with self._tracking([key]):
+            self._user_prefs[key] = value
 
     def get_all(self) -> Dict[str, Any]:
         """Returns a dictionary of all current settings, merging factory defaults with user settings."""
@@ -140,42 +296,128 @@ class Settings:
         """
         Loads user settings from the config file into memory.
         If the file doesn't exist or is corrupt, settings will be empty.
+        A save that is still waiting to be written takes precedence over the file, so this never blocks on it.
         """
+        with self._tracking():
+            self._user_prefs = self._read_prefs()
+
+    def _read_prefs(self) -> Dict[str, Any]:
+        with self._save_cond:
+            # The newest save not yet renamed into place, queued or being written right now
+            pending = self._pending_save if self._pending_save is not None else self._writing_snapshot
+        if pending is not None:
+            return json.loads(pending)
+
         if self.config_file.exists():
             try:
                 with self.config_file.open("r") as f:
                     data = json.load(f)
                     if isinstance(data, dict):
-                        self._user_prefs = data
-                    else:
-                        self._user_prefs = {}
+                        return data
             except (IOError, json.JSONDecodeError):
-                self._user_prefs = {}
-        else:
-            self._user_prefs = {}
+                pass
+        return {}
 
     def save(self) -> None:
-        """Saves the current user settings from memory to the config file."""
+        """
+        Schedules the current user settings to be saved to the config file.
+        Returns immediately; successive saves within 'save_delay' seconds are merged into one write.
+        """
         try:
-            self.config_file.parent.mkdir(parents=True, exist_ok=True)
-            with self.config_file.open("w") as f:
-                json.dump(self._user_prefs, f, indent=2, sort_keys=True)
-        except IOError as e:
+            snapshot = json.dumps(self._user_prefs, indent=2, sort_keys=True)
+        except (TypeError, ValueError) as e:
             print(f"[Settings] Error saving config file: {e}")
+            return
+
+        with self._save_cond:
+            self._pending_save = snapshot
+            self._save_deadline = time.monotonic() + self.save_delay
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="settings-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+            self._save_cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until any scheduled save has been written, skipping the remaining delay.
+        Returns False if the timeout expired first.
+        """
+        with self._save_cond:
+            if self._pending_save is None and self._writing_snapshot is None:
+                return True
+            self._flush_requested = True
+            self._save_cond.notify_all()
+            done = self._save_cond.wait_for(
+                lambda: self._pending_save is None and self._writing_snapshot is None, timeout
+            )
+            self._flush_requested = False
+            return done
+
+    def _writer_loop(self) -> None:
+        """Background writer: waits out the debounce delay, then writes the newest snapshot."""
+        while True:
+            with self._save_cond:
+                self._save_cond.wait_for(lambda: self._pending_save is not None)
+                while not self._flush_requested:
+                    remaining = self._save_deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._save_cond.wait(remaining)
+                snapshot = self._writing_snapshot = self._pending_save
+                self._pending_save = None
+            try:
+                self._write_atomic(snapshot)
+            except OSError as e:
+                print(f"[Settings] Error saving config file: {e}")
+            finally:
+                with self._save_cond:
+                    self._writing_snapshot = None
+                    self._save_cond.notify_all()
+
+    def _write_atomic(self, data: str) -> None:
+        """Writes to a temp file in the same directory, fsyncs it and renames it over the config file."""
+        target = self.config_file
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        # Persist the rename itself (not supported on Windows, where replace is already durable enough)
+        if hasattr(os, "O_DIRECTORY"):
+            try:
+                dir_fd = os.open(target.parent, os.O_RDONLY | os.O_DIRECTORY)
+            except OSError:
+                return
+            try:
+                os.fsync(dir_fd)
+            except OSError:
+                pass
+            finally:
+                os.close(dir_fd)
 
     def reset(self, key: str) -> None:
         """
         Resets a single user setting back to its factory value by removing it from
         the user's settings. Does not persist until saved.
         """
-        self._user_prefs.pop(key, None)
+        with self._tracking([key]):
+            self._user_prefs.pop(key, None)
 
     def reset_all(self) -> None:
         """
         Resets ALL user settings back to factory defaults by clearing
         the user setting map. Does not persist until saved.
         """
-        self._user_prefs.clear()
+        with self._tracking(list(self._user_prefs)):
+            self._user_prefs.clear()
 
     def save_result(self, key: str) -> Callable:
         """
@@ -21,6 +21,7 @@ from .neon_select import NeonSelect
 from .path_button import PathButton
 from .sequence import Sequence
 from .toggle import Toggle
+from .virtual_selection_list import VirtualSelectionList
 
 __all__ = [
     "AppLevelLog",
@@ -43,5 +44,6 @@ __all__ = [
     "NeonSelect",
     "PathButton",
     "Sequence",
-    "Toggle"
+    "Toggle",
+    "VirtualSelectionList"
 ]
\ No newline at end of file
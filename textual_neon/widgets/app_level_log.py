@@ -1,3 +1,11 @@
+import asyncio
+import atexit
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
 import pyperclip
 from textual import on
 from textual.containers import Horizontal
@@ -5,10 +13,34 @@ from textual.message import Message
 from textual.widget import Widget
 from textual.widgets import Log
 
-# Assuming MinimalButton is in this location
+from textual_neon.utils.log_spill import LogSpill
+from textual_neon.utils.paths import Paths
 from textual_neon.widgets.minimal_button import MinimalButton
 
 
+class LogEntry(NamedTuple):
+    """A single structured entry of the app-level log history."""
+    timestamp: float
+    severity: str
+    message: str
+
+    @property
+    def line(self) -> str:
+        """The entry formatted for display."""
+        return f"[{self.severity.upper()}]: {self.message}"
+
+    def to_json(self) -> str:
+        return json.dumps({"t": self.timestamp, "severity": self.severity, "message": self.message})
+
+    @staticmethod
+    def from_json(raw: str) -> "LogEntry | None":
+        try:
+            data = json.loads(raw)
+            return LogEntry(float(data["t"]), str(data["severity"]), str(data["message"]))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
 class AppLogWrite(Message):
     """
     A custom message to send a log string to the AppLevelLog widget
@@ -27,14 +59,28 @@ class AppLogWrite(Message):
         super().__init__()
 
 
+class AppLogFlush(Message):
+    """Posted (at most once per batch) to flush the pending AppLevelLog writes."""
+
+
 class AppLevelLog(Widget):
     """
     An enhanced, standalone Log widget that persists its history at the App level.
     All instances of AppLevelLog will share and display the same log history.
 
-    It listens for `AppLogWrite` messages to write new lines and uses the `ensure_history` static method
-    to guarantee the app-level log_history list exists.
+    It listens for `AppLogWrite` messages to write new lines and uses the `ensure_history` method
+    to guarantee the app-level log_history deque exists.
+
+    - Writes are queued and flushed together after the next refresh, so a burst of log calls
+      costs one Log update and one scroll instead of one per line.
+    - The history holds structured LogEntry items and is capped at HISTORY_LIMIT entries.
+    - Entries are persisted as JSON lines by a background LogSpill sink in SINK_DIR (set it to None
+      to disable persistence), and the newest entries are reloaded from it after a restart.
     """
+    HISTORY_LIMIT: int = 5000
+    SINK_DIR: Path | None = Paths.app_base_dir() / "logs"
+    SINK_FILE: str = "app_log.jsonl"
+
     DEFAULT_CSS = """
     AppLevelLog {
         Horizontal#log-controls-row {
@@ -95,6 +141,8 @@ class AppLevelLog(Widget):
         self._show_clear_button = show_clear_button
         self._copy_button_label = copy_button_label
         self._clear_button_label = clear_button_label
+        self._pending: deque[LogEntry] = deque()
+        self._flush_scheduled = False
 
         self.ensure_history()
 
@@ -106,61 +154,142 @@ class AppLevelLog(Widget):
             yield MinimalButton(
                 self._clear_button_label, id="clear-logs-btn", variant="primary"
             )
-        yield Log(id="log")
+        yield Log(id="log", max_lines=self.HISTORY_LIMIT)
 
-    def ensure_history(self) -> list[str]:
+    def ensure_history(self) -> deque[LogEntry]:
         """
-        Ensures the app has a 'log_history' attribute that is a list.
+        Ensures the app has a 'log_history' attribute that is a capped deque of LogEntry items,
+        and a 'log_session_start' timestamp: every entry of this session is at or after it.
         """
         if hasattr(self.app, "log_history"):
-            if not isinstance(self.app.log_history, list):
+            if not isinstance(self.app.log_history, deque):
                 raise AttributeError(
-                    f"App must have the 'log_history' attribute set to a list. "
+                    f"App must have the 'log_history' attribute set to a deque. "
                     f"Different type detected: {type(self.app.log_history)}"
                 )
             else:
                 return self.app.log_history
         # noinspection PyTypeHints
-        self.app.log_history: list[str] = []
+        self.app.log_session_start: float = time.time()
+        # noinspection PyTypeHints
+        self.app.log_history: deque[LogEntry] = deque(maxlen=self.HISTORY_LIMIT)
         return self.app.log_history
 
+    def ensure_sink(self) -> LogSpill | None:
+        """
+        Ensures the app has a 'log_sink' attribute holding the shared JSONL sink (or None if disabled).
+        The sink is flushed when the interpreter exits.
+        """
+        if hasattr(self.app, "log_sink"):
+            return self.app.log_sink
+        sink = None
+        if self.SINK_DIR is not None:
+            # Keep roughly twice the in-memory history on disk across the active file and backups
+            sink = LogSpill(self.SINK_DIR / self.SINK_FILE, max_bytes=2 * 1024 * 1024, backups=2)
+            atexit.register(sink.flush)
+        # noinspection PyTypeHints
+        self.app.log_sink: LogSpill | None = sink
+        return sink
+
     def on_mount(self) -> None:
         """
         Called when the widget is mounted.
         Sets button visibility and populates the log with persistent history.
+        The first instance in the app also reloads the history saved by previous sessions.
         """
         self.query_one("#copy-logs-btn", MinimalButton).visible = self._show_copy_button
         self.query_one("#clear-logs-btn", MinimalButton).visible = self._show_clear_button
 
         log = self.query_one(Log)
         log_history = self.ensure_history()
-        for line in log_history:
-            log.write_line(line)
+        log.write_lines([entry.line for entry in log_history], scroll_end=False)
+        log.scroll_end(animate=False)
+
+        if not getattr(self.app, "log_history_restored", False):
+            self.app.log_history_restored = True
+            sink = self.ensure_sink()
+            if sink is not None:
+                self.run_worker(self._restore_history(sink), exclusive=True, group="restore-history")
+
+    async def _restore_history(self, sink: LogSpill) -> None:
+        """
+        Loads the newest saved entries from the sink, off the UI thread, and puts them before this session's.
+        The sink already holds this session's flushed entries too; those are skipped, as they are in the history.
+        """
+        session_start = getattr(self.app, "log_session_start", time.time())
+
+        def _load() -> list[LogEntry]:
+            raw_tail = deque(sink.iter_lines(), maxlen=self.HISTORY_LIMIT)
+            return [
+                entry for raw in raw_tail
+                if (entry := LogEntry.from_json(raw)) is not None and entry.timestamp < session_start
+            ]
+
+        restored = await asyncio.to_thread(_load)
+        if not restored:
+            return
+        log_history = self.ensure_history()
+        current = list(log_history)
+        log_history.clear()
+        log_history.extend(restored)
+        log_history.extend(current)
+
+        log = self.query_one(Log)
+        log.clear()
+        log.write_lines([entry.line for entry in log_history], scroll_end=False)
         log.scroll_end(animate=False)
 
     def info(self, content: str) -> None:
         """Writes in the log with the 'info' severity."""
-        self.post_message(AppLogWrite(content, severity="info"))
+        self._enqueue(content, "info")
 
     def warning(self, content: str) -> None:
         """Writes in the log with the 'warning' severity."""
-        self.post_message(AppLogWrite(content, severity="warning"))
+        self._enqueue(content, "warning")
 
     def error(self, content: str) -> None:
         """Writes in the log with the 'error' severity."""
-        self.post_message(AppLogWrite(content, severity="error"))
+        self._enqueue(content, "error")
 
     def write_line(self, content: str) -> None:
         """
         Writes the line to the log AND appends it to the app's persistent history.
         """
-        self.post_message(AppLogWrite(content, severity="info"))
+        self._enqueue(content, "info")
 
     def write(self, content: str) -> None:
         """
         Writes the content to the log AND appends it to the app's persistent history.
         """
-        self.post_message(AppLogWrite(content, severity="info"))
+        self._enqueue(content, "info")
+
+    def _enqueue(self, content: str, severity: str) -> None:
+        """
+        Queues an entry and requests a single flush for the whole batch.
+        Safe to call from other threads, as the flush request is a posted message.
+        """
+        self._pending.append(LogEntry(time.time(), severity, content))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.post_message(AppLogFlush())
+
+    def _flush_pending(self) -> None:
+        """Writes all queued entries to the Log, the history and the sink at once."""
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        entries = []
+        while self._pending:
+            entries.append(self._pending.popleft())
+
+        self.ensure_history().extend(entries)
+        sink = self.ensure_sink()
+        if sink is not None:
+            sink.append(entry.to_json() for entry in entries)
+
+        log_widget = self.query_one(Log)
+        log_widget.write_lines([entry.line for entry in entries], scroll_end=False)
+        log_widget.scroll_end(animate=False)
 
     @on(MinimalButton.Pressed, "#clear-logs-btn")
     def clear_logs(self, event: MinimalButton.Pressed) -> None:
@@ -172,6 +301,9 @@ class AppLevelLog(Widget):
         self.screen.notify("Logs cleared.")
         log_history = self.ensure_history()
         log_history.clear()
+        sink = self.ensure_sink()
+        if sink is not None:
+            sink.clear()
 
     @on(MinimalButton.Pressed, "#copy-logs-btn")
     def copy_logs(self, event: MinimalButton.Pressed) -> None:
@@ -183,11 +315,13 @@ class AppLevelLog(Widget):
         if not log_history:
             self.screen.notify("There are no logs to copy.", severity="warning")
             return
+        self.run_worker(self._copy_logs_worker(list(log_history)), exclusive=True, group="copy-logs")
 
-        all_text = "\n".join(log_history)
-
+    async def _copy_logs_worker(self, entries: list[LogEntry]) -> None:
+        """Formats and copies the history snapshot off the UI thread."""
+        all_text = await asyncio.to_thread(lambda: "\n".join(entry.line for entry in entries))
         try:
-            pyperclip.copy(all_text)
+            await asyncio.to_thread(pyperclip.copy, all_text)
             self.screen.notify("All logs have been copied to clipboard!")
         except Exception as e:
             self.screen.notify(f"{e}", title="Clipboard Error", severity="error")
@@ -195,16 +329,13 @@ class AppLevelLog(Widget):
     @on(AppLogWrite)
     def on_log_event(self, event: AppLogWrite) -> None:
         """
-        Listens for the custom AppLogWrite message and writes to the log.
+        Listens for the custom AppLogWrite message and queues it with the other pending writes.
         """
         event.stop()
-        log_line = f"[{event.severity.upper()}]: {event.message}"
+        self._enqueue(event.message, event.severity)
 
-        # Write directly to the Log widget to prevent recursion
-        log_widget = self.query_one(Log)
-        log_widget.write_line(log_line)
-
-        log_history = self.ensure_history()
-        log_history.append(log_line)
-
-        log_widget.scroll_end(animate=True)
\ No newline at end of file
+    @on(AppLogFlush)
+    def on_log_flush(self, event: AppLogFlush) -> None:
+        """Flushes the pending writes after the next refresh, so each batch costs one repaint."""
+        event.stop()
+        self.call_after_refresh(self._flush_pending)
\ No newline at end of file
@@ -1,14 +1,25 @@
+import asyncio
+from collections import deque
+from pathlib import Path
+
 import pyperclip
-from click.termui import visible_prompt_func
 from textual import on
 from textual.containers import Horizontal
 from textual.widget import Widget
 from textual.widgets import Log
 
+from textual_neon.utils.log_spill import LogSpill
 from textual_neon.widgets.minimal_button import MinimalButton
 
 
 class NeonLog(Widget):
+    """
+    A Log with copy/clear controls whose memory use stays flat for any session length.
+
+    Only the newest 'max_lines' lines are kept in memory (a ring buffer, also used as the Log's line cap).
+    Older lines are handed to a LogSpill, which appends them to a rotating file from a background thread.
+    Copying streams the spilled lines back from disk off the UI thread.
+    """
     DEFAULT_CSS = """
     NeonLog {
         Horizontal#log-controls-row {
@@ -59,6 +70,10 @@ class NeonLog(Widget):
             show_clear_button: bool = True,
             copy_button_label: str = "Copy Logs",
             clear_button_label: str = "Clear Logs",
+            max_lines: int = 2000,
+            spill_path: Path | None = None,
+            spill_max_bytes: int = 8 * 1024 * 1024,
+            spill_backups: int = 3,
             **kwargs
     ) -> None:
         super().__init__(**kwargs)
@@ -66,46 +81,98 @@ class NeonLog(Widget):
         self._show_clear_button = show_clear_button
         self._copy_button_label = copy_button_label
         self._clear_button_label = clear_button_label
+        self.max_lines = max(1, max_lines)
+        self._lines: deque[str] = deque(maxlen=self.max_lines)
+        self._partial = ""
+        self._spill = LogSpill(
+            spill_path or LogSpill.default_path(self.id or "neon-log"),
+            max_bytes=spill_max_bytes,
+            backups=spill_backups,
+        )
 
     def compose(self):
         with Horizontal(id="log-controls-row"):
             yield MinimalButton(self._copy_button_label, id="copy-logs-btn", variant="primary")
             yield MinimalButton(self._clear_button_label, id="clear-logs-btn", variant="primary")
-        yield Log(id="log")
+        yield Log(id="log", max_lines=self.max_lines)
 
     def on_mount(self) -> None:
         """Called when the widget is mounted."""
         self.query_one("#copy-logs-btn", MinimalButton).visible = self._show_copy_button
         self.query_one("#clear-logs-btn", MinimalButton).visible = self._show_clear_button
 
+    def on_unmount(self) -> None:
+        """Stops the spill writer and removes the spill files."""
+        self._spill.close(delete=True)
+
     def write_line(self, content: str) -> None:
         """A helper method to easily write a line to the internal Log widget."""
+        self._record(f"{content}\n")
         self.query_one(Log).write_line(content)
 
     def write(self, content: str) -> None:
         """A helper method to easily write to the internal Log widget."""
+        self._record(content)
         self.query_one(Log).write(content)
 
+    def _record(self, content: str) -> None:
+        """Adds complete lines to the ring buffer, spilling the lines it evicts."""
+        *complete, self._partial = (self._partial + content).split("\n")
+        if not complete:
+            return
+        lines = self._lines
+        overflow = len(lines) + len(complete) - self.max_lines
+        if overflow > 0:
+            from_ring = min(overflow, len(lines))
+            evicted = [lines.popleft() for _ in range(from_ring)]
+            evicted.extend(complete[:overflow - from_ring])
+            self._spill.append(evicted)
+        lines.extend(complete)
+
+    def _history_text(self, recent: list[str]) -> str:
+        """Joins the spilled and in-memory lines. Blocking, run it off the UI thread."""
+        return "\n".join([*self._spill.iter_lines(), *recent])
+
+    async def export(self, target: Path) -> None:
+        """Streams the full log history (spilled and in-memory) into a text file, off the UI thread."""
+        recent = [*self._lines, self._partial] if self._partial else list(self._lines)
+
+        def _export() -> None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with target.open("w", encoding="utf-8") as f:
+                for line in self._spill.iter_lines():
+                    f.write(f"{line}\n")
+                for line in recent:
+                    f.write(f"{line}\n")
+
+        await asyncio.to_thread(_export)
+
     @on(MinimalButton.Pressed, "#clear-logs-btn")
     def clear_logs(self, event: MinimalButton.Pressed) -> None:
         """Called when the 'Clear Logs' button is pressed."""
         self.query_one(Log).clear()
+        self._lines.clear()
+        self._partial = ""
+        self._spill.clear()
         self.screen.notify("Logs cleared.")
         event.stop()
 
     @on(MinimalButton.Pressed, "#copy-logs-btn")
     def copy_logs(self, event: MinimalButton.Pressed) -> None:
-        """Called when the 'Copy Logs' button is pressed."""
-        log = self.query_one(Log)
-        all_text = "\n".join(str(line) for line in log.lines)
+        """Called when the 'Copy Logs' button is pressed. The copy itself runs off the UI thread."""
+        event.stop()
+        self.run_worker(self._copy_logs_worker, exclusive=True, group="copy-logs")
+
+    async def _copy_logs_worker(self) -> None:
+        recent = [*self._lines, self._partial] if self._partial else list(self._lines)
+        all_text = await asyncio.to_thread(self._history_text, recent)
 
         if not all_text:
             self.screen.notify("There are no logs to copy.", severity="warning")
             return
 
         try:
-            pyperclip.copy(all_text)
+            await asyncio.to_thread(pyperclip.copy, all_text)
             self.screen.notify("Logs have been copied to clipboard!")
         except Exception as e:
-            self.screen.notify(f"Clipboard error: {e}", severity="error")
-        event.stop()
\ No newline at end of file
+            self.screen.notify(f"Clipboard error: {e}", severity="error")
\ No newline at end of file
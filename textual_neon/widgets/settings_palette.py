@@ -20,14 +20,13 @@ class SettingsPalette(Widget):
         ...
         @on(SettingsButton.Pressed, "#restore-settings-btn")
         def restore_settings_button_pressed(self) -> None:
+            # Widgets subscribed with self.settings.subscribe(...) update themselves
             self.settings.load()
-            self._update_ui_from_preferences()
         ...
         @on(SettingsButton.Pressed, "#reset-settings-btn")
         def reset_settings_button_pressed(self) -> None:
             self.settings.reset_all()
             self.settings.save()
-            self._update_ui_from_preferences()
     """
 
     DEFAULT_CSS = """